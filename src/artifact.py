@@ -0,0 +1,163 @@
+"""
+Przenośny artefakt modelu - BrewSense
+Zapis skompilowanego systemu do wersjonowanego pliku .npz oraz minimalny
+loader korzystający wyłącznie z NumPy (bez scikit-fuzzy i networkx)
+"""
+
+import argparse
+
+import numpy as np
+
+from batch_engine import (DEFUZZ_METHODS, QUALITY_LABELS, QUALITY_THRESHOLDS,
+                          CompiledRuleBase, sample_inputs)
+
+
+# Wersja formatu pliku - zmieniana przy każdej niezgodnej zmianie zawartości
+FORMAT_VERSION = 1
+
+# Tablice źródłowe modelu; tablice pochodne (output_mf, wagi centroidu)
+# są odtwarzane przy wczytaniu
+SOURCE_ARRAYS = ('input_ranges', 'term_params', 'term_var', 'rule_antecedents',
+                 'rule_consequents', 'output_universe', 'output_params')
+
+
+class ModelArtifact:
+    """
+    Model wczytany z artefaktu: skompilowana baza reguł wraz z progami
+    i etykietami kategorii jakości zapisanymi w pliku
+    """
+
+    def __init__(self, compiled, thresholds, labels, fingerprint):
+        """
+        Args:
+            compiled (CompiledRuleBase): Odtworzony model
+            thresholds (sequence): Progi kategorii jakości
+            labels (sequence): Etykiety kategorii (len(thresholds) + 1)
+            fingerprint (str): Skrót modelu zapisany w pliku
+        """
+        self.compiled = compiled
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.labels = tuple(labels)
+        self.fingerprint = fingerprint
+
+    def evaluate(self, inputs, method='centroid'):
+        """
+        Ocena wsadowa (N x 4) -> jakość (N,)
+
+        Args:
+            inputs (array-like): Wejścia w kolejności INPUT_NAMES
+            method (str): Metoda defuzyfikacji (DEFUZZ_METHODS)
+
+        Returns:
+            np.ndarray: Jakość kawy (N,)
+        """
+        return self.compiled.evaluate(inputs, method=method)
+
+    def label(self, quality):
+        """
+        Etykiety kategorii dla wyników (progi z artefaktu)
+
+        Args:
+            quality (array-like): Wyniki (N,)
+
+        Returns:
+            list: Etykiety (N,)
+        """
+        index = np.searchsorted(self.thresholds, np.asarray(quality).reshape(-1), side='right')
+        return [self.labels[i] for i in index]
+
+
+def save(compiled, path):
+    """
+    Zapis modelu do pliku .npz (bez obiektów pickle)
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany model
+        path (str): Ścieżka pliku
+    """
+    arrays = compiled._arrays()
+    np.savez_compressed(
+        path,
+        format_version=np.array(FORMAT_VERSION),
+        fingerprint=np.array(compiled.fingerprint()),
+        term_names=np.array(compiled.term_names),
+        output_names=np.array(compiled.output_names),
+        fallback_values=np.array([compiled.default_value, compiled.error_value]),
+        quality_thresholds=np.array(QUALITY_THRESHOLDS, dtype=np.float64),
+        quality_labels=np.array(QUALITY_LABELS),
+        **{name: arrays[name] for name in SOURCE_ARRAYS},
+    )
+
+
+def load(path):
+    """
+    Wczytanie modelu z pliku .npz - wymaga jedynie NumPy
+
+    Args:
+        path (str): Ścieżka pliku z save()
+
+    Returns:
+        ModelArtifact: Model gotowy do oceny wsadowej
+
+    Raises:
+        ValueError: Nieobsługiwana wersja formatu lub skrót niezgodny z zawartością
+    """
+    with np.load(path, allow_pickle=False) as data:
+        version = int(data['format_version'])
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Nieobsługiwana wersja artefaktu: {version} (oczekiwano {FORMAT_VERSION})")
+        default_value, error_value = data['fallback_values'].tolist()
+        compiled = CompiledRuleBase(
+            term_names=data['term_names'].tolist(),
+            output_names=data['output_names'].tolist(),
+            default_value=default_value,
+            error_value=error_value,
+            **{name: data[name] for name in SOURCE_ARRAYS},
+        )
+        fingerprint = str(data['fingerprint'])
+        thresholds = data['quality_thresholds']
+        labels = data['quality_labels'].tolist()
+
+    if compiled.fingerprint() != fingerprint:
+        raise ValueError("Skrót artefaktu nie zgadza się z zawartością pliku")
+    return ModelArtifact(compiled, thresholds, labels, fingerprint)
+
+
+def verify(compiled, artifact, samples=10000, seed=0):
+    """
+    Porównanie wyników modelu oryginalnego i wczytanego (test zgodności)
+
+    Args:
+        compiled (CompiledRuleBase): Model oryginalny
+        artifact (ModelArtifact): Model wczytany z pliku
+        samples (int): Liczba losowych wejść
+        seed (int): Ziarno generatora
+
+    Returns:
+        dict: metoda defuzyfikacji -> maksymalna różnica wyników
+    """
+    inputs = sample_inputs(compiled.input_ranges, samples, seed)
+    return {method: float(np.max(np.abs(compiled.evaluate(inputs, method=method)
+                                         - artifact.evaluate(inputs, method))))
+            for method in DEFUZZ_METHODS}
+
+
+def main():
+    """Narzędzie wiersza poleceń: eksport artefaktu z testem zgodności"""
+    parser = argparse.ArgumentParser(description="Eksport przenośnego modelu BrewSense")
+    parser.add_argument('path', help="Plik wyjściowy .npz")
+    parser.add_argument('--samples', type=int, default=10000, help="Liczba próbek testu zgodności")
+    args = parser.parse_args()
+
+    from fuzzy_system import CoffeeQualitySystem
+
+    compiled = CoffeeQualitySystem(metrics=False).compiled
+    save(compiled, args.path)
+    artifact = load(args.path)
+    print(f"Zapisano {args.path} (format {FORMAT_VERSION}, skrót {artifact.fingerprint[:16]})")
+    for method, difference in verify(compiled, artifact, args.samples).items():
+        print(f"{method:<18}maksymalna różnica {difference:.1e}")
+
+
+if __name__ == "__main__":
+    main()
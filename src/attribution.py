@@ -0,0 +1,149 @@
+"""
+Atrybucja reguł - BrewSense
+Wsadowy rozkład wyniku na siły odpalenia reguł i wkłady termów jakości
+w centroid; tekst wyjaśnienia tworzony dopiero dla wybranego rekordu
+"""
+
+import numpy as np
+
+from batch_engine import CHUNK_SIZE, STATUS_ERROR, input_chunk, input_rows
+
+
+def attribution_dtype(compiled):
+    """
+    Typ rekordu atrybucji: wynik, status wiersza (kody STATUS_* z batch_engine),
+    siły odpalenia reguł (R) i wkłady termów (T)
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany model
+
+    Returns:
+        np.dtype: Typ strukturalny (float32 dla tablic - 4 bajty na wartość)
+    """
+    return np.dtype([
+        ('quality', np.float64),
+        ('status', np.uint8),
+        ('firing', np.float32, (compiled.n_rules,)),
+        ('contribution', np.float32, (len(compiled.output_names),)),
+    ])
+
+
+def _term_moments(compiled, activation):
+    """
+    Pole i moment funkcji zagregowanej w podziale na termy dominujące
+    w każdym punkcie uniwersum (z namiotami punktów odcięcia)
+
+    Returns:
+        tuple: (pole całkowite (N,), moment na term (N x T))
+    """
+    rows, terms = activation.shape
+    aggregated = compiled.aggregate(activation)
+
+    # Każdy punkt uniwersum należy do pierwszego termu osiągającego w nim
+    # maksimum; punkty przypisane są wykluczane z kolejnych termów
+    pending = aggregated.copy()
+    weights = np.stack([compiled.area_weights, compiled.moment_weights], axis=1)
+    area, moment = np.zeros((rows, terms)), np.zeros((rows, terms))
+    for term, support in enumerate(compiled.output_support):
+        clipped = np.minimum(activation[:, term:term + 1], compiled.output_mf[term, support])
+        won = clipped == pending[:, support]
+        clipped *= won
+        area[:, term], moment[:, term] = (clipped @ weights[support]).T
+        np.copyto(pending[:, support], -1.0, where=won)
+
+    # Namiot punktu odcięcia należy do termu, którego zbocze go wyznacza
+    x = compiled.output_universe
+    cell, points, _, height = compiled._cut_point_cells(aggregated, activation)
+    tent_area = (x[cell + 1] - x[cell]) * height / 2
+    tent_moment = tent_area * (x[cell] + points + x[cell + 1]) / 3
+    area += tent_area[:, :terms] + tent_area[:, terms:]
+    moment += tent_moment[:, :terms] + tent_moment[:, terms:]
+    return area.sum(axis=1), moment
+
+
+def attribute(compiled, inputs, chunk_size=CHUNK_SIZE):
+    """
+    Wynik z rozkładem: siła odpalenia każdej reguły i wkład każdego termu
+    jakości w centroid (moment termu / pole całkowite). Wkłady sumują się
+    do wyniku tylko dla wierszy ze statusem STATUS_OK i STATUS_CLAMPED;
+    wiersze STATUS_NO_ACTIVATION (default_value) i STATUS_ERROR (wejście
+    NaN, error_value) mają zerowe wkłady i siły odpalenia.
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany model
+        inputs (array-like): Wejścia (N x 4) w kolejności INPUT_NAMES
+            lub tablica strukturalna z polami INPUT_NAMES
+        chunk_size (int): Liczba próbek przetwarzanych naraz
+
+    Returns:
+        np.ndarray: Rekordy attribution_dtype() (N,)
+    """
+    inputs = input_rows(inputs)
+
+    result = np.zeros(len(inputs), dtype=attribution_dtype(compiled))
+    for start in range(0, len(inputs), chunk_size):
+        stop = min(start + chunk_size, len(inputs))
+        invalid, valid = compiled._valid_inputs(input_chunk(inputs[start:stop]))
+        clamped = compiled.clamp(valid)
+        firing = compiled.fire(compiled.fuzzify(clamped))
+        activation = compiled.activate(firing)
+        area, moment = _term_moments(compiled, activation)
+
+        fired = (area > 0) & ~invalid
+        contribution = np.where(fired[:, None], moment / np.where(fired, area, 1.0)[:, None], 0.0)
+        quality = np.where(fired, contribution.sum(axis=1), compiled.default_value)
+        result['status'][start:stop] = compiled._row_status((clamped != valid).any(axis=1),
+                                                            activation, quality, invalid)
+        result['quality'][start:stop] = quality
+        result['firing'][start:stop] = np.where(invalid[:, None], 0.0, firing)
+        result['contribution'][start:stop] = contribution
+    return result
+
+
+def rule_text(compiled, rule):
+    """
+    Czytelny zapis reguły, np. 'aroma[strong] & temperature[optimal] -> excellent'
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany model
+        rule (int): Indeks reguły
+
+    Returns:
+        str: Opis reguły
+    """
+    antecedents = [compiled.term_names[k] for k in compiled.rule_antecedents[rule] if k >= 0]
+    return f"{' & '.join(antecedents)} -> {compiled.output_names[compiled.rule_consequents[rule]]}"
+
+
+def render(compiled, record, top=5):
+    """
+    Tekst wyjaśnienia jednego rekordu - wywoływany tylko dla rekordów,
+    które użytkownik otwiera
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany model
+        record (np.void): Rekord z attribute()
+        top (int): Liczba najsilniejszych reguł w opisie
+
+    Returns:
+        str: Wyjaśnienie wyniku
+    """
+    lines = [f"Wynik: {record['quality']:.1f}/100"]
+    if record['status'] == STATUS_ERROR:
+        lines.append("Niepoprawne wejście (NaN) - wartość awaryjna.")
+        return "\n".join(lines)
+    firing = record['firing']
+    active = np.flatnonzero(firing > 0)
+    if not len(active):
+        lines.append("Żadna reguła nie została aktywowana - wartość domyślna.")
+        return "\n".join(lines)
+
+    lines.append(f"Aktywne reguły ({len(active)} z {len(firing)}), najsilniejsze:")
+    for rule in active[np.argsort(-firing[active], kind='stable')][:top]:
+        lines.append(f"  {firing[rule]:.2f}  {rule_text(compiled, rule)}")
+
+    lines.append("Wkład termów jakości w wynik:")
+    contribution = record['contribution']
+    for term in np.flatnonzero(contribution):
+        lines.append(f"  {compiled.output_names[term]:<12}{contribution[term]:6.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,84 @@
+"""
+Pomiar wydajności - BrewSense
+Porównanie kosztu metod defuzyfikacji na ścieżce wsadowej, jądra JIT
+oraz modelu Sugeno
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import jit_kernel
+from batch_engine import DEFUZZ_METHODS, sample_inputs
+
+
+def time_call(function, inputs, repeat=5):
+    """
+    Najlepszy z kilku pomiarów czasu funkcji wsadowej
+
+    Args:
+        function (callable): Funkcja (N x 4) -> (N,)
+        inputs (np.ndarray): Wejścia (N x 4)
+        repeat (int): Liczba powtórzeń pomiaru
+
+    Returns:
+        float: Czas na próbkę w sekundach
+    """
+    function(inputs[:64])
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(inputs)
+        best = min(best, time.perf_counter() - start)
+    return best / len(inputs)
+
+
+def time_methods(compiled, inputs, methods=DEFUZZ_METHODS, repeat=5):
+    """
+    Najlepszy z kilku pomiarów czasu oceny wsadowej dla każdej metody
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany model
+        inputs (np.ndarray): Wejścia (N x 4)
+        methods (sequence): Mierzone metody defuzyfikacji
+        repeat (int): Liczba powtórzeń pomiaru
+
+    Returns:
+        dict: metoda -> czas na próbkę w sekundach
+    """
+    return {method: time_call(lambda batch: compiled.evaluate(batch, method=method), inputs, repeat)
+            for method in methods}
+
+
+def main():
+    """Narzędzie wiersza poleceń: względny koszt metod defuzyfikacji, jądra JIT i modelu Sugeno"""
+    parser = argparse.ArgumentParser(description="Pomiar wydajności BrewSense")
+    parser.add_argument('--samples', type=int, default=100000, help="Liczba próbek")
+    parser.add_argument('--repeat', type=int, default=5, help="Liczba powtórzeń pomiaru")
+    args = parser.parse_args()
+
+    from fuzzy_system import CoffeeQualitySystem
+
+    system = CoffeeQualitySystem(metrics=False)
+    compiled = system.compiled
+    inputs = sample_inputs(compiled.input_ranges, args.samples)
+    results = time_methods(compiled, inputs, repeat=args.repeat)
+    results['sugeno'] = time_call(system.evaluate_sugeno, inputs, args.repeat)
+    if jit_kernel.AVAILABLE:
+        results['centroid (jit)'] = time_call(lambda batch: jit_kernel.evaluate(compiled, batch),
+                                              inputs, args.repeat)
+
+    print(f"{'metoda':<18}{'µs/próbkę':>12}{'względem centroid':>20}")
+    for method, seconds in results.items():
+        print(f"{method:<18}{seconds * 1e6:>12.2f}{seconds / results['centroid']:>19.2f}x")
+
+    if jit_kernel.AVAILABLE:
+        deviation = np.abs(jit_kernel.evaluate(compiled, inputs) - compiled.evaluate(inputs)).max()
+        print(f"Maksymalna różnica jądra JIT względem NumPy: {deviation:.2e}")
+    else:
+        print("Numba nie jest zainstalowana - jądro JIT pominięte")
+
+
+if __name__ == "__main__":
+    main()
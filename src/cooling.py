@@ -0,0 +1,290 @@
+"""
+Krzywe stygnięcia - BrewSense
+Przyrostowa ocena filiżanek, w których zmienia się tylko temperatura:
+przynależności gorzkości, kwasowości i aromatu oraz częściowe minima reguł
+liczone są raz, a każda nowa próbka rozmywa jedynie temperaturę
+"""
+
+import numpy as np
+
+from batch_engine import (DEFUZZ_METHODS, DEFUZZ_WITHOUT_AGGREGATION, INPUT_NAMES, QUALITY_LABELS,
+                          QUALITY_THRESHOLDS, STATUS_ERROR, STATUS_NO_ACTIVATION,
+                          label_index, trapezoid)
+
+
+TEMPERATURE = INPUT_NAMES.index('temperature')
+
+# Zmienne stałe podczas stygnięcia (kolejność kolumn w `cups`)
+FIXED_INPUTS = tuple(name for name in INPUT_NAMES if name != 'temperature')
+
+
+def label_crossings(start_time, start_quality, end_time, end_quality):
+    """
+    Chwile przekroczenia progów kategorii jakości na odcinkach między
+    parami próbek (interpolacja liniowa jakości w czasie)
+
+    Args:
+        start_time, start_quality (np.ndarray): Początki odcinków (P,)
+        end_time, end_quality (np.ndarray): Końce odcinków (P,)
+
+    Returns:
+        list: Słowniki {segment, time, threshold, label, direction} posortowane
+            po odcinku i czasie; label to kategoria po przekroczeniu, direction 'up'/'down'
+    """
+    crossings = []
+    for threshold in QUALITY_THRESHOLDS:
+        # Kategoria zmienia się przy q == próg (label_index: side='right')
+        before, after = start_quality >= threshold, end_quality >= threshold
+        for segment in np.flatnonzero(before != after):
+            q0, q1 = start_quality[segment], end_quality[segment]
+            t0, t1 = start_time[segment], end_time[segment]
+            time = t0 + (threshold - q0) / (q1 - q0) * (t1 - t0)
+            crossings.append({
+                'segment': int(segment),
+                'time': float(time),
+                'threshold': threshold,
+                'label': QUALITY_LABELS[label_index(threshold) - (0 if after[segment] else 1)],
+                'direction': 'up' if after[segment] else 'down',
+            })
+    crossings.sort(key=lambda crossing: (crossing['segment'], crossing['time']))
+    return crossings
+
+
+class CoolingSession:
+    """
+    Sesja strumieniowa dla wielu filiżanek naraz. Dla każdej filiżanki
+    przechowuje minimum przynależności przesłanek innych niż temperatura
+    (C x R), więc ocena kolejnych temperatur wszystkich filiżanek to jedno
+    rozmycie temperatury, jedno minimum i defuzyfikacja.
+
+    Wartości zastępcze i statusy jak w CompiledRuleBase.evaluate_with_status():
+    NaN w temperaturze lub w stałych wejściach filiżanki daje error_value
+    (STATUS_ERROR), brak aktywacji reguł - default_value (STATUS_NO_ACTIVATION).
+    """
+
+    def __init__(self, compiled, cups, method='centroid', metrics=None):
+        """
+        Args:
+            compiled (CompiledRuleBase): Skompilowany system
+            cups (array-like): Stałe wejścia filiżanek (C x 3) w kolejności FIXED_INPUTS
+            method (str): Metoda defuzyfikacji (DEFUZZ_METHODS)
+            metrics (Metrics, optional): Liczniki wywołań, próbek, przycięć i wartości zastępczych
+        """
+        if method not in DEFUZZ_METHODS:
+            raise ValueError(f"Nieznana metoda defuzyfikacji: {method}")
+        cups = np.atleast_2d(np.asarray(cups, dtype=np.float64))
+        if cups.shape[1] != len(FIXED_INPUTS):
+            raise ValueError(f"Oczekiwano tablicy C x {len(FIXED_INPUTS)}, otrzymano {cups.shape}")
+
+        self.compiled = compiled
+        self.method = method
+        self.metrics = metrics
+        self.cups = cups
+
+        fixed_vars = [INPUT_NAMES.index(name) for name in FIXED_INPUTS]
+        temperature_terms = np.flatnonzero(compiled.term_var == TEMPERATURE)
+        self._temperature_params = compiled.term_params[temperature_terms]
+
+        # Filiżanki z NaN - wynik zawsze error_value; NaN zastąpione dolną
+        # granicą zakresu tylko na potrzeby obliczeń (jak _valid_inputs)
+        low, high = compiled.input_ranges[fixed_vars, 0], compiled.input_ranges[fixed_vars, 1]
+        missing = np.isnan(cups)
+        self._cup_invalid = missing.any(axis=1)
+        valid = np.where(missing, low, cups)
+
+        # Przynależności stałych zmiennych - liczone raz na filiżankę
+        clamped = np.clip(valid, low, high)
+        self._cup_clamped = (clamped != valid).any(axis=1)
+        memberships = np.ones((len(cups), len(compiled.term_params) + 1))
+        for column, var in enumerate(fixed_vars):
+            terms = np.flatnonzero(compiled.term_var == var)
+            memberships[:, terms] = trapezoid(clamped[:, column:column + 1], compiled.term_params[terms])
+
+        # Częściowe minima reguł bez przesłanki temperatury (-1 i temperatura -> 1)
+        antecedents = compiled.rule_antecedents
+        is_temperature = np.isin(antecedents, temperature_terms)
+        fixed = np.where(is_temperature, -1, antecedents)
+        self._partial = memberships[:, fixed].min(axis=2)
+
+        # Indeks termu temperatury w regule (w obrębie temperature_terms) lub -1
+        position = np.full(len(compiled.term_params), -1)
+        position[temperature_terms] = np.arange(len(temperature_terms))
+        self._rule_temperature = np.where(is_temperature, position[antecedents], -1).max(axis=1)
+
+        self.last_time = None
+        self.last_quality = None
+        self.last_status = None
+        self._last_activation = self._last_invalid = self._last_clamped = None
+
+    def __len__(self):
+        return len(self.cups)
+
+    def _cup_index(self, count, cups):
+        """Indeks filiżanki dla każdej z `count` temperatur"""
+        if cups is None:
+            if count == len(self):
+                return np.arange(count)
+            if len(self) == 1:
+                return np.zeros(count, dtype=np.intp)
+            raise ValueError(f"Oczekiwano {len(self)} temperatur (po jednej na filiżankę) lub indeksów "
+                             f"filiżanek, otrzymano {count} temperatur")
+        index = np.asarray(cups, dtype=np.intp).reshape(-1)
+        if len(index) == 1:
+            return np.full(count, index[0])
+        if len(index) != count:
+            raise ValueError(f"Liczba indeksów filiżanek ({len(index)}) różna od liczby temperatur ({count})")
+        return index
+
+    def _activation(self, temperatures, cups):
+        """Aktywacja termów oraz maski wierszy błędnych i przyciętych"""
+        temperatures = np.asarray(temperatures, dtype=np.float64).reshape(-1)
+        index = self._cup_index(len(temperatures), cups)
+
+        low, high = self.compiled.input_ranges[TEMPERATURE]
+        missing = np.isnan(temperatures)
+        valid = np.where(missing, low, temperatures)
+        clamped = np.clip(valid, low, high)
+        membership = np.concatenate([trapezoid(clamped[:, None], self._temperature_params),
+                                     np.ones((len(clamped), 1))], axis=1)
+        activation = self.compiled.activate(np.minimum(self._partial[index],
+                                                       membership[:, self._rule_temperature]))
+        invalid = missing | self._cup_invalid[index]
+        clamped_rows = (clamped != valid) | self._cup_clamped[index]
+        return activation, invalid, clamped_rows
+
+    def activation(self, temperatures, cups=None):
+        """
+        Aktywacja termów jakości - rozmycie samej temperatury i minimum
+        z zapamiętanymi częściowymi minimami reguł
+
+        Args:
+            temperatures (array-like): Temperatury (N,) - jedna na wiersz
+            cups (array-like, optional): Indeks filiżanki dla każdej temperatury (N,)
+                lub jeden indeks dla wszystkich; domyślnie wszystkie filiżanki
+                po kolei (N == C), a dla sesji z jedną filiżanką - ta filiżanka
+
+        Returns:
+            np.ndarray: Poziomy odcięcia termów wyjściowych (N x T)
+
+        Raises:
+            ValueError: Liczba temperatur niezgodna z liczbą filiżanek lub indeksów
+        """
+        return self._activation(temperatures, cups)[0]
+
+    def _defuzzify(self, activation, invalid, clamped_rows):
+        """Agregacja (gdy metoda jej wymaga), defuzyfikacja i status wierszy"""
+        compiled = self.compiled
+        aggregated = (None if self.method in DEFUZZ_WITHOUT_AGGREGATION
+                      else compiled.aggregate(activation))
+        quality = compiled.defuzzify(aggregated, activation, self.method)
+        status = compiled._row_status(clamped_rows, activation, quality, invalid)
+        if self.metrics is not None:
+            self.metrics.count('calls')
+            self.metrics.count('samples', len(activation))
+            self.metrics.count('clamped', int(np.count_nonzero(clamped_rows)))
+            self.metrics.count('fallback_no_activation', int(np.count_nonzero(status == STATUS_NO_ACTIVATION)))
+            self.metrics.count('fallback_error', int(np.count_nonzero(status == STATUS_ERROR)))
+        return quality, status
+
+    def score_with_status(self, temperatures, cups=None):
+        """
+        Jakość i status wierszy dla temperatur bez zmiany stanu sesji
+
+        Args:
+            temperatures (array-like): Temperatury (N,)
+            cups (array-like, optional): Indeks filiżanki dla każdej temperatury (jak w activation())
+
+        Returns:
+            tuple: (jakość (N,), status (N,) uint8 - kody STATUS_*)
+        """
+        return self._defuzzify(*self._activation(temperatures, cups))
+
+    def score(self, temperatures, cups=None):
+        """
+        Jakość dla temperatur bez zmiany stanu sesji
+
+        Args:
+            temperatures (array-like): Temperatury (N,)
+            cups (array-like, optional): Indeks filiżanki dla każdej temperatury (jak w activation())
+
+        Returns:
+            np.ndarray: Jakość (N,)
+        """
+        return self.score_with_status(temperatures, cups)[0]
+
+    def update(self, temperatures, timestamp):
+        """
+        Nowy pomiar temperatury wszystkich filiżanek. Filiżanki, których
+        aktywacja termów się nie zmieniła (np. temperatura na plateau funkcji
+        przynależności), zachowują poprzedni wynik bez defuzyfikacji.
+
+        Args:
+            temperatures (array-like): Temperatury filiżanek (C,)
+            timestamp (float): Czas pomiaru
+
+        Returns:
+            dict: quality (C,), status (C,), labels (C,) oraz crossings -
+                przekroczenia progów od poprzedniego pomiaru ('cup' zamiast
+                'segment'); filiżanki ze statusem STATUS_ERROR w którymkolwiek
+                z dwóch pomiarów są pomijane
+        """
+        temperatures = np.asarray(temperatures, dtype=np.float64).reshape(-1)
+        if len(temperatures) != len(self):
+            raise ValueError(f"Oczekiwano {len(self)} temperatur, otrzymano {len(temperatures)}")
+        activation, invalid, clamped_rows = self._activation(temperatures, None)
+        if self.last_quality is None:
+            quality, status = self._defuzzify(activation, invalid, clamped_rows)
+        else:
+            quality, status = self.last_quality.copy(), self.last_status.copy()
+            # Status zależy też od NaN i przycięcia, których aktywacja nie widzi
+            changed = np.flatnonzero((activation != self._last_activation).any(axis=1)
+                                     | invalid | self._last_invalid | (clamped_rows != self._last_clamped))
+            if len(changed):
+                quality[changed], status[changed] = self._defuzzify(activation[changed], invalid[changed],
+                                                                    clamped_rows[changed])
+
+        crossings = []
+        if self.last_quality is not None:
+            valid = np.flatnonzero((status != STATUS_ERROR) & (self.last_status != STATUS_ERROR))
+            crossings = label_crossings(np.full(len(valid), self.last_time), self.last_quality[valid],
+                                        np.full(len(valid), float(timestamp)), quality[valid])
+            for crossing in crossings:
+                crossing['cup'] = int(valid[crossing.pop('segment')])
+        self.last_time, self.last_quality, self.last_status = float(timestamp), quality, status
+        self._last_activation, self._last_invalid, self._last_clamped = activation, invalid, clamped_rows
+        return {'quality': quality, 'status': status, 'labels': label_index(quality), 'crossings': crossings}
+
+
+def score_cooling_curve(compiled, bitterness, acidity, aroma, temperatures, times=None,
+                        method='centroid', metrics=None):
+    """
+    Krzywa jakości jednej filiżanki w trakcie stygnięcia
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany system
+        bitterness, acidity, aroma (float): Stałe wejścia filiżanki
+        temperatures (array-like): Kolejne temperatury (M,)
+        times (array-like, optional): Czas każdej próbki (domyślnie 0..M-1)
+        method (str): Metoda defuzyfikacji
+        metrics (Metrics, optional): Liczniki wywołań, próbek, przycięć i wartości zastępczych
+
+    Returns:
+        dict: time, quality, status, labels (M,) oraz crossings - chwile
+            przekroczenia granic kategorii get_quality_label(); odcinki
+            z próbką STATUS_ERROR na którymkolwiek końcu są pomijane
+    """
+    session = CoolingSession(compiled, [[bitterness, acidity, aroma]], method, metrics)
+    temperatures = np.asarray(temperatures, dtype=np.float64).reshape(-1)
+    times = (np.arange(len(temperatures), dtype=np.float64) if times is None
+             else np.asarray(times, dtype=np.float64).reshape(-1))
+    if len(times) != len(temperatures):
+        raise ValueError("Liczba chwil czasu musi być równa liczbie temperatur")
+
+    quality, status = session.score_with_status(temperatures)
+    error = status == STATUS_ERROR
+    valid = np.flatnonzero(~error[:-1] & ~error[1:])
+    crossings = label_crossings(times[valid], quality[valid], times[valid + 1], quality[valid + 1])
+    for crossing in crossings:
+        del crossing['segment']
+    return {'time': times, 'quality': quality, 'status': status, 'labels': label_index(quality),
+            'crossings': crossings}
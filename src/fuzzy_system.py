@@ -4,10 +4,62 @@ Implementacja logiki rozmytej z wykorzystaniem scikit-fuzzy
 Wersja z rozszerzonymi logami debugowania
 """
 
+import time
+
 import numpy as np
 import skfuzzy as fuzz
 from skfuzzy import control as ctrl
 
+from batch_engine import (INPUT_NAMES, QUALITY_LABELS, QUALITY_THRESHOLDS, STATUS_NAMES,
+                          CompiledRuleBase, as_trapezoid)
+from metrics import Metrics
+
+
+# Dopuszczalne zakresy wejść (wartości spoza zakresu są przycinane)
+INPUT_RANGES = {
+    'bitterness': (0, 10),
+    'acidity': (0, 10),
+    'aroma': (0, 10),
+    'temperature': (60, 95),
+}
+
+# Parametry funkcji przynależności: zmienna -> term -> (typ, punkty charakterystyczne)
+MEMBERSHIP_FUNCTIONS = {
+    # Gorzkość (Bitterness)
+    'bitterness': {
+        'low': ('trapmf', [0, 0, 2, 4]),
+        'medium': ('trimf', [2, 5, 8]),
+        'high': ('trapmf', [6, 8, 10, 10]),
+    },
+    # Kwasowość (Acidity)
+    'acidity': {
+        'low': ('trapmf', [0, 0, 2, 4]),
+        'medium': ('trimf', [2, 5, 8]),
+        'high': ('trapmf', [6, 8, 10, 10]),
+    },
+    # Aromat (Aroma)
+    'aroma': {
+        'weak': ('trapmf', [0, 0, 2, 4]),
+        'moderate': ('trimf', [3, 5, 7]),
+        'strong': ('trapmf', [6, 8, 10, 10]),
+    },
+    # Temperatura (Temperature)
+    'temperature': {
+        'low': ('trapmf', [60, 60, 70, 75]),
+        'optimal': ('trimf', [72, 80, 88]),
+        'high': ('trapmf', [85, 90, 95, 95]),
+    },
+    # Jakość (Quality)
+    'quality': {
+        'very_poor': ('trapmf', [0, 0, 15, 30]),
+        'poor': ('trimf', [20, 35, 50]),
+        'average': ('trimf', [40, 55, 70]),
+        'good': ('trimf', [60, 75, 85]),
+        'very_good': ('trimf', [75, 85, 95]),
+        'excellent': ('trapmf', [85, 92, 100, 100]),
+    },
+}
+
 
 class CoffeeQualitySystem:
     """
@@ -15,13 +67,42 @@ class CoffeeQualitySystem:
     Wykorzystuje 4 zmienne wejściowe i 1 wyjściową.
     """
     
-    def __init__(self):
-        """Inicjalizacja systemu rozmytego z definicją zmiennych i reguł"""
+    def __init__(self, membership_functions=None, recorder=None, metrics=True):
+        """
+        Inicjalizacja systemu rozmytego z definicją zmiennych i reguł
+        
+        Args:
+            membership_functions (dict, optional): Parametry funkcji przynależności
+                w formacie MEMBERSHIP_FUNCTIONS (domyślnie wartości wbudowane)
+            recorder (EvaluationHistory, optional): Rejestr zapisujący wyniki
+                evaluate() i evaluate_batch()
+            metrics (bool): Zbieranie metryk czasu etapów i liczników
+        """
+        self.membership_functions = membership_functions or MEMBERSHIP_FUNCTIONS
+        self.recorder = recorder
+        self.metrics = Metrics() if metrics else None
+        self.sugeno = None
         self._create_variables()
         self._create_membership_functions()
         self._create_rules()
         self._create_control_system()
+        self._compile_rule_base()
     
+    @classmethod
+    def from_rule_base(cls, path, **kwargs):
+        """
+        System z funkcjami przynależności z pliku bazy reguł (tuning.py)
+
+        Args:
+            path (str): Plik JSON z tuning.save_rule_base()
+            **kwargs: Pozostałe argumenty konstruktora
+
+        Returns:
+            CoffeeQualitySystem: System ze strojonymi funkcjami przynależności
+        """
+        import tuning
+        return cls(membership_functions=tuning.load_rule_base(path), **kwargs)
+
     def _create_variables(self):
         """Tworzenie zmiennych wejściowych i wyjściowej"""
         
@@ -47,33 +128,9 @@ class CoffeeQualitySystem:
     def _create_membership_functions(self):
         """Definiowanie funkcji przynależności dla wszystkich zmiennych"""
         
-        # Gorzkość (Bitterness)
-        self.bitterness['low'] = fuzz.trapmf(self.bitterness.universe, [0, 0, 2, 4])
-        self.bitterness['medium'] = fuzz.trimf(self.bitterness.universe, [2, 5, 8])
-        self.bitterness['high'] = fuzz.trapmf(self.bitterness.universe, [6, 8, 10, 10])
-        
-        # Kwasowość (Acidity)
-        self.acidity['low'] = fuzz.trapmf(self.acidity.universe, [0, 0, 2, 4])
-        self.acidity['medium'] = fuzz.trimf(self.acidity.universe, [2, 5, 8])
-        self.acidity['high'] = fuzz.trapmf(self.acidity.universe, [6, 8, 10, 10])
-        
-        # Aromat (Aroma)
-        self.aroma['weak'] = fuzz.trapmf(self.aroma.universe, [0, 0, 2, 4])
-        self.aroma['moderate'] = fuzz.trimf(self.aroma.universe, [3, 5, 7])
-        self.aroma['strong'] = fuzz.trapmf(self.aroma.universe, [6, 8, 10, 10])
-        
-        # Temperatura (Temperature)
-        self.temperature['low'] = fuzz.trapmf(self.temperature.universe, [60, 60, 70, 75])
-        self.temperature['optimal'] = fuzz.trimf(self.temperature.universe, [72, 80, 88])
-        self.temperature['high'] = fuzz.trapmf(self.temperature.universe, [85, 90, 95, 95])
-        
-        # Jakość (Quality)
-        self.quality['very_poor'] = fuzz.trapmf(self.quality.universe, [0, 0, 15, 30])
-        self.quality['poor'] = fuzz.trimf(self.quality.universe, [20, 35, 50])
-        self.quality['average'] = fuzz.trimf(self.quality.universe, [40, 55, 70])
-        self.quality['good'] = fuzz.trimf(self.quality.universe, [60, 75, 85])
-        self.quality['very_good'] = fuzz.trimf(self.quality.universe, [75, 85, 95])
-        self.quality['excellent'] = fuzz.trapmf(self.quality.universe, [85, 92, 100, 100])
+        for var_name, var in self.get_variables().items():
+            for term_name, (kind, points) in self.membership_functions[var_name].items():
+                var[term_name] = getattr(fuzz, kind)(var.universe, points)
     
     def _create_rules(self):
         """Tworzenie bazy reguł rozmytych (42 reguły + reguły catch-all)"""
@@ -261,6 +318,359 @@ class CoffeeQualitySystem:
         self.control_system = ctrl.ControlSystem(self.rules)
         self.simulator = ctrl.ControlSystemSimulation(self.control_system)
     
+    def _compile_rule_base(self):
+        """
+        Kompilacja zmiennych i reguł do postaci tablicowej (CompiledRuleBase)
+        używanej przez ścieżkę wsadową evaluate_batch()
+        """
+        # Spłaszczenie termów wejściowych: (zmienna, term) -> indeks kolumny
+        term_index = {}
+        term_params, term_var, term_names = [], [], []
+        for var_idx, var_name in enumerate(INPUT_NAMES):
+            for term_name, (kind, points) in self.membership_functions[var_name].items():
+                term_index[(var_name, term_name)] = len(term_params)
+                term_params.append(as_trapezoid(kind, points))
+                term_var.append(var_idx)
+                term_names.append(f"{var_name}[{term_name}]")
+        
+        output_names = list(self.membership_functions['quality'])
+        
+        rule_antecedents, rule_consequents = [], []
+        for rule in self.rules:
+            if not self._is_conjunction(rule.antecedent):
+                raise ValueError(f"Ścieżka wsadowa obsługuje tylko reguły z AND: {rule}")
+            row = [-1] * len(INPUT_NAMES)
+            for term in rule.antecedent_terms:
+                row[INPUT_NAMES.index(term.parent.label)] = term_index[(term.parent.label, term.label)]
+            rule_antecedents.append(row)
+            rule_consequents.append(output_names.index(rule.consequent[0].term.label))
+        
+        self.compiled = CompiledRuleBase(
+            input_ranges=[INPUT_RANGES[name] for name in INPUT_NAMES],
+            term_params=term_params,
+            term_var=term_var,
+            term_names=term_names,
+            rule_antecedents=rule_antecedents,
+            rule_consequents=rule_consequents,
+            output_universe=self.quality.universe,
+            output_params=[as_trapezoid(kind, points)
+                           for kind, points in self.membership_functions['quality'].values()],
+            output_names=output_names,
+        )
+        self._compiled_float32 = None
+    
+    @staticmethod
+    def _is_conjunction(antecedent):
+        """Sprawdzenie czy przesłanka składa się wyłącznie z termów łączonych AND"""
+        if not hasattr(antecedent, 'kind'):
+            return True
+        return (antecedent.kind == 'and'
+                and CoffeeQualitySystem._is_conjunction(antecedent.term1)
+                and CoffeeQualitySystem._is_conjunction(antecedent.term2))
+    
+    def evaluate_batch(self, inputs, method='centroid', jit=False, float32=False, out=None):
+        """
+        Wsadowa ocena jakości wielu kaw naraz (bez logów i bez scikit-fuzzy)
+        
+        Args:
+            inputs (array-like): Tablica N x 4 w kolejności
+                (gorzkość, kwasowość, aromat, temperatura) lub tablica
+                strukturalna z polami INPUT_NAMES
+            method (str): Metoda defuzyfikacji: 'centroid' (domyślna, jak
+                evaluate()), 'bisector', 'mom', 'som', 'lom' lub 'weighted_average'
+            jit (bool): Jądro Numba dla dużych wsadów (centroid, float64); gdy
+                jądro nie może policzyć wyniku (brak Numby, inna metoda,
+                float32), wynik liczy ścieżka NumPy z ostrzeżeniem RuntimeWarning
+            float32 (bool): Obliczenia w float32 - połowa pamięci na porcję,
+                dokładność opisana w CompiledRuleBase.astype()
+            out (np.ndarray, optional): Tablica (N,) na wyniki, np. pole
+                tablicy strukturalnej rekordów
+        
+        Returns:
+            np.ndarray: Jakość kawy (0-100) dla każdego wiersza
+        """
+        if jit:
+            import jit_kernel
+            quality = jit_kernel.evaluate(self._batch_model(float32), inputs, metrics=self.metrics,
+                                          method=method, out=out)
+        else:
+            quality = self._batch_model(float32).evaluate(inputs, metrics=self.metrics, method=method, out=out)
+        if self.recorder is not None:
+            self.recorder.record(inputs, quality, f"batch/{self.rule_base_hash()[:16]}")
+        return quality
+    
+    def evaluate_batch_with_status(self, inputs, method='centroid', float32=False):
+        """
+        Wsadowa ocena jakości ze statusem wiersza - wartości awaryjne
+        (25.0 przy braku aktywacji reguł, 50.0 przy błędzie) są oznaczone
+        i nie wymagają wyjątków
+        
+        Args:
+            inputs (array-like): Tablica N x 4 w kolejności INPUT_NAMES
+                lub tablica strukturalna z polami INPUT_NAMES
+            method (str): Metoda defuzyfikacji
+            float32 (bool): Obliczenia w float32 (jak w evaluate_batch())
+        
+        Returns:
+            tuple: (jakość (N,), status (N,) - kody STATUS_* z batch_engine,
+                nazwy w STATUS_NAMES: ok / clamped / no_activation / error)
+        """
+        quality, status = self._batch_model(float32).evaluate_with_status(inputs, metrics=self.metrics,
+                                                                          method=method)
+        if self.recorder is not None:
+            self.recorder.record(inputs, quality, f"batch/{self.rule_base_hash()[:16]}")
+        return quality, status
+    
+    def _batch_model(self, float32=False):
+        """Model wsadowy w wybranej precyzji - kopia float32 tworzona raz"""
+        if not float32:
+            return self.compiled
+        if self._compiled_float32 is None:
+            self._compiled_float32 = self.compiled.astype(np.float32)
+        return self._compiled_float32
+    
+    @staticmethod
+    def status_names(status):
+        """
+        Nazwy statusów wierszy
+        
+        Args:
+            status (np.ndarray): Kody z evaluate_batch_with_status()
+        
+        Returns:
+            list: 'ok', 'clamped', 'no_activation' lub 'error' dla każdego wiersza
+        """
+        return [STATUS_NAMES[code] for code in np.asarray(status).tolist()]
+    
+    def classify(self, bitterness_val, acidity_val, aroma_val, temperature_val):
+        """
+        Sama kategoria jakości (jak get_quality_label(evaluate(...))) -
+        pełna defuzyfikacja tylko w pobliżu granic kategorii
+        
+        Returns:
+            str: Etykieta słowna jakości
+        """
+        return self.classify_batch([[bitterness_val, acidity_val, aroma_val, temperature_val]])[0]
+    
+    def classify_batch(self, inputs):
+        """
+        Wsadowe kategorie jakości. Wiersze, dla których przedział centroidu
+        wyznaczony z sił odpalenia reguł mieści się w jednej kategorii, nie
+        przechodzą defuzyfikacji; odsetek takich wierszy raportuje metryka
+        classify_early_exit_ratio.
+        
+        Args:
+            inputs (array-like): Tablica N x 4 w kolejności INPUT_NAMES
+        
+        Returns:
+            list: Etykiety słowne jakości (N,)
+        """
+        return [QUALITY_LABELS[index] for index in self.compiled.classify(inputs, metrics=self.metrics)]
+    
+    def _batch_evaluator(self, method='centroid', jit=False):
+        """Funkcja wsadowa (N x 4) -> (N,) bez zapisu do rejestru wyników"""
+        if jit:
+            import jit_kernel
+            return lambda inputs: jit_kernel.evaluate(self.compiled, inputs, self.metrics, method)
+        return lambda inputs: self.compiled.evaluate(inputs, metrics=self.metrics, method=method)
+    
+    def evaluate_distribution(self, mean, std, n_samples=None, seed=0,
+                              method='centroid', jit=False):
+        """
+        Rozkład jakości przy zaszumionych odczytach (Monte Carlo)
+        
+        Args:
+            mean (sequence): Odczyty (gorzkość, kwasowość, aromat, temperatura)
+            std (sequence): Odchylenia standardowe szumu czujników (0 = dokładny odczyt)
+            n_samples (int, optional): Liczba próbek (domyślnie uncertainty.N_SAMPLES)
+            seed (int): Ziarno generatora - wynik jest powtarzalny
+            method (str): Metoda defuzyfikacji
+            jit (bool): Ocena jądrem Numba (gdy dostępne)
+        
+        Returns:
+            dict: mean, std, quantiles, label_probabilities (etykieta
+                get_quality_label() -> prawdopodobieństwo) oraz quality - próbki
+        """
+        import uncertainty
+        if n_samples is None:
+            n_samples = uncertainty.N_SAMPLES
+        return uncertainty.evaluate_distribution(self._batch_evaluator(method, jit), mean, std,
+                                                 n_samples, seed)
+    
+    def evaluate_distributions(self, means, stds, n_samples=None, seed=0,
+                               method='centroid', jit=False):
+        """
+        Rozkłady jakości wielu filiżanek w jednym wywołaniu wsadowym
+        
+        Args:
+            means (array-like): Odczyty (C x 4)
+            stds (array-like): Odchylenia standardowe (C x 4 lub 4,)
+            n_samples, seed, method, jit: Jak w evaluate_distribution()
+        
+        Returns:
+            dict: Tablice mean, std (C,), quantiles (C x 3),
+                label_probabilities (C x 6) oraz quality (C x n_samples)
+        """
+        import uncertainty
+        if n_samples is None:
+            n_samples = uncertainty.N_SAMPLES
+        return uncertainty.evaluate_distributions(self._batch_evaluator(method, jit), means, stds,
+                                                  n_samples, seed)
+    
+    def attribute_batch(self, inputs):
+        """
+        Wsadowa ocena z rozkładem wyniku (metoda centroidu): siła odpalenia
+        każdej reguły i wkład każdego termu jakości w centroid
+        
+        Args:
+            inputs (array-like): Tablica N x 4 w kolejności
+                (gorzkość, kwasowość, aromat, temperatura) lub tablica
+                strukturalna z polami INPUT_NAMES
+        
+        Returns:
+            np.ndarray: Rekordy z polami quality, status, firing (R)
+                i contribution (T); wkłady termów sumują się do quality poza
+                wierszami bez aktywacji reguł (25.0) i z wejściem NaN (50.0) -
+                te mają status STATUS_NO_ACTIVATION / STATUS_ERROR i zerowe wkłady
+        """
+        import attribution
+        records = attribution.attribute(self.compiled, inputs)
+        if self.metrics is not None:
+            self.metrics.count('calls')
+            self.metrics.count('samples', len(records))
+        return records
+    
+    def explain_attribution(self, record, top=5):
+        """
+        Tekst wyjaśnienia jednego rekordu z attribute_batch() - reguły, które
+        faktycznie zadziałały, i wkłady termów jakości
+        
+        Args:
+            record (np.void): Rekord z attribute_batch()
+            top (int): Liczba najsilniejszych reguł w opisie
+        
+        Returns:
+            str: Wyjaśnienie wyniku
+        """
+        import attribution
+        return attribution.render(self.compiled, record, top)
+    
+    def score_cooling_curve(self, bitterness, acidity, aroma, temperatures, times=None,
+                            method='centroid'):
+        """
+        Ocena jednej filiżanki w trakcie stygnięcia - zmienia się tylko
+        temperatura, więc pozostałe wejścia są rozmywane jeden raz
+        
+        Args:
+            bitterness, acidity, aroma (float): Stałe parametry kawy
+            temperatures (array-like): Kolejne pomiary temperatury (M,)
+            times (array-like, optional): Czas pomiarów (domyślnie 0..M-1)
+            method (str): Metoda defuzyfikacji
+        
+        Returns:
+            dict: time, quality, status, labels (M,) oraz crossings - chwile,
+                w których jakość przekracza granice kategorii get_quality_label()
+        """
+        import cooling
+        return cooling.score_cooling_curve(self.compiled, bitterness, acidity, aroma, temperatures,
+                                           times, method, self.metrics)
+    
+    def cooling_session(self, cups, method='centroid'):
+        """
+        Sesja strumieniowa dla wielu stygnących filiżanek
+        (CoolingSession.update(temperatury, czas) dla każdego pomiaru)
+        
+        Args:
+            cups (array-like): Stałe parametry filiżanek (C x 3):
+                gorzkość, kwasowość, aromat
+            method (str): Metoda defuzyfikacji
+        
+        Returns:
+            CoolingSession: Sesja z zapamiętanym rozmyciem stałych wejść
+        """
+        import cooling
+        return cooling.CoolingSession(self.compiled, cups, method, self.metrics)
+    
+    def calibrate_sugeno(self, samples=None, seed=0):
+        """
+        Dopasowanie stałych modelu Sugeno (TSK) do wyników centroidu
+        Mamdaniego - wynik zastępuje model używany przez evaluate_sugeno()
+        
+        Args:
+            samples (int, optional): Liczba próbek dopasowania i walidacji
+                (domyślnie sugeno.CALIBRATION_SAMPLES)
+            seed (int): Ziarno generatora próbek
+        
+        Returns:
+            dict: Raport kalibracji - stałe termów oraz błędy (RMSE, MAE,
+                maksymalny, zgodność kategorii) przed i po dopasowaniu
+        """
+        import sugeno
+        if samples is None:
+            samples = sugeno.CALIBRATION_SAMPLES
+        self.sugeno, report = sugeno.calibrate(self.compiled, samples, seed)
+        return report
+    
+    def evaluate_sugeno(self, inputs):
+        """
+        Szybka ocena wsadowa modelem Sugeno zerowego rzędu - te same przesłanki
+        i reguły, stałe zamiast termów jakości (bez defuzyfikacji). Przy
+        pierwszym użyciu model jest kalibrowany (calibrate_sugeno()).
+        
+        Args:
+            inputs (array-like): Tablica N x 4 w kolejności
+                (gorzkość, kwasowość, aromat, temperatura) lub tablica
+                strukturalna z polami INPUT_NAMES
+        
+        Returns:
+            np.ndarray: Przybliżona jakość kawy (0-100) dla każdego wiersza
+        """
+        if self.sugeno is None:
+            self.calibrate_sugeno()
+        quality = self.sugeno.evaluate(inputs, metrics=self.metrics)
+        if self.recorder is not None:
+            self.recorder.record(inputs, quality, f"sugeno/{self.rule_base_hash()[:16]}")
+        return quality
+    
+    def optimize(self, constraints=None, objectives=None, grid_points=11):
+        """
+        Wyszukanie parametrów kawy o najwyższej przewidywanej jakości
+        
+        Args:
+            constraints (dict, optional): Ograniczenia - wartość stała lub
+                przedział (min, max), np. {'temperature': 70, 'aroma': (None, 6)}
+            objectives (dict, optional): Cele zbioru Pareto, np.
+                {'quality': 'max', 'temperature': 'min'}
+            grid_points (int): Gęstość siatki wstępnej na każdą wolną zmienną
+        
+        Returns:
+            dict: Optymalne wartości wejść i przewidywana jakość
+                (oraz 'pareto' gdy podano cele)
+        """
+        import optimizer
+        return optimizer.optimize(self.compiled, constraints, grid_points=grid_points,
+                                  objectives=objectives)
+    
+    def export_artifact(self, path):
+        """
+        Zapis modelu do przenośnego pliku .npz, wczytywanego przez
+        artifact.load() bez scikit-fuzzy i networkx
+        
+        Args:
+            path (str): Ścieżka pliku
+        """
+        import artifact
+        artifact.save(self.compiled, path)
+    
+    def rule_base_hash(self):
+        """
+        Skrót bazy reguł - do unieważniania zapisanych wyników
+        
+        Returns:
+            str: Skrót SHA-256 skompilowanego modelu
+        """
+        return self.compiled.fingerprint()
+    
     def evaluate(self, bitterness_val, acidity_val, aroma_val, temperature_val):
         """
         Ocena jakości kawy na podstawie parametrów wejściowych
@@ -274,6 +684,21 @@ class CoffeeQualitySystem:
         Returns:
             float: Jakość kawy (0-100)
         """
+        if self.metrics is None:
+            quality = self._evaluate_logged(bitterness_val, acidity_val, aroma_val, temperature_val)
+        else:
+            started = time.perf_counter()
+            quality = self._evaluate_logged(bitterness_val, acidity_val, aroma_val, temperature_val)
+            self.metrics.observe('skfuzzy_evaluate', time.perf_counter() - started)
+            self.metrics.count('calls')
+            self.metrics.count('samples')
+        if self.recorder is not None:
+            self.recorder.record([[bitterness_val, acidity_val, aroma_val, temperature_val]],
+                                 [quality], f"skfuzzy/{self.rule_base_hash()[:16]}")
+        return quality
+    
+    def _evaluate_logged(self, bitterness_val, acidity_val, aroma_val, temperature_val):
+        """Pełne wnioskowanie scikit-fuzzy z logami diagnostycznymi (patrz evaluate())"""
         print("\n" + "="*70)
         print("ROZPOCZĘCIE OCENY KAWY - FUZZY SYSTEM LOG")
         print("="*70)
@@ -286,6 +711,11 @@ class CoffeeQualitySystem:
             print(f"    Aromat (Aroma):         {aroma_val:.2f}")
             print(f"    Temperatura:            {temperature_val:.2f}°C")
             
+            if np.isnan([bitterness_val, acidity_val, aroma_val, temperature_val]).any():
+                print("\n    ⚠️  Wartość NaN na wejściu - zwracam wartość domyślną: 50.0")
+                self._count('fallback_error')
+                return 50.0
+            
             # Sprawdzenie zakresów
             print("\n[2] WALIDACJA ZAKRESÓW:")
             valid = True
@@ -323,6 +753,8 @@ class CoffeeQualitySystem:
             
             if valid:
                 print("    ✓  Wszystkie wartości w poprawnych zakresach")
+            else:
+                self._count('clamped')
             
             # Ustawienie wartości wejściowych
             print("\n[3] USTAWIANIE WARTOŚCI W SYMULATORZE:")
@@ -346,12 +778,23 @@ class CoffeeQualitySystem:
             print("\n    [DIAGNOSTYKA] Sprawdzanie stopni przynależności przed obliczeniem:")
             self._check_rule_activation(bitterness_val, acidity_val, aroma_val, temperature_val)
             
+            # Brak aktywacji wykrywany numerycznie - compute() zgłosiłby KeyError
+            compiled = self.compiled
+            inputs = compiled.clamp(np.array([[bitterness_val, acidity_val, aroma_val, temperature_val]],
+                                             dtype=np.float64))
+            if compiled.activate(compiled.fire(compiled.fuzzify(inputs))).max() <= 0:
+                print(f"\n    ⚠️  Brak aktywacji reguł dla danych wejściowych!")
+                print(f"    System nie może obliczyć wartości - używam wartości domyślnej")
+                self._count('fallback_no_activation')
+                return 25.0
+            
             try:
                 self.simulator.compute()
                 print("    ✓  Obliczenia zakończone pomyślnie")
             except KeyError as e:
                 print(f"\n    ⚠️  Brak aktywacji reguł dla danych wejściowych!")
                 print(f"    System nie może obliczyć wartości - używam wartości domyślnej")
+                self._count('fallback_no_activation')
                 # Zwróć wartość domyślną dla bardzo słabej kawy
                 return 25.0
             
@@ -360,6 +803,7 @@ class CoffeeQualitySystem:
                 print("\n    ⚠️  UWAGA: Brak klucza 'quality' w output!")
                 print(f"    Dostępne klucze: {list(self.simulator.output.keys())}")
                 print("    Zwracam wartość domyślną: 25.0")
+                self._count('fallback_no_activation')
                 return 25.0
             
             # Pobranie wyniku
@@ -402,8 +846,43 @@ class CoffeeQualitySystem:
             print("ZWRACANIE WARTOŚCI DOMYŚLNEJ: 50.0")
             print("!"*70 + "\n")
             
+            self._count('fallback_error')
             return 50.0  # Wartość domyślna w przypadku błędu
     
+    def _count(self, name):
+        """Zwiększenie licznika metryk (gdy metryki są włączone)"""
+        if self.metrics is not None:
+            self.metrics.count(name)
+    
+    def stats(self):
+        """
+        Metryki wnioskowania: liczniki (wywołania, próbki, przycięcia,
+        wartości awaryjne) i czasy etapów
+        
+        Returns:
+            dict: Migawka metryk lub None gdy metryki są wyłączone
+        """
+        return self.metrics.stats() if self.metrics is not None else None
+    
+    def prometheus_metrics(self):
+        """
+        Returns:
+            str: Metryki w formacie tekstowym Prometheus (pusty gdy wyłączone)
+        """
+        return self.metrics.prometheus() if self.metrics is not None else ""
+    
+    def set_metrics_enabled(self, enabled):
+        """
+        Włączenie lub całkowite wyłączenie metryk (wyłączenie usuwa zebrane dane)
+        
+        Args:
+            enabled (bool): Czy zbierać metryki
+        """
+        if not enabled:
+            self.metrics = None
+        elif self.metrics is None:
+            self.metrics = Metrics()
+    
     def _check_rule_activation(self, bitterness_val, acidity_val, aroma_val, temperature_val):
         """
         Sprawdzenie czy jakiekolwiek reguły zostaną aktywowane
@@ -538,18 +1017,10 @@ class CoffeeQualitySystem:
         Returns:
             str: Etykieta słowna jakości
         """
-        if quality_value < 30:
-            return "Bardzo słaba"
-        elif quality_value < 50:
-            return "Słaba"
-        elif quality_value < 70:
-            return "Średnia"
-        elif quality_value < 85:
-            return "Dobra"
-        elif quality_value < 92:
-            return "Bardzo dobra"
-        else:
-            return "Wybitna!"
+        for threshold, label in zip(QUALITY_THRESHOLDS, QUALITY_LABELS):
+            if quality_value < threshold:
+                return label
+        return QUALITY_LABELS[-1]
 
     def explain_result(self, bitterness, acidity, aroma, temperature, quality):
         """
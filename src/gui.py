@@ -8,7 +8,8 @@ import matplotlib
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                               QHBoxLayout, QLabel, QSlider, QPushButton,
                               QFrame, QSplitter, QSizePolicy, QComboBox, QMessageBox, QDialog)
-from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve, QPointF, QRectF, pyqtProperty
+from PyQt5.QtCore import (Qt, QPropertyAnimation, QEasingCurve, QPointF, QRectF, pyqtProperty,
+                          QAbstractListModel, QModelIndex, QThread, pyqtSignal)
 from PyQt5.QtGui import (QPainter, QColor, QPen, QBrush, QLinearGradient,
                          QRadialGradient, QPainterPath, QFont)
 
@@ -16,6 +17,10 @@ matplotlib.use('Qt5Agg')
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 from matplotlib.figure import Figure
 
+from batch_engine import INPUT_NAMES
+from presets import COFFEE_PROFILES, MANUAL_PROFILE
+from profile_store import ProfileStore
+
 # --- MOCK SYSTEMU ROZMYTEGO (Dla uruchomienia bez pliku fuzzy_system.py) ---
 try:
     from fuzzy_system import CoffeeQualitySystem
@@ -44,14 +49,8 @@ COLORS = {
     'text_dark': '#2F1E15', 'accent': '#CD853F'
 }
 
-COFFEE_PROFILES = {
-    "Własny (Manualny)": {"desc": "Ręczne ustawienia.", "params": None},
-    "Espresso Italiano": {"desc": "Klasyczne włoskie espresso.", "params": {"bitterness": 8.0, "acidity": 3.0, "aroma": 9.0, "temperature": 90.0}},
-    "Americano": {"desc": "Espresso z wodą.", "params": {"bitterness": 4.5, "acidity": 4.0, "aroma": 6.0, "temperature": 94.0}},
-    "Cappuccino": {"desc": "Balans mleka i kawy.", "params": {"bitterness": 3.5, "acidity": 2.5, "aroma": 7.0, "temperature": 70.0}},
-    "Flat White": {"desc": "Podwójne espresso z mlekiem.", "params": {"bitterness": 6.0, "acidity": 3.5, "aroma": 8.0, "temperature": 75.0}},
-    "Cold Brew": {"desc": "Kawa parzona na zimno.", "params": {"bitterness": 2.0, "acidity": 1.5, "aroma": 5.0, "temperature": 60.0}}
-}
+# Liczba profili doczytywanych z biblioteki przy przewijaniu listy
+PROFILE_PAGE_SIZE = 100
 
 QSS_STYLE = """
 QMainWindow { background-color: #F5F5DC; }
@@ -276,8 +275,67 @@ class ProgressBarWidget(QWidget):
             painter.fillRect(0, 0, fill_w, self.height(), QColor(COLORS['button_primary']))
 
 
+class ProfileListModel(QAbstractListModel):
+    """Model listy profili - leniwe, stronicowane wczytywanie z biblioteki"""
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.total = store.count()
+        # Wiersz 0 to zawsze profil manualny (bez parametrów)
+        self.profiles = [{"name": MANUAL_PROFILE, "description": COFFEE_PROFILES[MANUAL_PROFILE]["desc"]}]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.profiles)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role == Qt.DisplayRole:
+            return self.profiles[index.row()]["name"]
+        return None
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and len(self.profiles) - 1 < self.total
+
+    def fetchMore(self, parent):
+        page = self.store.page(len(self.profiles) - 1, PROFILE_PAGE_SIZE)
+        if not page:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.profiles), len(self.profiles) + len(page) - 1)
+        self.profiles.extend(page)
+        self.endInsertRows()
+
+    def profile(self, row):
+        return self.profiles[row]
+
+
+def _rule_base_hash(system):
+    """Skrót bazy reguł systemu (None dla systemu bez skompilowanego modelu)"""
+    return system.rule_base_hash() if hasattr(system, 'rule_base_hash') else None
+
+
+class ScoringThread(QThread):
+    """
+    Ocena profili w tle jednym wywołaniem wsadowym - wynik trafia sygnałem
+    do wątku UI. Wątek nie korzysta z bazy SQLite (połączenie należy do
+    wątku UI): dostaje gotowe wejścia i zwraca same oceny.
+    """
+
+    scored = pyqtSignal(object)
+
+    def __init__(self, system, rule_base, ids, inputs, parent=None):
+        super().__init__(parent)
+        self.system = system
+        self.rule_base = rule_base
+        self.ids = ids
+        self.inputs = inputs
+
+    def run(self):
+        quality = self.system.evaluate_batch(self.inputs) if len(self.inputs) else np.empty(0)
+        self.scored.emit({'rule_base': self.rule_base, 'ids': self.ids, 'quality': np.asarray(quality)})
+
+
 class CoffeeGUI(QMainWindow):
-    def __init__(self):
+    def __init__(self, profile_store=None):
         super().__init__()
         self.setWindowTitle("BrewSense - System Oceny Jakości Kawy")
         # Zmieniono geometry: Zamiast 1920x1080 (co może wychodzić poza ekran),
@@ -286,8 +344,24 @@ class CoffeeGUI(QMainWindow):
 
         self.fuzzy_system = CoffeeQualitySystem()
         self.current_quality = 0
+        self.plot_markers = None
+
+        # Oceny profili biblioteki (także presetów) przechowuje ProfileStore
+        # (tabela scores, klucz - skrót bazy reguł); w pamięci zostają tylko
+        # pozycje markerów presetów: nazwa -> (b, a, ar, t, jakość), ważne
+        # dla bazy reguł score_cache_rule_base
+        self.score_cache = {}
+        self.score_cache_rule_base = None
+        self._pending_profile = None
+        self._scoring_threads = []
+
+        # Biblioteka profili: wbudowane presety + opcjonalnie profile z pliku
+        # (presety dopisywane tylko pod nazwami, których biblioteka nie ma)
+        self.profile_store = profile_store or ProfileStore()
+        self.profile_store.import_presets(COFFEE_PROFILES)
         self.setStyleSheet(QSS_STYLE)
         self._create_widgets()
+        self.precompute_scores()
 
     def _create_widgets(self):
         central = QWidget()
@@ -331,8 +405,10 @@ class CoffeeGUI(QMainWindow):
 
         # Combo Profilu
         self.profile_combo = QComboBox()
-        self.profile_combo.addItems(COFFEE_PROFILES.keys())
-        self.profile_combo.currentTextChanged.connect(self.load_profile)
+        self.profile_model = ProfileListModel(self.profile_store, self.profile_combo)
+        self.profile_model.fetchMore(QModelIndex())
+        self.profile_combo.setModel(self.profile_model)
+        self.profile_combo.currentIndexChanged.connect(self.load_profile)
         layout.addWidget(QLabel("Wybierz profil:"))
         layout.addWidget(self.profile_combo)
 
@@ -423,15 +499,96 @@ class CoffeeGUI(QMainWindow):
 
         return panel
 
-    def load_profile(self, name):
-        p = COFFEE_PROFILES[name]
-        self.profile_desc.setText(p['desc'])
-        if p['params']:
-            self.bitterness_slider.setValue(int(p['params']['bitterness']*10))
-            self.acidity_slider.setValue(int(p['params']['acidity']*10))
-            self.aroma_slider.setValue(int(p['params']['aroma']*10))
-            self.temperature_slider.setValue(int(p['params']['temperature']*10))
-            self.evaluate_coffee()
+    def load_profile(self, index):
+        p = self.profile_model.profile(index)
+        self.profile_desc.setText(p['description'])
+        if p['name'] != MANUAL_PROFILE:
+            self.bitterness_slider.setValue(int(p['bitterness']*10))
+            self.acidity_slider.setValue(int(p['acidity']*10))
+            self.aroma_slider.setValue(int(p['aroma']*10))
+            self.temperature_slider.setValue(int(p['temperature']*10))
+
+            markers = self._cached_markers(p)
+            if markers is not None:
+                self._show_result(*markers)
+            else:
+                # Wynik pojawi się po ocenie w tle (_store_scores)
+                self._pending_profile = p['name']
+                self.result_lbl.setText("Wynik: ...")
+                self.precompute_scores()
+
+    def precompute_scores(self):
+        """
+        Ocena w tle profili bez zapisanej oceny bieżącej bazy reguł
+        (ProfileStore.unscored) jednym wywołaniem wsadowym - wątek UI nie
+        wykonuje wnioskowania, a przy kolejnym uruchomieniu z tą samą bazą
+        reguł nic nie jest oceniane ponownie. Oceny innych baz reguł są
+        usuwane (jak w ProfileStore.score_all).
+        """
+        rule_base = _rule_base_hash(self.fuzzy_system)
+        if rule_base is None or any(thread.rule_base == rule_base for thread in self._scoring_threads):
+            return
+        self.profile_store.prune_scores(rule_base)
+        ids, inputs = self.profile_store.unscored(rule_base)
+        if not len(ids):
+            self._cache_presets(rule_base)
+            self._show_pending()
+            return
+        thread = ScoringThread(self.fuzzy_system, rule_base, ids, inputs, self)
+        thread.scored.connect(self._store_scores)
+        thread.finished.connect(lambda: self._scoring_threads.remove(thread))
+        self._scoring_threads.append(thread)
+        thread.start()
+
+    def _store_scores(self, result):
+        """Zapis ocen z wątku w tle do biblioteki profili (wątek UI)"""
+        self.profile_store.store_scores(result['rule_base'], result['ids'], result['quality'])
+        if result['rule_base'] != _rule_base_hash(self.fuzzy_system):
+            # Baza reguł zmieniła się w trakcie oceny - oceny bieżącej bazy od nowa
+            self.precompute_scores()
+            return
+        self._cache_presets(result['rule_base'])
+        self._show_pending()
+
+    def _show_pending(self):
+        """Wynik profilu wybranego zanim jego ocena była gotowa"""
+        if self._pending_profile is not None:
+            current = self.profile_model.profile(self.profile_combo.currentIndex())
+            if current['name'] == self._pending_profile:
+                markers = self._cached_markers(current)
+                if markers is not None:
+                    self._show_result(*markers)
+            self._pending_profile = None
+
+    def _cache_presets(self, rule_base):
+        """Pozycje markerów presetów z zapisanych ocen (parametry z biblioteki)"""
+        self.score_cache = {}
+        self.score_cache_rule_base = rule_base
+        for name, preset in COFFEE_PROFILES.items():
+            profile = self.profile_store.get(name) if preset['params'] else None
+            quality = self.profile_store.stored_score(name, rule_base) if profile else None
+            if quality is not None:
+                self.score_cache[name] = tuple(profile[key] for key in INPUT_NAMES) + (quality,)
+
+    def _cached_markers(self, profile):
+        """
+        Pozycje markerów (b, a, ar, t, jakość) profilu lub None, gdy ocena
+        nie jest jeszcze gotowa. Presety - z pamięci podręcznej, pozostałe
+        profile - z ocen zapisanych w bibliotece (zmiana bazy reguł
+        unieważnia oba źródła, bo oba są kluczowane jej skrótem).
+        """
+        rule_base = _rule_base_hash(self.fuzzy_system)
+        params = tuple(profile[key] for key in INPUT_NAMES)
+        if rule_base is None:
+            # System zastępczy bez bazy reguł - ocena bezpośrednia
+            return params + (self._score(*params),)
+        if self.score_cache_rule_base != rule_base:
+            self.score_cache = {}
+            self.score_cache_rule_base = None
+        if profile['name'] in COFFEE_PROFILES:
+            return self.score_cache.get(profile['name'])
+        quality = self.profile_store.stored_score(profile['name'], rule_base)
+        return None if quality is None else params + (quality,)
 
     def reset_values(self):
         self.profile_combo.setCurrentIndex(0)
@@ -449,7 +606,20 @@ class CoffeeGUI(QMainWindow):
         ar = self.aroma_slider.value() / 10.0
         t = self.temperature_slider.value() / 10.0
 
-        quality = self.fuzzy_system.evaluate(b, a, ar, t)
+        self._show_result(b, a, ar, t, self._score(b, a, ar, t))
+
+    def _score(self, b, a, ar, t):
+        """
+        Ocena pojedynczego ustawienia tą samą ścieżką wsadową (centroid NumPy),
+        którą liczone są oceny zapisane w bibliotece - wynik suwaków i wynik
+        wybranego profilu o tych samych parametrach są identyczne (scikit-fuzzy
+        różni się m.in. przy temperaturze na górnej granicy zakresu)
+        """
+        if hasattr(self.fuzzy_system, 'evaluate_batch'):
+            return float(self.fuzzy_system.evaluate_batch([[b, a, ar, t]])[0])
+        return self.fuzzy_system.evaluate(b, a, ar, t)
+
+    def _show_result(self, b, a, ar, t, quality):
         self.current_quality = quality
 
         self.result_lbl.setText(f"Wynik: {quality:.1f}")
@@ -461,28 +631,37 @@ class CoffeeGUI(QMainWindow):
         for ax in self.plot_canvas.axes:
             ax.clear()
             ax.grid(alpha=0.3)
+        self.plot_markers = None
         self.plot_canvas.draw()
 
-    def _update_plots(self, b, a, ar, t, q):
+    def _draw_membership_plots(self):
+        """Jednorazowe narysowanie funkcji przynależności z markerami wartości"""
         vars = self.fuzzy_system.get_variables()
-        inputs = [b, a, ar, t, q]
         keys = ['bitterness', 'acidity', 'aroma', 'temperature', 'quality']
         titles = ['Gorzkość', 'Kwasowość', 'Aromat', 'Temperatura', 'Jakość']
 
+        self.plot_markers = []
         for i, ax in enumerate(self.plot_canvas.axes):
             ax.clear()
             var = vars[keys[i]]
             for name, term in var.terms.items():
                 ax.plot(var.universe, term.mf, label=name)
 
-            ax.axvline(inputs[i], color='k', linestyle='--')
+            self.plot_markers.append(ax.axvline(var.universe[0], color='k', linestyle='--'))
             ax.set_title(titles[i], fontsize=8)
             ax.tick_params(labelsize=6)
             # Usuwamy legendę, jeśli zasłania za dużo w małym oknie
             # ax.legend(fontsize=6)
 
         self.plot_canvas.fig.tight_layout()
-        self.plot_canvas.draw()
+
+    def _update_plots(self, b, a, ar, t, q):
+        # Krzywe rysowane raz - przy zmianie wyniku przesuwamy tylko markery
+        if self.plot_markers is None:
+            self._draw_membership_plots()
+        for marker, value in zip(self.plot_markers, [b, a, ar, t, q]):
+            marker.set_xdata([value, value])
+        self.plot_canvas.draw_idle()
 
     def show_explanation_dialog(self):
         QMessageBox.information(self, "Raport", f"Obecna ocena jakości kawy to {self.current_quality:.1f}/100.")
@@ -490,7 +669,9 @@ class CoffeeGUI(QMainWindow):
 def main():
     """Funkcja główna"""
     app = QApplication(sys.argv)
-    window = CoffeeGUI()
+    # Opcjonalny argument: plik biblioteki profili (SQLite)
+    args = app.arguments()[1:]
+    window = CoffeeGUI(ProfileStore(args[0]) if args else None)
     window.show()
     sys.exit(app.exec_())
 
@@ -0,0 +1,359 @@
+"""
+Historia ocen - BrewSense
+Kolumnowy rejestr wyników (tylko dopisywanie) w porcjach plików .npy
+mapowanych do pamięci, z szybkimi zapytaniami zakresowymi i statystykami
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from batch_engine import INPUT_NAMES, QUALITY_LABELS, input_matrix, label_index
+
+
+# Kolumny rejestru i ich typy - float32 wystarcza dla wejść i wyniku 0-100
+COLUMNS = {
+    'timestamp': np.float64,
+    'bitterness': np.float32,
+    'acidity': np.float32,
+    'aroma': np.float32,
+    'temperature': np.float32,
+    'quality': np.float32,
+    'label': np.uint8,
+    'version': np.uint16,
+}
+
+# Kolumny z minimum/maksimum w manifeście (mapy stref); wersja filtrowana
+# tylko równością
+ZONE_COLUMNS = tuple(name for name in COLUMNS if name != 'version')
+
+# Liczba wierszy w jednym pliku porcji
+CHUNK_ROWS = 262144
+
+# Liczba wierszy buforowanych w pamięci przed zapisem na dysk
+FLUSH_ROWS = 4096
+
+MANIFEST = 'manifest.json'
+
+
+class EvaluationHistory:
+    """
+    Rejestr ocen w katalogu: każda porcja to osobny plik .npy na kolumnę,
+    a manifest przechowuje liczbę wierszy oraz minimum/maksimum każdej
+    kolumny porcji (ZONE_COLUMNS), co pozwala pomijać całe porcje
+    w zapytaniach zakresowymi po czasie, wejściach, jakości i kategorii.
+
+    record() i flush() są chronione blokadą - z rejestru może korzystać
+    jednocześnie kilka wątków (np. wątek GUI i wątek oceny w tle).
+    """
+
+    def __init__(self, path, chunk_rows=CHUNK_ROWS, flush_rows=FLUSH_ROWS):
+        """
+        Args:
+            path (str): Katalog rejestru (tworzony gdy nie istnieje)
+            chunk_rows (int): Pojemność jednej porcji (dla nowego rejestru)
+            flush_rows (int): Rozmiar bufora zapisu
+        """
+        self.path = path
+        self.flush_rows = flush_rows
+        os.makedirs(path, exist_ok=True)
+
+        manifest_path = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as handle:
+                self.manifest = json.load(handle)
+        else:
+            self.manifest = {'chunk_rows': chunk_rows, 'versions': [], 'chunks': []}
+
+        self._buffer = {name: [] for name in COLUMNS}
+        self._buffered = 0
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def __len__(self):
+        with self._lock:
+            return sum(chunk['rows'] for chunk in self.manifest['chunks']) + self._buffered
+
+    # ------------------------------------------------------------------
+    # Zapis
+    # ------------------------------------------------------------------
+
+    def _version_id(self, version):
+        """Indeks wersji silnika/bazy reguł w manifeście"""
+        versions = self.manifest['versions']
+        if version not in versions:
+            versions.append(version)
+        return versions.index(version)
+
+    def record(self, inputs, quality, version, timestamp=None):
+        """
+        Dopisanie wyników do bufora (zapis na dysk porcjami)
+
+        Args:
+            inputs (array-like): Wejścia (N x 4) w kolejności INPUT_NAMES
+                lub tablica strukturalna z polami INPUT_NAMES
+            quality (array-like): Wyniki (N,)
+            version (str): Wersja silnika i bazy reguł
+            timestamp (float lub array, optional): Czas ocen (domyślnie teraz)
+        """
+        inputs = input_matrix(inputs)
+        quality = np.asarray(quality, dtype=np.float64).reshape(-1)
+        rows = len(quality)
+        timestamps = np.broadcast_to(time.time() if timestamp is None else timestamp, (rows,))
+
+        with self._lock:
+            self._buffer['timestamp'].append(timestamps)
+            for index, name in enumerate(INPUT_NAMES):
+                self._buffer[name].append(inputs[:, index])
+            self._buffer['quality'].append(quality)
+            self._buffer['label'].append(label_index(quality))
+            self._buffer['version'].append(np.full(rows, self._version_id(version)))
+            self._buffered += rows
+
+            if self._buffered >= self.flush_rows:
+                self.flush()
+
+    def flush(self):
+        """Zapis bufora do plików porcji i aktualizacja manifestu"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        data = {name: np.concatenate(parts).astype(COLUMNS[name])
+                for name, parts in self._buffer.items()}
+        self._buffer = {name: [] for name in COLUMNS}
+        self._buffered = 0
+
+        chunk_rows = self.manifest['chunk_rows']
+        written = 0
+        while written < len(data['quality']):
+            chunks = self.manifest['chunks']
+            if not chunks or chunks[-1]['rows'] == chunk_rows:
+                chunks.append({'rows': 0})
+            chunk, index = chunks[-1], len(chunks) - 1
+
+            count = min(chunk_rows - chunk['rows'], len(data['quality']) - written)
+            part = {name: values[written:written + count] for name, values in data.items()}
+            for name, values in part.items():
+                column = self._open_column(index, name, create=chunk['rows'] == 0)
+                column[chunk['rows']:chunk['rows'] + count] = values
+                column.flush()
+                del column
+
+            self._update_zone_map(chunk, part)
+            chunk['rows'] += count
+            written += count
+
+        # Manifest zapisywany atomowo - po awarii widoczne są tylko pełne zapisy
+        temporary = os.path.join(self.path, MANIFEST + '.tmp')
+        with open(temporary, 'w', encoding='utf-8') as handle:
+            json.dump(self.manifest, handle)
+        os.replace(temporary, os.path.join(self.path, MANIFEST))
+
+    @staticmethod
+    def _update_zone_map(chunk, part):
+        """
+        Aktualizacja minimum/maksimum kolumn porcji. Wartości NaN są pomijane
+        (nie spełniają żadnego warunku zakresu); kolumna bez mapy stref
+        w niepustej porcji (np. z manifestu starszej wersji) pozostaje bez
+        niej - taka porcja jest zawsze przeglądana.
+        """
+        for name in ZONE_COLUMNS:
+            values = part[name][~np.isnan(part[name])] if part[name].dtype.kind == 'f' else part[name]
+            if not len(values) or chunk['rows'] and f'{name}_min' not in chunk:
+                continue
+            low, high = float(values.min()), float(values.max())
+            chunk[f'{name}_min'] = min(chunk.get(f'{name}_min', low), low)
+            chunk[f'{name}_max'] = max(chunk.get(f'{name}_max', high), high)
+
+    def _open_column(self, index, name, create=False):
+        """Plik kolumny porcji mapowany do pamięci"""
+        filename = os.path.join(self.path, f'chunk_{index:05d}_{name}.npy')
+        if create:
+            return np.lib.format.open_memmap(filename, mode='w+', dtype=COLUMNS[name],
+                                             shape=(self.manifest['chunk_rows'],))
+        return np.load(filename, mmap_mode='r+')
+
+    # ------------------------------------------------------------------
+    # Zapytania
+    # ------------------------------------------------------------------
+
+    def _filters(self, start, end, quality, ranges):
+        """Warunki zakresów [min, max) jako słownik kolumna -> (min, max)"""
+        filters = dict(ranges or {})
+        if quality is not None:
+            filters['quality'] = quality
+        if start is not None or end is not None:
+            filters['timestamp'] = (start, end)
+        for name in filters:
+            if name not in ZONE_COLUMNS:
+                raise ValueError(f"Nieznana kolumna zakresu: {name} (dostępne: {', '.join(ZONE_COLUMNS)})")
+        return filters
+
+    @staticmethod
+    def _skip_chunk(chunk, filters, label_ids):
+        """Czy mapa stref porcji wyklucza wszystkie jej wiersze"""
+        for name, (low, high) in filters.items():
+            if f'{name}_min' not in chunk:
+                # Brak mapy stref: porcja bez wartości innych niż NaN lub starszy manifest
+                continue
+            if low is not None and chunk[f'{name}_max'] < low or high is not None and chunk[f'{name}_min'] >= high:
+                return True
+        if label_ids is not None and 'label_min' in chunk:
+            return not any(chunk['label_min'] <= label <= chunk['label_max'] for label in label_ids)
+        return False
+
+    def _chunk_column(self, index, name, rows):
+        """Kolumna porcji mapowana do pamięci tylko do odczytu (rows pierwszych wierszy)"""
+        return np.load(os.path.join(self.path, f'chunk_{index:05d}_{name}.npy'), mmap_mode='r')[:rows]
+
+    def _scan(self, start=None, end=None, quality=None, version=None, columns=None, ranges=None,
+              labels=None):
+        """
+        Iteracja po porcjach spełniających warunki (z pominięciem porcji
+        wykluczonych przez mapy stref)
+
+        Yields:
+            dict: Kolumny przefiltrowanej porcji
+        """
+        filters = self._filters(start, end, quality, ranges)
+        label_ids = None
+        if labels is not None:
+            unknown = set(labels) - set(QUALITY_LABELS)
+            if unknown:
+                raise ValueError(f"Nieznane kategorie jakości: {', '.join(sorted(unknown))}")
+            label_ids = [QUALITY_LABELS.index(label) for label in labels]
+
+        # Migawka manifestu - równoległy zapis dopisuje tylko wiersze za nią
+        with self._lock:
+            self._flush()
+            chunks = [dict(chunk) for chunk in self.manifest['chunks']]
+            versions = list(self.manifest['versions'])
+
+        version_id = None
+        if version is not None:
+            if version not in versions:
+                return
+            version_id = versions.index(version)
+        columns = (set(COLUMNS if columns is None else columns) | {'timestamp', 'quality', 'version'}
+                   | set(filters) | ({'label'} if label_ids is not None else set()))
+
+        for index, chunk in enumerate(chunks):
+            if not chunk['rows'] or self._skip_chunk(chunk, filters, label_ids):
+                continue
+
+            rows = chunk['rows']
+            data = {name: self._chunk_column(index, name, rows) for name in columns}
+            mask = np.ones(rows, dtype=bool)
+            for name, (low, high) in filters.items():
+                if low is not None:
+                    mask &= data[name] >= low
+                if high is not None:
+                    mask &= data[name] < high
+            if label_ids is not None:
+                mask &= np.isin(data['label'], label_ids)
+            if version_id is not None:
+                mask &= data['version'] == version_id
+            yield {name: values[mask] for name, values in data.items()}
+
+    def query(self, start=None, end=None, quality=None, version=None, columns=None, ranges=None,
+              labels=None):
+        """
+        Wiersze z zakresu czasu [start, end), jakości [min, max) i zakresów
+        dowolnych kolumn. Porcje, których minimum/maksimum w manifeście
+        wyklucza warunek, nie są odczytywane.
+
+        Przykład - oceny z temperaturą 70-80 °C i aromatem co najmniej 7:
+            history.query(ranges={'temperature': (70, 80), 'aroma': (7, None)})
+
+        Args:
+            start (float, optional): Początek zakresu czasu (epoka Unix)
+            end (float, optional): Koniec zakresu czasu
+            quality (tuple, optional): Zakres jakości (min, max)
+            version (str, optional): Tylko wyniki danej wersji
+            columns (sequence, optional): Zwracane kolumny (domyślnie wszystkie)
+            ranges (dict, optional): kolumna (ZONE_COLUMNS) -> (min, max);
+                przedział min <= x < max, None - brak ograniczenia z danej strony
+            labels (sequence, optional): Tylko wiersze z tymi kategoriami (QUALITY_LABELS)
+
+        Returns:
+            dict: nazwa kolumny -> np.ndarray
+
+        Raises:
+            ValueError: Nieznana kolumna zakresu lub kategoria
+        """
+        columns = list(columns or COLUMNS)
+        parts = list(self._scan(start, end, quality, version, columns, ranges, labels))
+        return {name: np.concatenate([part[name] for part in parts]) if parts
+                else np.empty(0, dtype=COLUMNS[name]) for name in columns}
+
+    def stats(self, start=None, end=None, quality=None, version=None, ranges=None, labels=None):
+        """
+        Statystyki zbiorcze liczone strumieniowo po porcjach
+
+        Args:
+            start, end, quality, version, ranges, labels: Filtry jak w query()
+
+        Returns:
+            dict: count, mean, std, min, max jakości oraz liczności kategorii
+        """
+        count, total, squares = 0, 0.0, 0.0
+        low, high = np.inf, -np.inf
+        counts = np.zeros(len(QUALITY_LABELS), dtype=np.int64)
+        for part in self._scan(start, end, quality, version, ['label'], ranges, labels):
+            values = part['quality'].astype(np.float64)
+            if not len(values):
+                continue
+            count += len(values)
+            total += values.sum()
+            squares += np.square(values).sum()
+            low, high = min(low, values.min()), max(high, values.max())
+            counts += np.bincount(part['label'], minlength=len(QUALITY_LABELS))
+
+        mean = float(total / count) if count else float('nan')
+        return {
+            'count': count,
+            'mean': mean,
+            'std': float(np.sqrt(max(squares / count - mean ** 2, 0.0))) if count else float('nan'),
+            'min': float(low) if count else float('nan'),
+            'max': float(high) if count else float('nan'),
+            'labels': dict(zip(QUALITY_LABELS, counts.tolist())),
+        }
+
+    def timeline(self, interval, start=None, end=None, version=None, ranges=None, labels=None):
+        """
+        Średnia jakość w przedziałach czasu - do śledzenia dryfu ocen
+
+        Args:
+            interval (float): Szerokość przedziału w sekundach
+            start, end, version, ranges, labels: Filtry jak w query()
+
+        Returns:
+            dict: bucket (początki przedziałów), count, mean
+        """
+        counts, sums = {}, {}
+        for part in self._scan(start, end, None, version, [], ranges, labels):
+            buckets = np.floor(part['timestamp'] / interval).astype(np.int64)
+            keys, inverse = np.unique(buckets, return_inverse=True)
+            bucket_counts = np.bincount(inverse)
+            bucket_sums = np.bincount(inverse, weights=part['quality'])
+            for key, bucket_count, bucket_sum in zip(keys.tolist(), bucket_counts, bucket_sums):
+                counts[key] = counts.get(key, 0) + int(bucket_count)
+                sums[key] = sums.get(key, 0.0) + float(bucket_sum)
+
+        keys = sorted(counts)
+        return {
+            'bucket': np.array(keys, dtype=np.float64) * interval,
+            'count': np.array([counts[key] for key in keys], dtype=np.int64),
+            'mean': np.array([sums[key] / counts[key] for key in keys]),
+        }
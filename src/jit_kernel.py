@@ -0,0 +1,286 @@
+"""
+Jądro JIT - BrewSense
+Opcjonalne jądro Numba łączące przycinanie, rozmywanie, odpalanie reguł
+i defuzyfikację (centroid) w jednej pętli na próbkę, równolegle na
+wszystkich rdzeniach i bez tablic pośrednich N x U.
+Gdy jądro nie może policzyć wyniku (brak Numby, metoda spoza KERNEL_METHODS,
+model float32), ocena przechodzi na ścieżkę NumPy z ostrzeżeniem RuntimeWarning.
+"""
+
+import time
+import warnings
+
+import numpy as np
+
+from batch_engine import STATUS_CLAMPED, STATUS_ERROR, STATUS_NO_ACTIVATION, STATUS_OK, input_matrix
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# Czy jądro JIT jest dostępne w tym środowisku
+AVAILABLE = numba is not None
+
+# Metody defuzyfikacji obsługiwane przez jądro (pozostałe - ścieżka NumPy)
+KERNEL_METHODS = ('centroid',)
+
+# Liczba próbek jednej porcji pętli równoległej - tablice robocze jądra
+# (przynależności, aktywacje) są przydzielane raz na porcję
+KERNEL_CHUNK = 256
+
+prange = numba.prange if AVAILABLE else range
+
+
+def _trapezoid(x, a, b, c, d):
+    """Skalarna funkcja trapezowa - te same przypadki brzegowe co batch_engine.trapezoid"""
+    if x < a or x > d:
+        return 0.0
+    rise = (x - a) / (b - a) if b > a else 1.0
+    fall = (d - x) / (d - c) if d > c else 1.0
+    mu = min(rise, fall)
+    return min(max(mu, 0.0), 1.0)
+
+
+def _aggregated_at(u, activation, output_mf, active, n_active):
+    """Wartość funkcji zagregowanej w punkcie siatki u (tylko termy aktywne)"""
+    value = 0.0
+    for index in range(n_active):
+        term = active[index]
+        value = max(value, min(activation[term], output_mf[term, u]))
+    return value
+
+
+def _cell(x, point):
+    """Indeks komórki siatki zawierającej punkt (searchsorted 'right' - 1, przycięty)"""
+    lo, hi = 0, len(x)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if x[mid] <= point:
+            lo = mid + 1
+        else:
+            hi = mid
+    return min(max(lo - 1, 0), len(x) - 2)
+
+
+def _infer(inputs, input_ranges, term_params, term_var, rule_antecedents, rule_consequents,
+           output_universe, output_params, output_mf, support_start, support_stop,
+           area_weights, moment_weights, default_value, error_value, out, status, clamped):
+    """
+    Pełne wnioskowanie Mamdaniego dla każdej próbki (równolegle po porcjach
+    KERNEL_CHUNK próbek - tablice robocze przydzielane raz na porcję).
+    Centroid z poprawką punktów odcięcia jak CompiledRuleBase._centroid;
+    wiersze z NaN i wyniki nieskończone dostają error_value, a status
+    i flaga przycięcia wiersza - te same wartości co w
+    CompiledRuleBase.evaluate_with_status().
+    """
+    n_terms = len(term_params)
+    n_outputs = len(output_params)
+    n_inputs = inputs.shape[1]
+    x = output_universe
+
+    for chunk in prange((len(inputs) + KERNEL_CHUNK - 1) // KERNEL_CHUNK):
+        memberships = np.empty(n_terms)
+        activation = np.empty(n_outputs)
+        active = np.empty(n_outputs, dtype=np.intp)
+
+        for i in range(chunk * KERNEL_CHUNK, min((chunk + 1) * KERNEL_CHUNK, len(inputs))):
+            invalid = False
+            clamped[i] = False
+            for var in range(n_inputs):
+                if np.isnan(inputs[i, var]):
+                    invalid = True
+                elif inputs[i, var] < input_ranges[var, 0] or inputs[i, var] > input_ranges[var, 1]:
+                    clamped[i] = True
+            if invalid:
+                out[i] = error_value
+                status[i] = STATUS_ERROR
+                continue
+
+            # Przycięcie i rozmycie
+            for k in range(n_terms):
+                var = term_var[k]
+                value = min(max(inputs[i, var], input_ranges[var, 0]), input_ranges[var, 1])
+                memberships[k] = _trapezoid(value, term_params[k, 0], term_params[k, 1],
+                                            term_params[k, 2], term_params[k, 3])
+
+            # Odpalenie reguł (min) i aktywacja termów wyjściowych (max)
+            activation[:] = 0.0
+            for r in range(len(rule_consequents)):
+                strength = 1.0
+                for j in range(rule_antecedents.shape[1]):
+                    k = rule_antecedents[r, j]
+                    if k >= 0:
+                        strength = min(strength, memberships[k])
+                term = rule_consequents[r]
+                activation[term] = max(activation[term], strength)
+
+            # Centroid na nośnikach aktywnych termów
+            n_active = 0
+            lo, hi = len(x), 0
+            for term in range(n_outputs):
+                if activation[term] > 0:
+                    active[n_active] = term
+                    n_active += 1
+                    lo = min(lo, support_start[term])
+                    hi = max(hi, support_stop[term])
+            if n_active == 0:
+                out[i] = default_value
+                status[i] = STATUS_NO_ACTIVATION
+                continue
+            area, moment = 0.0, 0.0
+            for u in range(lo, hi):
+                value = _aggregated_at(u, activation, output_mf, active, n_active)
+                area += area_weights[u] * value
+                moment += moment_weights[u] * value
+
+            # Namioty punktów odcięcia leżących wewnątrz komórek siatki
+            for term in range(n_outputs):
+                a, b, c, d = output_params[term, 0], output_params[term, 1], \
+                    output_params[term, 2], output_params[term, 3]
+                for point in (a + activation[term] * (b - a), d - activation[term] * (d - c)):
+                    cell = _cell(x, point)
+                    x_left, x_right = x[cell], x[cell + 1]
+                    if not (x_left < point < x_right):
+                        continue
+                    f_point = 0.0
+                    for other in range(n_outputs):
+                        mu = _trapezoid(point, output_params[other, 0], output_params[other, 1],
+                                        output_params[other, 2], output_params[other, 3])
+                        f_point = max(f_point, min(mu, activation[other]))
+                    y_left = _aggregated_at(cell, activation, output_mf, active, n_active)
+                    y_right = _aggregated_at(cell + 1, activation, output_mf, active, n_active)
+                    linear = y_left + (y_right - y_left) * (point - x_left) / (x_right - x_left)
+                    tent_area = (x_right - x_left) * (f_point - linear) / 2
+                    area += tent_area
+                    moment += tent_area * (x_left + point + x_right) / 3
+
+            quality = moment / area if area > 0 else default_value
+            if np.isfinite(quality):
+                out[i] = quality
+                status[i] = STATUS_CLAMPED if clamped[i] else STATUS_OK
+            else:
+                out[i] = error_value
+                status[i] = STATUS_ERROR
+
+
+if AVAILABLE:
+    _trapezoid = numba.njit(inline='always')(_trapezoid)
+    _aggregated_at = numba.njit(inline='always')(_aggregated_at)
+    _cell = numba.njit(inline='always')(_cell)
+    _infer = numba.njit(parallel=True, cache=True)(_infer)
+
+
+def kernel_arrays(compiled):
+    """
+    Tablice modelu w postaci przyjmowanej przez jądro (bez obiektów Pythona)
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany model
+
+    Returns:
+        tuple: Argumenty jądra po tablicy wejść, bez tablic wyników, statusów i przycięć
+    """
+    support_start = np.array([s.start for s in compiled.output_support], dtype=np.intp)
+    support_stop = np.array([s.stop for s in compiled.output_support], dtype=np.intp)
+    return (compiled.input_ranges, compiled.term_params, compiled.term_var,
+            compiled.rule_antecedents, compiled.rule_consequents, compiled.output_universe,
+            compiled.output_params, compiled.output_mf, support_start, support_stop,
+            compiled.area_weights, compiled.moment_weights, compiled.default_value,
+            compiled.error_value)
+
+
+def fallback_reason(compiled, method='centroid'):
+    """
+    Powód, dla którego jądro nie policzy wyniku, lub None
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany model
+        method (str): Metoda defuzyfikacji
+
+    Returns:
+        str lub None: Opis przyczyny przejścia na ścieżkę NumPy
+    """
+    if not AVAILABLE:
+        return "Numba nie jest zainstalowana"
+    if method not in KERNEL_METHODS:
+        return f"jądro obsługuje tylko metody {', '.join(KERNEL_METHODS)} (żądano {method})"
+    if compiled.dtype != np.float64:
+        return f"jądro liczy tylko w float64 (model {compiled.dtype})"
+    return None
+
+
+def evaluate(compiled, inputs, metrics=None, method='centroid', out=None):
+    """
+    Ocena wsadowa jądrem JIT; gdy jądro nie może jej wykonać
+    (fallback_reason()), wynik liczy CompiledRuleBase.evaluate()
+    z ostrzeżeniem RuntimeWarning
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany model
+        inputs (array-like): Wejścia (N x 4) w kolejności INPUT_NAMES
+            lub tablica strukturalna z polami INPUT_NAMES
+        metrics (Metrics, optional): Czas jądra (etap jit_kernel), liczniki
+            wywołań, próbek, przycięć i wartości zastępczych - jak na ścieżce NumPy
+        method (str): Metoda defuzyfikacji
+        out (np.ndarray, optional): Tablica (N,) na wyniki - jądro pisze do
+            niej wprost, gdy jest ciągłą tablicą float64
+
+    Returns:
+        np.ndarray: Jakość kawy (N,) lub out
+    """
+    return evaluate_with_status(compiled, inputs, metrics, method, out)[0]
+
+
+def evaluate_with_status(compiled, inputs, metrics=None, method='centroid', out=None, status_out=None):
+    """
+    Ocena wsadowa jądrem JIT ze statusem każdego wiersza (kody STATUS_*);
+    gdy jądro nie może jej wykonać (fallback_reason()), wynik liczy
+    CompiledRuleBase.evaluate_with_status() z ostrzeżeniem RuntimeWarning
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany model
+        inputs (array-like): Wejścia (N x 4) lub tablica strukturalna z polami INPUT_NAMES
+        metrics (Metrics, optional): Jak w evaluate()
+        method (str): Metoda defuzyfikacji
+        out (np.ndarray, optional): Tablica (N,) na wyniki
+        status_out (np.ndarray, optional): Tablica (N,) na statusy
+
+    Returns:
+        tuple: (jakość (N,), status (N,) uint8)
+    """
+    reason = fallback_reason(compiled, method)
+    if reason is not None:
+        warnings.warn(f"Jądro JIT niedostępne ({reason}) - ocena ścieżką NumPy", RuntimeWarning, stacklevel=3)
+        return compiled.evaluate_with_status(inputs, metrics=metrics, method=method, out=out,
+                                             status_out=status_out)
+
+    inputs = np.ascontiguousarray(input_matrix(inputs))
+    for array in (out, status_out):
+        if array is not None and array.shape != (len(inputs),):
+            raise ValueError(f"Oczekiwano tablicy wyników ({len(inputs)},), otrzymano {array.shape}")
+
+    direct = out is not None and out.dtype == np.float64 and out.flags.c_contiguous
+    result = out if direct else np.empty(len(inputs))
+    direct_status = status_out is not None and status_out.dtype == np.uint8 and status_out.flags.c_contiguous
+    status = status_out if direct_status else np.empty(len(inputs), dtype=np.uint8)
+    clamped = np.empty(len(inputs), dtype=np.bool_)
+
+    started = time.perf_counter()
+    _infer(inputs, *kernel_arrays(compiled), result, status, clamped)
+    if metrics is not None:
+        metrics.observe('jit_kernel', time.perf_counter() - started, len(inputs))
+        metrics.count('calls')
+        metrics.count('samples', len(inputs))
+        metrics.count('clamped', int(np.count_nonzero(clamped)))
+        metrics.count('fallback_no_activation', int(np.count_nonzero(status == STATUS_NO_ACTIVATION)))
+        metrics.count('fallback_error', int(np.count_nonzero(status == STATUS_ERROR)))
+
+    if out is not None and not direct:
+        out[...] = result
+        result = out
+    if status_out is not None and not direct_status:
+        status_out[...] = status
+        status = status_out
+    return result, status
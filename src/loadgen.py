@@ -0,0 +1,374 @@
+"""
+Generator obciążenia - BrewSense
+Odtwarzanie realistycznych wejść (rozkłady wokół presetów COFFEE_PROFILES
+z odsetkiem wartości spoza zakresów przycinania) na wybranym punkcie
+wejścia i raport opóźnień, przepustowości, błędów oraz CPU/RSS w czasie.
+Próbkowanie zasobów korzysta z /proc i modułu resource - tylko Linux.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import resource
+import subprocess
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+from batch_engine import INPUT_NAMES, STATUS_ERROR, STATUS_NO_ACTIVATION
+from presets import COFFEE_PROFILES
+
+
+# Odchylenie standardowe wejść wokół presetu
+PRESET_SPREAD = {'bitterness': 0.8, 'acidity': 0.8, 'aroma': 0.8, 'temperature': 3.0}
+
+# Odsetek wierszy spoza zakresów przycinania i jak daleko poza nimi
+# (część szerokości zakresu)
+OUTLIER_FRACTION = 0.02
+OUTLIER_MARGIN = 0.5
+
+# Raportowane percentyle opóźnienia
+PERCENTILES = (50, 95, 99)
+
+# Okres próbkowania CPU i RSS (sekundy)
+SAMPLE_INTERVAL = 0.5
+
+
+def generate_inputs(rows, input_ranges, outlier_fraction=OUTLIER_FRACTION, seed=0):
+    """
+    Wejścia z mieszaniny rozkładów normalnych wokół presetów (równe wagi,
+    przycięte do zakresów) z odsetkiem wartości spoza zakresów przycinania
+
+    Args:
+        rows (int): Liczba wierszy
+        input_ranges (array-like): Zakresy zmiennych (4 x 2)
+        outlier_fraction (float): Odsetek wierszy z wartością spoza zakresu
+        seed (int): Ziarno generatora
+
+    Returns:
+        np.ndarray: Wejścia (rows x 4)
+    """
+    rng = np.random.default_rng(seed)
+    centers = np.array([[preset['params'][name] for name in INPUT_NAMES]
+                        for preset in COFFEE_PROFILES.values() if preset['params']])
+    spread = np.array([PRESET_SPREAD[name] for name in INPUT_NAMES])
+    low, high = np.asarray(input_ranges, dtype=np.float64).T
+    inputs = centers[rng.integers(0, len(centers), rows)] + rng.standard_normal((rows, len(spread))) * spread
+    inputs = np.clip(inputs, low, high)
+
+    # Wartość odstająca w jednej losowej zmiennej - poniżej lub powyżej zakresu
+    outliers = np.flatnonzero(rng.random(rows) < outlier_fraction)
+    column = rng.integers(0, len(spread), len(outliers))
+    width = (high - low)[column]
+    distance = rng.uniform(0.01, OUTLIER_MARGIN, len(outliers)) * width
+    above = rng.random(len(outliers)) < 0.5
+    inputs[outliers, column] = np.where(above, high[column] + distance, low[column] - distance)
+    return inputs
+
+
+class LibraryTarget:
+    """Wywołanie biblioteczne w tym procesie: CoffeeQualitySystem.evaluate_batch_with_status()"""
+
+    def __init__(self, method='centroid'):
+        from fuzzy_system import CoffeeQualitySystem
+
+        self.system = CoffeeQualitySystem(metrics=False)
+        self.method = method
+
+    def __call__(self, inputs):
+        return self.system.evaluate_batch_with_status(inputs, method=self.method)
+
+
+class CommandTarget:
+    """
+    Polecenie wsadowe: wiersze CSV (nagłówek INPUT_NAMES) na standardowym
+    wejściu, jedna ocena na wiersz na standardowym wyjściu (bez statusu wierszy)
+    """
+
+    def __init__(self, command):
+        self.command = command
+
+    def __call__(self, inputs):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(INPUT_NAMES)
+        writer.writerows(inputs.tolist())
+        result = subprocess.run(self.command, shell=True, input=buffer.getvalue(),
+                                capture_output=True, text=True, check=True)
+        return np.array([float(line) for line in result.stdout.split()]), None
+
+
+class HttpTarget:
+    """
+    Serwer oceny: POST {"inputs": [[...], ...]} -> {"quality": [...]}
+    z opcjonalnym "status": [...] (kody STATUS_* z batch_engine)
+    """
+
+    def __init__(self, url, timeout=30.0):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, inputs):
+        body = json.dumps({'inputs': inputs.tolist()}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            payload = json.load(response)
+        status = payload.get('status')
+        return (np.array(payload['quality'], dtype=np.float64),
+                None if status is None else np.array(status, dtype=np.uint8))
+
+
+def make_target(spec, method='centroid'):
+    """
+    Punkt wejścia z opisu: 'library', 'cmd:<polecenie>' lub adres http(s)://
+
+    Args:
+        spec (str): Opis punktu wejścia
+        method (str): Metoda defuzyfikacji (tylko 'library')
+
+    Returns:
+        callable: Funkcja (N x 4) -> (jakość (N,), status (N,) lub None, gdy
+            punkt wejścia nie podaje statusu wierszy)
+    """
+    if spec == 'library':
+        return LibraryTarget(method)
+    if spec.startswith('cmd:'):
+        return CommandTarget(spec[len('cmd:'):])
+    if spec.startswith(('http://', 'https://')):
+        return HttpTarget(spec)
+    raise ValueError(f"Nieznany punkt wejścia: {spec}")
+
+
+def _stat_fields(pid):
+    """Pola /proc/<pid>/stat po nazwie polecenia (pole 3 - stan - ma indeks 0)"""
+    with open(f"/proc/{pid}/stat") as handle:
+        return handle.read().rsplit(')', 1)[1].split()
+
+
+class ResourceSampler(threading.Thread):
+    """
+    Próbkowanie CPU (% jednego rdzenia) i RSS drzewa procesów w równych
+    odstępach: proces, jego żyjący potomkowie oraz zakończeni potomkowie,
+    na których proces czekał (czasy cutime/cstime) - dzięki temu dla
+    punktu wejścia cmd: liczą się uruchamiane polecenia. Źródłem jest
+    /proc (tylko Linux); bez /proc - zasoby bieżącego procesu i jego
+    potomków z modułu resource.
+    """
+
+    def __init__(self, pid=None, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.pid = pid or os.getpid()
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def _tree(self):
+        """Identyfikatory procesu i wszystkich jego żyjących potomków"""
+        parents = {}
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    parents[int(entry)] = int(_stat_fields(entry)[1])
+                except (OSError, IndexError, ValueError):
+                    continue  # proces zakończył się w trakcie odczytu
+        tree, level = [self.pid], {self.pid}
+        while level:
+            level = {pid for pid, parent in parents.items() if parent in level}
+            tree.extend(level)
+        return tree
+
+    def _read(self):
+        """Łączny czas CPU (s) i bieżący RSS (bajty) drzewa procesów"""
+        try:
+            ticks, page = os.sysconf('SC_CLK_TCK'), os.sysconf('SC_PAGE_SIZE')
+            cpu = rss = 0
+            for pid in self._tree():
+                try:
+                    fields = _stat_fields(pid)
+                except OSError:
+                    if pid == self.pid:
+                        raise
+                    continue
+                # utime, stime, cutime, cstime
+                cpu += sum(int(value) for value in fields[11:15]) / ticks
+                rss += int(fields[21]) * page
+        except OSError:
+            own = resource.getrusage(resource.RUSAGE_SELF)
+            children = resource.getrusage(resource.RUSAGE_CHILDREN)
+            cpu = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+            rss = own.ru_maxrss * 1024
+        return cpu, rss
+
+    def run(self):
+        start = last_time = time.perf_counter()
+        last_cpu, _ = self._read()
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            cpu, rss = self._read()
+            self.samples.append({'time': now - start,
+                                 'cpu_percent': 100.0 * (cpu - last_cpu) / (now - last_time),
+                                 'rss_bytes': rss})
+            last_time, last_cpu = now, cpu
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def run_load(target, inputs, batch_size=1, concurrency=1, rate=0.0, seed=0):
+    """
+    Odtworzenie wsadów na punkcie wejścia. Przy rate > 0 wsady przychodzą
+    w chwilach procesu Poissona (otwarta pętla), a opóźnienie liczone jest od
+    planowanej chwili przyjścia, więc obejmuje też oczekiwanie w kolejce;
+    rate = 0 to zamknięta pętla - każdy wątek wysyła kolejny wsad od razu.
+
+    Args:
+        target (callable): Punkt wejścia z make_target()
+        inputs (np.ndarray): Wejścia (N x 4), dzielone na wsady po batch_size
+        batch_size (int): Liczba wierszy na żądanie
+        concurrency (int): Liczba równoległych wątków klienta
+        rate (float): Średnia liczba żądań na sekundę (0 - bez ograniczenia)
+        seed (int): Ziarno chwil przyjścia
+
+    Returns:
+        dict: latency (s, na żądanie), rows, errors, fallbacks (wiersze
+            ze statusem STATUS_NO_ACTIVATION / STATUS_ERROR oraz wiersze
+            bez statusu - 'unknown') i elapsed (s)
+    """
+    batches = [inputs[start:start + batch_size] for start in range(0, len(inputs), batch_size)]
+    if rate > 0:
+        arrivals = np.cumsum(np.random.default_rng(seed).exponential(1.0 / rate, len(batches)))
+    else:
+        arrivals = None
+
+    latency = np.full(len(batches), np.nan)
+    state = {'next': 0, 'errors': 0, 'no_activation': 0, 'error_value': 0, 'unknown': 0, 'rows': 0}
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def worker():
+        while True:
+            with lock:
+                index = state['next']
+                if index >= len(batches):
+                    return
+                state['next'] += 1
+            scheduled = start + arrivals[index] if arrivals is not None else time.perf_counter()
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                quality, status = target(batches[index])
+            except Exception:
+                with lock:
+                    state['errors'] += 1
+                continue
+            latency[index] = time.perf_counter() - scheduled
+            with lock:
+                state['rows'] += len(quality)
+                if status is None:
+                    state['unknown'] += len(quality)
+                else:
+                    state['no_activation'] += int(np.count_nonzero(status == STATUS_NO_ACTIVATION))
+                    state['error_value'] += int(np.count_nonzero(status == STATUS_ERROR))
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'latency': latency[~np.isnan(latency)],
+        'requests': len(batches),
+        'rows': state['rows'],
+        'errors': state['errors'],
+        'fallbacks': {'no_activation': state['no_activation'], 'error': state['error_value'],
+                      'unknown': state['unknown']},
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def summarize(result, samples=()):
+    """
+    Raport z wyników run_load() i próbek ResourceSampler
+
+    Returns:
+        dict: Percentyle opóźnienia (ms), przepustowość, błędy, wartości
+            awaryjne i przebieg CPU/RSS
+    """
+    latency = result['latency'] * 1000
+    completed = len(latency)
+    return {
+        'requests': result['requests'],
+        'completed': completed,
+        'errors': result['errors'],
+        'fallbacks': result['fallbacks'],
+        'latency_ms': {f"p{p}": float(np.percentile(latency, p)) if completed else None
+                       for p in PERCENTILES},
+        'latency_max_ms': float(latency.max()) if completed else None,
+        'throughput': {'requests_per_s': completed / result['elapsed'],
+                       'rows_per_s': result['rows'] / result['elapsed']},
+        'elapsed_s': result['elapsed'],
+        'resources': list(samples),
+    }
+
+
+def main():
+    """Narzędzie wiersza poleceń: test obciążenia i raport"""
+    parser = argparse.ArgumentParser(description="Generator obciążenia BrewSense "
+                                                 "(tylko Linux: CPU/RSS z /proc i modułu resource)")
+    parser.add_argument('target', nargs='?', default='library',
+                        help="'library', 'cmd:<polecenie>' lub adres http(s):// serwera oceny")
+    parser.add_argument('--requests', type=int, default=1000, help="Liczba żądań")
+    parser.add_argument('--batch', type=int, default=1, help="Liczba wierszy na żądanie")
+    parser.add_argument('--concurrency', type=int, default=1, help="Liczba równoległych klientów")
+    parser.add_argument('--rate', type=float, default=0.0,
+                        help="Żądania na sekundę (0 - zamknięta pętla, bez ograniczenia)")
+    parser.add_argument('--outliers', type=float, default=OUTLIER_FRACTION,
+                        help="Odsetek wierszy spoza zakresów przycinania")
+    parser.add_argument('--method', default='centroid', help="Metoda defuzyfikacji (tylko 'library')")
+    parser.add_argument('--pid', type=int,
+                        help="Proces, którego CPU/RSS (razem z potomkami) jest próbkowane; domyślnie "
+                             "ten proces, co obejmuje polecenia cmd: - dla serwera http(s) podaj jego PID")
+    parser.add_argument('--seed', type=int, default=0, help="Ziarno generatora")
+    parser.add_argument('--output', metavar='JSON', help="Zapis pełnego raportu do pliku")
+    args = parser.parse_args()
+
+    from fuzzy_system import INPUT_RANGES
+
+    target = make_target(args.target, args.method)
+    inputs = generate_inputs(args.requests * args.batch, [INPUT_RANGES[name] for name in INPUT_NAMES],
+                             args.outliers, args.seed)
+
+    sampler = ResourceSampler(args.pid)
+    sampler.start()
+    result = run_load(target, inputs, args.batch, args.concurrency, args.rate, args.seed)
+    sampler.stop()
+    report = summarize(result, sampler.samples)
+
+    latency = report['latency_ms']
+    print(f"Żądania: {report['completed']}/{report['requests']}  błędy: {report['errors']}  "
+          f"wartości awaryjne: {report['fallbacks']['no_activation']} (brak aktywacji), "
+          f"{report['fallbacks']['error']} (błąd)"
+          + (f", {report['fallbacks']['unknown']} wierszy bez statusu" if report['fallbacks']['unknown'] else ""))
+    if report['completed']:
+        print("Opóźnienie [ms]: " + "  ".join(f"{name} {value:.2f}" for name, value in latency.items())
+              + f"  max {report['latency_max_ms']:.2f}")
+    print(f"Przepustowość: {report['throughput']['requests_per_s']:.1f} żądań/s, "
+          f"{report['throughput']['rows_per_s']:.1f} wierszy/s")
+    for sample in report['resources']:
+        print(f"  t={sample['time']:6.1f}s  CPU {sample['cpu_percent']:6.1f}%  "
+              f"RSS {sample['rss_bytes'] / 2**20:7.1f} MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Metryki wnioskowania - BrewSense
+Liczniki i histogramy czasu etapów wnioskowania z eksportem
+do formatu tekstowego Prometheus
+"""
+
+import bisect
+import threading
+
+
+# Etapy ścieżki wsadowej (activate - maksimum sił reguł dla termu wyjściowego,
+# aggregate - funkcja wyjściowa na uniwersum), całe wywołanie evaluate()
+# scikit-fuzzy (compute() wykonuje wszystkie etapy wewnątrz, bez podziału)
+# oraz całe jądro JIT (etapy połączone w jednej pętli)
+STAGES = ('clamp', 'fuzzify', 'fire', 'activate', 'aggregate', 'defuzzify', 'skfuzzy_evaluate', 'jit_kernel')
+
+# Liczniki zdarzeń
+COUNTERS = ('calls', 'samples', 'clamped', 'fallback_no_activation', 'fallback_error',
+            'classify_samples', 'classify_early_exit')
+
+# Górne granice przedziałów histogramu czasu (sekundy)
+BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0)
+
+PREFIX = 'brewsense'
+
+
+class Metrics:
+    """
+    Zbiór liczników i histogramów. Jedna obserwacja to jeden etap dla
+    całej porcji próbek, więc narzut nie zależy od rozmiaru porcji.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Wyzerowanie wszystkich metryk"""
+        with self._lock:
+            self.counters = dict.fromkeys(COUNTERS, 0)
+            self.buckets = {stage: [0] * (len(BUCKETS) + 1) for stage in STAGES}
+            self.sums = dict.fromkeys(STAGES, 0.0)
+            self.samples = dict.fromkeys(STAGES, 0)
+
+    def observe(self, stage, seconds, samples=1):
+        """
+        Rejestracja czasu wykonania etapu
+
+        Args:
+            stage (str): Nazwa etapu (STAGES)
+            seconds (float): Czas trwania w sekundach
+            samples (int): Liczba próbek przetworzonych w tym czasie
+        """
+        with self._lock:
+            self.buckets[stage][bisect.bisect_left(BUCKETS, seconds)] += 1
+            self.sums[stage] += seconds
+            self.samples[stage] += samples
+
+    def count(self, name, value=1):
+        """
+        Zwiększenie licznika
+
+        Args:
+            name (str): Nazwa licznika (COUNTERS)
+            value (int): Przyrost
+        """
+        with self._lock:
+            self.counters[name] += value
+
+    def stats(self):
+        """
+        Migawka metryk
+
+        Returns:
+            dict: counters, stages (count, sum, samples, mean_per_sample,
+                buckets) dla każdego etapu oraz classify_early_exit_ratio -
+                odsetek próbek classify() bez pełnej defuzyfikacji
+        """
+        with self._lock:
+            stages = {}
+            for stage in STAGES:
+                samples = self.samples[stage]
+                stages[stage] = {
+                    'count': sum(self.buckets[stage]),
+                    'sum': self.sums[stage],
+                    'samples': samples,
+                    'mean_per_sample': self.sums[stage] / samples if samples else 0.0,
+                    'buckets': dict(zip(BUCKETS + (float('inf'),), self.buckets[stage])),
+                }
+            classified = self.counters['classify_samples']
+            return {
+                'counters': dict(self.counters),
+                'stages': stages,
+                'classify_early_exit_ratio': (self.counters['classify_early_exit'] / classified
+                                              if classified else 0.0),
+            }
+
+    def prometheus(self):
+        """
+        Eksport metryk w formacie tekstowym Prometheus
+
+        Returns:
+            str: Treść odpowiedzi dla endpointu /metrics
+        """
+        snapshot = self.stats()
+        lines = []
+        for name, value in snapshot['counters'].items():
+            lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+            lines.append(f"{PREFIX}_{name}_total {value}")
+
+        lines.append(f"# HELP {PREFIX}_classify_early_exit_ratio Odsetek próbek classify() bez defuzyfikacji")
+        lines.append(f"# TYPE {PREFIX}_classify_early_exit_ratio gauge")
+        lines.append(f"{PREFIX}_classify_early_exit_ratio {snapshot['classify_early_exit_ratio']!r}")
+
+        lines.append(f"# HELP {PREFIX}_stage_seconds Czas etapu wnioskowania dla porcji próbek")
+        lines.append(f"# TYPE {PREFIX}_stage_seconds histogram")
+        for stage, data in snapshot['stages'].items():
+            cumulative = 0
+            for bound, count in data['buckets'].items():
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{stage}"}} {data["sum"]!r}')
+            lines.append(f'{PREFIX}_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+
+        lines.append(f"# TYPE {PREFIX}_stage_samples_total counter")
+        for stage, data in snapshot['stages'].items():
+            lines.append(f'{PREFIX}_stage_samples_total{{stage="{stage}"}} {data["samples"]}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,161 @@
+"""
+Optymalizacja odwrotna - BrewSense
+Wyszukiwanie parametrów kawy o najwyższej przewidywanej jakości
+przy zadanych ograniczeniach (siatka wsadowa + lokalne doprecyzowanie)
+"""
+
+import itertools
+
+import numpy as np
+
+from batch_engine import INPUT_NAMES
+
+
+# Kierunki optymalizacji celów w zbiorze Pareto
+DIRECTIONS = {'max': 1.0, 'min': -1.0}
+
+
+def resolve_bounds(input_ranges, constraints):
+    """
+    Zamiana ograniczeń na przedziały [min, max] dla każdej zmiennej
+
+    Args:
+        input_ranges (np.ndarray): Zakresy zmiennych (4 x 2)
+        constraints (dict): zmienna -> wartość stała lub krotka (min, max);
+            None w krotce oznacza brak ograniczenia z danej strony
+
+    Returns:
+        np.ndarray: Przedziały (4 x 2); dla zmiennych ustalonych min == max
+    """
+    bounds = np.array(input_ranges, dtype=np.float64)
+    for name, value in (constraints or {}).items():
+        if name not in INPUT_NAMES:
+            raise ValueError(f"Nieznana zmienna w ograniczeniach: {name}")
+        row = bounds[INPUT_NAMES.index(name)]
+        low, high = (value, value) if np.isscalar(value) else value
+        lower = row[0] if low is None else max(row[0], low)
+        upper = row[1] if high is None else min(row[1], high)
+        if lower > upper:
+            raise ValueError(f"Sprzeczne ograniczenia dla {name}: {value} poza zakresem {tuple(row)}")
+        row[:] = lower, upper
+    return bounds
+
+
+def grid(bounds, points):
+    """
+    Regularna siatka kandydatów w przedziałach (zmienne ustalone mają 1 punkt)
+
+    Args:
+        bounds (np.ndarray): Przedziały (4 x 2)
+        points (int): Liczba punktów na każdą wolną zmienną
+
+    Returns:
+        np.ndarray: Kandydaci (M x 4)
+    """
+    axes = [np.linspace(low, high, points) if high > low else np.array([low])
+            for low, high in bounds]
+    return np.array(list(itertools.product(*axes)))
+
+
+def refine(evaluate, starts, scores, bounds, step, tolerance=1e-3, max_iter=50):
+    """
+    Lokalne doprecyzowanie metodą przeszukiwania wzorcowego (pattern search).
+    Sąsiedzi wszystkich punktów startowych są oceniani jednym wywołaniem.
+
+    Args:
+        evaluate (callable): Funkcja wsadowa (M x 4) -> (M,)
+        starts (np.ndarray): Punkty startowe (S x 4)
+        scores (np.ndarray): Jakość punktów startowych (S,)
+        bounds (np.ndarray): Przedziały (4 x 2)
+        step (np.ndarray): Początkowy krok dla każdej zmiennej (4,)
+        tolerance (float): Minimalny krok kończący przeszukiwanie
+        max_iter (int): Maksymalna liczba iteracji
+
+    Returns:
+        tuple: (punkty (S x 4), jakości (S,))
+    """
+    points, scores = starts.copy(), scores.copy()
+    free = np.flatnonzero(bounds[:, 1] > bounds[:, 0])
+    steps = np.tile(step, (len(points), 1))
+
+    # Kierunki +e_i / -e_i dla wolnych zmiennych
+    directions = np.zeros((2 * len(free), len(INPUT_NAMES)))
+    directions[np.arange(len(free)), free] = 1.0
+    directions[len(free) + np.arange(len(free)), free] = -1.0
+
+    for _ in range(max_iter):
+        if not len(free) or steps[:, free].max() < tolerance:
+            break
+        candidates = points[:, None, :] + directions[None, :, :] * steps[:, None, :]
+        candidates = np.clip(candidates, bounds[:, 0], bounds[:, 1])
+        values = evaluate(candidates.reshape(-1, len(INPUT_NAMES))).reshape(len(points), -1)
+
+        best = values.argmax(axis=1)
+        improved = values[np.arange(len(points)), best] > scores
+        points[improved] = candidates[improved, best[improved]]
+        scores[improved] = values[improved, best[improved]]
+        # Brak poprawy - zmniejszenie kroku
+        steps[~improved] /= 2
+    return points, scores
+
+
+def pareto_front(values):
+    """
+    Indeksy punktów niezdominowanych (wszystkie cele maksymalizowane)
+
+    Args:
+        values (np.ndarray): Wartości celów (M x C)
+
+    Returns:
+        np.ndarray: Indeksy zbioru Pareto
+    """
+    # Sortowanie malejąco - punkt dominujący zawsze poprzedza zdominowany
+    order = np.lexsort(values.T[::-1])[::-1]
+    front = []
+    for index in order:
+        kept = values[front]
+        dominated = np.all(kept >= values[index], axis=1) & np.any(kept > values[index], axis=1)
+        duplicate = np.all(kept == values[index], axis=1)
+        if not (dominated.any() or duplicate.any()):
+            front.append(index)
+    return np.array(front, dtype=np.intp)
+
+
+def optimize(compiled, constraints=None, grid_points=11, top_k=5, objectives=None):
+    """
+    Wyszukanie wejść maksymalizujących jakość przy ograniczeniach
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany system rozmyty
+        constraints (dict): Ograniczenia, np. {'temperature': 70, 'aroma': (None, 6)}
+        grid_points (int): Liczba punktów siatki na każdą wolną zmienną
+        top_k (int): Liczba najlepszych punktów siatki doprecyzowywanych lokalnie
+        objectives (dict, optional): Cele zbioru Pareto, np.
+            {'quality': 'max', 'temperature': 'min'}
+
+    Returns:
+        dict: Najlepsze wejścia i 'quality'; przy podanych celach dodatkowo
+            'pareto' - tablica (P x 5) kolumn INPUT_NAMES + quality
+    """
+    bounds = resolve_bounds(compiled.input_ranges, constraints)
+    candidates = grid(bounds, grid_points)
+    scores = compiled.evaluate(candidates)
+
+    top = np.argsort(scores)[::-1][:top_k]
+    step = (bounds[:, 1] - bounds[:, 0]) / max(grid_points - 1, 1) / 2
+    points, refined = refine(compiled.evaluate, candidates[top], scores[top], bounds, step)
+
+    best = refined.argmax()
+    result = dict(zip(INPUT_NAMES, points[best].tolist()))
+    result['quality'] = float(refined[best])
+
+    if objectives:
+        table = np.column_stack([np.vstack([candidates, points]), np.concatenate([scores, refined])])
+        columns = INPUT_NAMES + ('quality',)
+        for name, direction in objectives.items():
+            if name not in columns or direction not in DIRECTIONS:
+                raise ValueError(f"Nieprawidłowy cel: {name}={direction}")
+        values = np.column_stack([table[:, columns.index(name)] * DIRECTIONS[direction]
+                                  for name, direction in objectives.items()])
+        result['pareto'] = table[pareto_front(values)]
+    return result
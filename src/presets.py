@@ -0,0 +1,15 @@
+"""
+Presety profili kawy - BrewSense
+Wbudowane profile wyświetlane w GUI i importowane do biblioteki profili
+"""
+
+COFFEE_PROFILES = {
+    "Własny (Manualny)": {"desc": "Ręczne ustawienia.", "params": None},
+    "Espresso Italiano": {"desc": "Klasyczne włoskie espresso.", "params": {"bitterness": 8.0, "acidity": 3.0, "aroma": 9.0, "temperature": 90.0}},
+    "Americano": {"desc": "Espresso z wodą.", "params": {"bitterness": 4.5, "acidity": 4.0, "aroma": 6.0, "temperature": 94.0}},
+    "Cappuccino": {"desc": "Balans mleka i kawy.", "params": {"bitterness": 3.5, "acidity": 2.5, "aroma": 7.0, "temperature": 70.0}},
+    "Flat White": {"desc": "Podwójne espresso z mlekiem.", "params": {"bitterness": 6.0, "acidity": 3.5, "aroma": 8.0, "temperature": 75.0}},
+    "Cold Brew": {"desc": "Kawa parzona na zimno.", "params": {"bitterness": 2.0, "acidity": 1.5, "aroma": 5.0, "temperature": 60.0}}
+}
+
+MANUAL_PROFILE = "Własny (Manualny)"
@@ -0,0 +1,355 @@
+"""
+Biblioteka profili kaw - BrewSense
+Magazyn profili (ziarno/receptura) w SQLite z indeksami na parametrach
+i zapamiętanymi ocenami, unieważnianymi po zmianie bazy reguł
+"""
+
+import argparse
+import csv
+import sqlite3
+
+import numpy as np
+
+from batch_engine import INPUT_NAMES
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id          INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL UNIQUE,
+    description TEXT NOT NULL DEFAULT '',
+    bitterness  REAL NOT NULL,
+    acidity     REAL NOT NULL,
+    aroma       REAL NOT NULL,
+    temperature REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_profiles_bitterness ON profiles(bitterness);
+CREATE INDEX IF NOT EXISTS idx_profiles_acidity ON profiles(acidity);
+CREATE INDEX IF NOT EXISTS idx_profiles_aroma ON profiles(aroma);
+CREATE INDEX IF NOT EXISTS idx_profiles_temperature ON profiles(temperature);
+
+CREATE TABLE IF NOT EXISTS scores (
+    rule_base  TEXT NOT NULL,
+    profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    quality    REAL NOT NULL,
+    PRIMARY KEY (rule_base, profile_id)
+);
+CREATE INDEX IF NOT EXISTS idx_scores_quality ON scores(rule_base, quality DESC);
+
+-- Zmiana parametrów profilu unieważnia jego oceny
+CREATE TRIGGER IF NOT EXISTS profiles_invalidate AFTER UPDATE OF
+    bitterness, acidity, aroma, temperature ON profiles
+BEGIN
+    DELETE FROM scores WHERE profile_id = OLD.id;
+END;
+"""
+
+# Liczba profili oceniana jednym wywołaniem evaluate_batch()
+SCORE_BATCH_SIZE = 8192
+
+PROFILE_COLUMNS = ('name', 'description') + INPUT_NAMES
+
+
+class ProfileStore:
+    """
+    Magazyn profili kaw z szybkim wyszukiwaniem i ocenami wsadowymi.
+    Oceny są zapisywane razem ze skrótem bazy reguł (rule_base_hash),
+    dzięki czemu wyniki starego modelu nigdy nie są zwracane dla nowego.
+    """
+
+    def __init__(self, path=':memory:'):
+        """
+        Args:
+            path (str): Ścieżka pliku bazy SQLite (domyślnie baza w pamięci)
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        """Zamknięcie połączenia z bazą"""
+        self.connection.close()
+
+    def add_profiles(self, profiles, overwrite=True):
+        """
+        Dodanie lub aktualizacja wielu profili w jednej transakcji
+
+        Args:
+            profiles (iterable): Krotki (nazwa, opis, gorzkość, kwasowość,
+                aromat, temperatura)
+            overwrite (bool): Aktualizacja istniejących profili o tej samej
+                nazwie; False - istniejące profile (i ich wyniki) bez zmian
+        """
+        if overwrite:
+            conflict = ("DO UPDATE SET description = excluded.description, "
+                        "bitterness = excluded.bitterness, acidity = excluded.acidity, "
+                        "aroma = excluded.aroma, temperature = excluded.temperature")
+        else:
+            conflict = "DO NOTHING"
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO profiles (name, description, bitterness, acidity, aroma, temperature) "
+                f"VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(name) {conflict}",
+                profiles,
+            )
+
+    def add_profile(self, name, params, description=''):
+        """
+        Dodanie lub aktualizacja pojedynczego profilu
+
+        Args:
+            name (str): Unikalna nazwa profilu
+            params (dict): Parametry (bitterness, acidity, aroma, temperature)
+            description (str): Opis profilu
+        """
+        self.add_profiles([(name, description) + tuple(params[key] for key in INPUT_NAMES)])
+
+    def import_presets(self, presets):
+        """
+        Import profili w formacie COFFEE_PROFILES z presets.py
+        (profile bez parametrów, np. "Własny (Manualny)", są pomijane).
+        Profile użytkownika o tej samej nazwie nie są nadpisywane.
+
+        Args:
+            presets (dict): nazwa -> {"desc": str, "params": dict lub None}
+        """
+        self.add_profiles(
+            ((name, preset['desc']) + tuple(preset['params'][key] for key in INPUT_NAMES)
+             for name, preset in presets.items() if preset['params']),
+            overwrite=False,
+        )
+
+    def import_csv(self, path):
+        """
+        Import profili z pliku CSV z kolumnami name, description (opcjonalna),
+        bitterness, acidity, aroma, temperature
+
+        Args:
+            path (str): Ścieżka pliku CSV
+        """
+        with open(path, newline='', encoding='utf-8') as handle:
+            self.add_profiles(
+                (row['name'], row.get('description') or '') +
+                tuple(float(row[key]) for key in INPUT_NAMES)
+                for row in csv.DictReader(handle)
+            )
+
+    def count(self):
+        """
+        Returns:
+            int: Liczba profili w bibliotece
+        """
+        return self.connection.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def page(self, offset, limit):
+        """
+        Stronicowane pobieranie profili (w kolejności dodania)
+
+        Args:
+            offset (int): Indeks pierwszego profilu
+            limit (int): Maksymalna liczba profili
+
+        Returns:
+            list: Słowniki z kluczami name, description i parametrami
+        """
+        rows = self.connection.execute(
+            f"SELECT {', '.join(PROFILE_COLUMNS)} FROM profiles ORDER BY id LIMIT ? OFFSET ?",
+            (limit, offset),
+        )
+        return [dict(zip(PROFILE_COLUMNS, row)) for row in rows]
+
+    def parameters(self):
+        """
+        Nazwy i parametry wszystkich profili - wejście jednej oceny wsadowej
+
+        Returns:
+            tuple: (lista nazw, np.ndarray N x 4 w kolejności INPUT_NAMES)
+        """
+        rows = self.connection.execute(
+            f"SELECT name, {', '.join(INPUT_NAMES)} FROM profiles ORDER BY id"
+        ).fetchall()
+        names = [row[0] for row in rows]
+        params = np.array([row[1:] for row in rows], dtype=np.float64).reshape(-1, len(INPUT_NAMES))
+        return names, params
+
+    def get(self, name):
+        """
+        Pobranie profilu po nazwie
+
+        Args:
+            name (str): Nazwa profilu
+
+        Returns:
+            dict lub None: Profil lub None gdy nie istnieje
+        """
+        row = self.connection.execute(
+            f"SELECT {', '.join(PROFILE_COLUMNS)} FROM profiles WHERE name = ?", (name,)
+        ).fetchone()
+        return dict(zip(PROFILE_COLUMNS, row)) if row else None
+
+    def unscored(self, rule_base):
+        """
+        Profile bez oceny danej bazy reguł - wejście oceny wsadowej, którą
+        można wykonać poza wątkiem połączenia (np. w wątku GUI w tle)
+
+        Args:
+            rule_base (str): Skrót bazy reguł (rule_base_hash)
+
+        Returns:
+            tuple: (identyfikatory profili (N,), np.ndarray N x 4 w kolejności INPUT_NAMES)
+        """
+        rows = self.connection.execute(
+            f"SELECT p.id, {', '.join(f'p.{key}' for key in INPUT_NAMES)} "
+            "FROM profiles p LEFT JOIN scores s "
+            "ON s.profile_id = p.id AND s.rule_base = ? "
+            "WHERE s.profile_id IS NULL ORDER BY p.id",
+            (rule_base,),
+        ).fetchall()
+        rows = np.array(rows, dtype=np.float64).reshape(-1, len(INPUT_NAMES) + 1)
+        return rows[:, 0].astype(np.int64), rows[:, 1:]
+
+    def store_scores(self, rule_base, ids, quality):
+        """
+        Zapis ocen profili wyliczonych daną bazą reguł
+
+        Args:
+            rule_base (str): Skrót bazy reguł (rule_base_hash)
+            ids (sequence): Identyfikatory profili z unscored()
+            quality (sequence): Oceny (N,)
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO scores (rule_base, profile_id, quality) VALUES (?, ?, ?)",
+                zip([rule_base] * len(ids), np.asarray(ids).tolist(), np.asarray(quality).tolist()),
+            )
+
+    def prune_scores(self, rule_base):
+        """
+        Usunięcie ocen wyliczonych innymi bazami reguł
+
+        Args:
+            rule_base (str): Skrót bieżącej bazy reguł
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM scores WHERE rule_base != ?", (rule_base,))
+
+    def stored_score(self, name, rule_base):
+        """
+        Zapisana ocena profilu
+
+        Args:
+            name (str): Nazwa profilu
+            rule_base (str): Skrót bazy reguł (rule_base_hash)
+
+        Returns:
+            float lub None: Ocena lub None, gdy profil nie ma oceny tej bazy reguł
+        """
+        row = self.connection.execute(
+            "SELECT s.quality FROM scores s JOIN profiles p ON p.id = s.profile_id "
+            "WHERE p.name = ? AND s.rule_base = ?",
+            (name, rule_base),
+        ).fetchone()
+        return row[0] if row else None
+
+    def score_all(self, system, batch_size=SCORE_BATCH_SIZE, prune=True):
+        """
+        Ocena wszystkich profili bez aktualnej oceny przez evaluate_batch().
+        Profile ocenione już bieżącą bazą reguł są pomijane.
+
+        Args:
+            system (CoffeeQualitySystem): System rozmyty
+            batch_size (int): Liczba profili w jednym wywołaniu wsadowym
+            prune (bool): Usunięcie ocen wyliczonych innymi bazami reguł
+
+        Returns:
+            int: Liczba nowo ocenionych profili
+        """
+        rule_base = system.rule_base_hash()
+        if prune:
+            self.prune_scores(rule_base)
+
+        # Lista do oceny materializowana przed zapisem - nie zapisujemy do
+        # tabeli, po której iteruje otwarty kursor
+        ids, params = self.unscored(rule_base)
+        for start in range(0, len(ids), batch_size):
+            self.store_scores(rule_base, ids[start:start + batch_size],
+                              system.evaluate_batch(params[start:start + batch_size]))
+        return len(ids)
+
+    def top(self, system, limit=20, **ranges):
+        """
+        Najlepiej ocenione profile spełniające warunki zakresów.
+        Brakujące oceny są najpierw uzupełniane wsadowo.
+
+        Przykład - 20 najlepszych profili z temperaturą poniżej 75 °C:
+            store.top(system, 20, temperature=(None, 75))
+
+        Args:
+            system (CoffeeQualitySystem): System rozmyty
+            limit (int): Maksymalna liczba wyników
+            **ranges: parametr -> (min, max); przedział min <= x < max,
+                None oznacza brak ograniczenia z danej strony
+
+        Returns:
+            list: Słowniki profili z dodatkowym kluczem quality, malejąco
+        """
+        self.score_all(system, prune=False)
+
+        conditions, args = ["s.rule_base = ?"], [system.rule_base_hash()]
+        for key, (low, high) in ranges.items():
+            if key not in INPUT_NAMES:
+                raise ValueError(f"Nieznany parametr: {key}")
+            if low is not None:
+                conditions.append(f"p.{key} >= ?")
+                args.append(low)
+            if high is not None:
+                conditions.append(f"p.{key} < ?")
+                args.append(high)
+
+        columns = ', '.join(f"p.{column}" for column in PROFILE_COLUMNS)
+        rows = self.connection.execute(
+            f"SELECT {columns}, s.quality FROM profiles p "
+            f"JOIN scores s ON s.profile_id = p.id "
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY s.quality DESC LIMIT ?",
+            args + [limit],
+        )
+        return [dict(zip(PROFILE_COLUMNS + ('quality',), row)) for row in rows]
+
+
+def _parse_range(text):
+    """Parsowanie argumentu 'parametr=min:max' (strona może być pusta)"""
+    key, _, bounds = text.partition('=')
+    low, _, high = bounds.partition(':')
+    return key, (float(low) if low else None, float(high) if high else None)
+
+
+def main():
+    """Narzędzie wiersza poleceń: import, ocena wsadowa i zapytania"""
+    parser = argparse.ArgumentParser(description="Biblioteka profili BrewSense")
+    parser.add_argument('database', help="Plik bazy SQLite")
+    parser.add_argument('--import-csv', metavar='CSV', help="Import profili z pliku CSV")
+    parser.add_argument('--top', type=int, default=20, help="Liczba najlepszych profili")
+    parser.add_argument('--range', action='append', default=[], metavar='PARAM=MIN:MAX',
+                        help="Filtr zakresu MIN <= x < MAX (górna granica wyłączona, "
+                             "strona może być pusta), np. temperature=:75")
+    args = parser.parse_args()
+
+    from fuzzy_system import CoffeeQualitySystem
+
+    store = ProfileStore(args.database)
+    if args.import_csv:
+        store.import_csv(args.import_csv)
+
+    system = CoffeeQualitySystem()
+    print(f"Ocenianie biblioteki ({store.count()} profili)...")
+    print(f"Nowo ocenione: {store.score_all(system)}")
+
+    for profile in store.top(system, args.top, **dict(map(_parse_range, args.range))):
+        print(f"{profile['quality']:6.2f}  {profile['name']}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Rejestr modeli - BrewSense
+Wiele skompilowanych baz reguł (np. osobno dla espresso, napojów mlecznych
+i cold brew) w jednym procesie. Identyczne tablice modeli (uniwersum,
+funkcje wyjściowe, wagi, tablice reguł) są przechowywane raz, a wiersze
+wsadu z różnymi modelami grupowane tak, by każdy model liczył wektorowo.
+"""
+
+import argparse
+import hashlib
+
+import numpy as np
+
+from batch_engine import CompiledRuleBase, input_rows
+
+
+class ModelRegistry:
+    """
+    Rejestr modeli identyfikowanych nazwą. Tablice modeli są internowane
+    po zawartości - kolejny model różniący się tylko funkcjami przynależności
+    wejść zajmuje kilkaset bajtów.
+    """
+
+    def __init__(self, metrics=None):
+        """
+        Args:
+            metrics (Metrics, optional): Liczniki wywołań i próbek
+        """
+        self.metrics = metrics
+        self.models = {}
+        # klucz zawartości -> [tablica, liczba modeli korzystających]
+        self._arrays = {}
+        self._keys = {}
+
+    def __contains__(self, model_id):
+        return model_id in self.models
+
+    def __len__(self):
+        return len(self.models)
+
+    @staticmethod
+    def _key(array):
+        digest = hashlib.sha256(np.ascontiguousarray(array).tobytes()).hexdigest()
+        return array.dtype.str, array.shape, digest
+
+    def _intern(self, array):
+        """Wspólna kopia tablicy o tej samej zawartości (tylko do odczytu)"""
+        key = self._key(array)
+        entry = self._arrays.get(key)
+        if entry is None:
+            array = np.array(array)
+            array.setflags(write=False)
+            entry = self._arrays[key] = [array, 0]
+        entry[1] += 1
+        return key, entry[0]
+
+    def register(self, model_id, compiled):
+        """
+        Dodanie (lub zastąpienie) modelu
+
+        Args:
+            model_id (str): Identyfikator modelu, np. 'espresso'
+            compiled (CompiledRuleBase): Skompilowany model
+
+        Returns:
+            CompiledRuleBase: Model zbudowany na współdzielonych tablicach
+        """
+        if model_id in self.models:
+            self.remove(model_id)
+        keys, arrays = [], {}
+        for name, array in compiled._arrays().items():
+            key, arrays[name] = self._intern(array)
+            keys.append(key)
+        model = CompiledRuleBase.from_arrays(arrays, compiled.term_names, compiled.output_names,
+                                             compiled.default_value, compiled.error_value)
+        self.models[model_id] = model
+        self._keys[model_id] = keys
+        return model
+
+    def load(self, model_id, path):
+        """
+        Rejestracja modelu z pliku: artefakt .npz (artifact.py) lub plik
+        bazy reguł .json (tuning.py)
+
+        Args:
+            model_id (str): Identyfikator modelu
+            path (str): Ścieżka pliku
+
+        Returns:
+            CompiledRuleBase: Zarejestrowany model
+        """
+        if path.endswith('.npz'):
+            import artifact
+            compiled = artifact.load(path).compiled
+        else:
+            from fuzzy_system import CoffeeQualitySystem
+            compiled = CoffeeQualitySystem.from_rule_base(path, metrics=False).compiled
+        return self.register(model_id, compiled)
+
+    def remove(self, model_id):
+        """
+        Usunięcie modelu; tablice nieużywane przez inne modele są zwalniane
+
+        Args:
+            model_id (str): Identyfikator modelu
+        """
+        del self.models[model_id]
+        for key in self._keys.pop(model_id):
+            entry = self._arrays[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._arrays[key]
+
+    def get(self, model_id):
+        """
+        Model o danym identyfikatorze
+
+        Raises:
+            KeyError: Nieznany identyfikator
+        """
+        try:
+            return self.models[model_id]
+        except KeyError:
+            raise KeyError(f"Nieznany model: {model_id} (dostępne: {', '.join(self.models)})") from None
+
+    def evaluate(self, model_id, inputs, method='centroid'):
+        """
+        Ocena wsadowa jednym modelem
+
+        Args:
+            model_id (str): Identyfikator modelu
+            inputs (array-like): Wejścia (N x 4) w kolejności INPUT_NAMES
+            method (str): Metoda defuzyfikacji
+
+        Returns:
+            np.ndarray: Jakość kawy (N,)
+        """
+        return self.get(model_id).evaluate(inputs, metrics=self.metrics, method=method)
+
+    def evaluate_mixed(self, model_ids, inputs, method='centroid'):
+        """
+        Ocena wsadu, w którym każdy wiersz wskazuje swój model. Wiersze są
+        grupowane po modelu - jedno wywołanie wektorowe na model.
+
+        Args:
+            model_ids (array-like): Identyfikator modelu dla każdego wiersza (N,)
+            inputs (array-like): Wejścia (N x 4)
+            method (str): Metoda defuzyfikacji
+
+        Returns:
+            np.ndarray: Jakość kawy (N,) w kolejności wierszy
+        """
+        inputs = input_rows(inputs)
+        model_ids = np.asarray(model_ids).reshape(-1)
+        if len(model_ids) != len(inputs):
+            raise ValueError("Liczba identyfikatorów modeli musi być równa liczbie wierszy")
+
+        names, group = np.unique(model_ids, return_inverse=True)
+        order = np.argsort(group, kind='stable')
+        bounds = np.searchsorted(group[order], np.arange(len(names) + 1))
+
+        quality = np.empty(len(inputs))
+        for index, name in enumerate(names.tolist()):
+            rows = order[bounds[index]:bounds[index + 1]]
+            quality[rows] = self.evaluate(name, inputs[rows], method)
+        return quality
+
+    def memory(self):
+        """
+        Zużycie pamięci tablic modeli
+
+        Returns:
+            dict: shared_bytes - tablice przechowywane w rejestrze,
+                unshared_bytes - suma, gdyby każdy model miał własne kopie,
+                per_model - bajty tablic używanych wyłącznie przez dany model
+        """
+        per_model = {model_id: sum(self._arrays[key][0].nbytes for key in keys
+                                   if self._arrays[key][1] == 1)
+                     for model_id, keys in self._keys.items()}
+        return {
+            'shared_bytes': sum(array.nbytes for array, _ in self._arrays.values()),
+            'unshared_bytes': sum(self._arrays[key][0].nbytes
+                                  for keys in self._keys.values() for key in keys),
+            'per_model': per_model,
+        }
+
+
+def main():
+    """Narzędzie wiersza poleceń: rejestracja modeli z plików i zużycie pamięci"""
+    parser = argparse.ArgumentParser(description="Rejestr modeli BrewSense")
+    parser.add_argument('models', nargs='+', metavar='ID=PLIK',
+                        help="Model z pliku .npz (artifact.py) lub .json (tuning.py)")
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    for spec in args.models:
+        model_id, _, path = spec.partition('=')
+        registry.load(model_id, path)
+
+    usage = registry.memory()
+    for model_id, size in usage['per_model'].items():
+        print(f"{model_id:<16}{size:10d} B własnych tablic")
+    print(f"{'razem':<16}{usage['shared_bytes']:10d} B (bez współdzielenia {usage['unshared_bytes']} B)")
+
+
+if __name__ == "__main__":
+    main()
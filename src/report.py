@@ -0,0 +1,226 @@
+"""
+Raporty graficzne - BrewSense
+Bezgłowe renderowanie pięciopanelowego wykresu funkcji przynależności
+(jak w GUI) dla wielu rekordów: backend Agg bez Qt, figura i krzywe
+rysowane raz, dla każdego rekordu zmieniają się tylko markery i opis
+"""
+
+import argparse
+import csv
+import os
+import re
+from multiprocessing import Pool
+
+import matplotlib.image
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from batch_engine import INPUT_NAMES, QUALITY_LABELS, input_matrix, label_index, trapezoid
+
+
+# Panele w kolejności GUI: zmienne wejściowe i jakość
+PANEL_TITLES = ('Gorzkość', 'Kwasowość', 'Aromat', 'Temperatura', 'Jakość')
+
+# Krok siatki zmiennych wejściowych (jak uniwersa CoffeeQualitySystem)
+INPUT_STEP = 0.1
+
+FIGSIZE = (6, 8)
+DPI = 100
+
+# Znaki niedozwolone w nazwie pliku raportu (zamieniane na '_')
+UNSAFE_CHARACTERS = re.compile(r'[^\w.-]+')
+
+# Renderer procesu roboczego (ustawiany przez _init_worker)
+_worker_renderer = None
+
+
+class ReportRenderer:
+    """
+    Figura raportu budowana raz na proces. Dla PNG tło z krzywymi jest
+    zapamiętywane po pierwszym rysowaniu, a każdy rekord przywraca tło
+    i rysuje tylko markery oraz opis; inne formaty (PDF, SVG) zapisują
+    całą figurę przez savefig(), ale bez jej ponownego budowania.
+    """
+
+    def __init__(self, compiled, figsize=FIGSIZE, dpi=DPI):
+        """
+        Args:
+            compiled (CompiledRuleBase): Model - źródło funkcji przynależności
+            figsize (tuple): Rozmiar figury w calach
+            dpi (int): Rozdzielczość obrazów rastrowych
+        """
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.figure.patch.set_facecolor('#FFFFFF')
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.axes = self.figure.subplots(len(PANEL_TITLES), 1)
+        self.ranges = np.vstack([compiled.input_ranges, compiled.output_universe[[0, -1]]])
+
+        for var, ax in enumerate(self.axes[:-1]):
+            low, high = compiled.input_ranges[var]
+            universe = np.linspace(low, high, int(round((high - low) / INPUT_STEP)) + 1)
+            terms = np.flatnonzero(compiled.term_var == var)
+            for term, mf in zip(terms, trapezoid(universe[:, None], compiled.term_params[terms]).T):
+                ax.plot(universe, mf, label=compiled.term_names[term].split('[')[1].rstrip(']'))
+        for term, name in enumerate(compiled.output_names):
+            self.axes[-1].plot(compiled.output_universe, compiled.output_mf[term], label=name)
+
+        self.markers = []
+        for ax, title in zip(self.axes, PANEL_TITLES):
+            self.markers.append(ax.axvline(ax.get_xlim()[0], color='k', linestyle='--'))
+            ax.set_title(title, fontsize=8)
+            ax.tick_params(labelsize=6)
+        self.text = self.figure.suptitle('', fontsize=10)
+        self.figure.tight_layout(rect=(0, 0, 1, 0.96))
+
+        self._animated = self.markers + [self.text]
+        self._background = None
+
+    def _update(self, record):
+        """Położenie markerów i opis rekordu"""
+        values = np.clip(np.append(record['inputs'], record['quality']), self.ranges[:, 0], self.ranges[:, 1])
+        for marker, value in zip(self.markers, values.tolist()):
+            marker.set_xdata([value, value])
+        label = QUALITY_LABELS[label_index(record['quality'])]
+        self.text.set_text(f"{record['name']}: {record['quality']:.1f}/100 - {label}")
+
+    def render(self, record, path):
+        """
+        Zapis raportu jednego rekordu
+
+        Args:
+            record (dict): name, inputs (4,) w kolejności INPUT_NAMES, quality
+            path (str): Plik wyjściowy (.png - ścieżka z buforowanym tłem;
+                pozostałe rozszerzenia - savefig)
+        """
+        self._update(record)
+        blit = path.endswith('.png')
+        for artist in self._animated:
+            artist.set_animated(blit)
+        if not blit:
+            self.figure.savefig(path)
+            return
+
+        if self._background is None:
+            self.canvas.draw()
+            self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        else:
+            self.canvas.restore_region(self._background)
+        for artist in self._animated:
+            self.figure.draw_artist(artist)
+        matplotlib.image.imsave(path, np.asarray(self.canvas.buffer_rgba()), dpi=self.figure.dpi)
+
+
+def read_records(path):
+    """
+    Rekordy z pliku CSV z kolumnami name (opcjonalna) i INPUT_NAMES
+
+    Args:
+        path (str): Ścieżka pliku CSV
+
+    Returns:
+        tuple: (nazwy, wejścia N x 4)
+    """
+    with open(path, newline='', encoding='utf-8') as handle:
+        rows = list(csv.DictReader(handle))
+    names = [row.get('name') or f"shot_{index:06d}" for index, row in enumerate(rows)]
+    inputs = np.array([[float(row[name]) for name in INPUT_NAMES] for row in rows]).reshape(-1, len(INPUT_NAMES))
+    return names, inputs
+
+
+def file_stems(names):
+    """
+    Bezpieczne i unikalne nazwy plików raportów. Z nazwy zostaje ostatni
+    człon ścieżki, znaki spoza liter, cyfr, '_', '.', '-' zamieniane są
+    na '_', a wiodące kropki usuwane - plik zawsze trafia do katalogu
+    wyjściowego. Nazwa pusta lub powtórzona dostaje numer wiersza.
+
+    Args:
+        names (sequence): Nazwy rekordów
+
+    Returns:
+        list: Nazwy plików bez rozszerzenia, w kolejności rekordów
+    """
+    stems, used = [], set()
+    for index, name in enumerate(names):
+        stem = UNSAFE_CHARACTERS.sub('_', os.path.basename(str(name))).lstrip('.') or f"shot_{index:06d}"
+        while stem in used:
+            stem = f"{stem}_{index:06d}"
+        used.add(stem)
+        stems.append(stem)
+    return stems
+
+
+def _init_worker(compiled, figsize, dpi):
+    """Inicjalizator puli - jedna figura na proces roboczy"""
+    global _worker_renderer
+    _worker_renderer = ReportRenderer(compiled, figsize, dpi)
+
+
+def _render_job(job):
+    record, path = job
+    _worker_renderer.render(record, path)
+    return path
+
+
+def render_reports(compiled, names, inputs, output_dir, fmt='png', workers=None,
+                   figsize=FIGSIZE, dpi=DPI):
+    """
+    Raporty dla wielu rekordów: jedna ocena wsadowa, potem renderowanie
+    równolegle w procesach roboczych (każdy z własną, wielokrotnie używaną figurą)
+
+    Args:
+        compiled (CompiledRuleBase): Model
+        names (sequence): Nazwy rekordów - tytuły raportów i, po oczyszczeniu
+            (file_stems), nazwy plików
+        inputs (array-like): Wejścia (N x 4) lub tablica strukturalna z polami INPUT_NAMES
+        output_dir (str): Katalog wyjściowy
+        fmt (str): Format pliku ('png', 'pdf', 'svg', ...)
+        workers (int, optional): Liczba procesów (1 - bez puli; domyślnie
+            liczba rdzeni)
+        figsize (tuple): Rozmiar figury w calach
+        dpi (int): Rozdzielczość obrazów rastrowych
+
+    Returns:
+        list: Ścieżki zapisanych plików
+    """
+    names = list(names)
+    inputs = input_matrix(inputs)
+    quality = compiled.evaluate(inputs)
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [({'name': name, 'inputs': row, 'quality': float(score)},
+             os.path.join(output_dir, f"{stem}.{fmt}"))
+            for name, stem, row, score in zip(names, file_stems(names), inputs, quality)]
+
+    if workers == 1:
+        _init_worker(compiled, figsize, dpi)
+        return [_render_job(job) for job in jobs]
+    with Pool(workers, initializer=_init_worker, initargs=(compiled, figsize, dpi)) as pool:
+        return pool.map(_render_job, jobs, chunksize=max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1))))
+
+
+def main():
+    """Narzędzie wiersza poleceń: raporty graficzne dla rekordów z pliku CSV"""
+    parser = argparse.ArgumentParser(description="Raporty graficzne BrewSense")
+    parser.add_argument('csv', help="Rekordy: name (opcjonalna), bitterness, acidity, aroma, temperature")
+    parser.add_argument('output_dir', help="Katalog raportów")
+    parser.add_argument('--format', default='png', help="Format plików (png, pdf, svg)")
+    parser.add_argument('--workers', type=int, help="Liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument('--model', metavar='NPZ', help="Artefakt modelu (artifact.py) zamiast modelu wbudowanego")
+    parser.add_argument('--dpi', type=int, default=DPI, help="Rozdzielczość PNG")
+    args = parser.parse_args()
+
+    if args.model:
+        import artifact
+        compiled = artifact.load(args.model).compiled
+    else:
+        from fuzzy_system import CoffeeQualitySystem
+        compiled = CoffeeQualitySystem(metrics=False).compiled
+
+    names, inputs = read_records(args.csv)
+    paths = render_reports(compiled, names, inputs, args.output_dir, args.format, args.workers, dpi=args.dpi)
+    print(f"Zapisano {len(paths)} raportów w {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
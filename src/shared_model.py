@@ -0,0 +1,261 @@
+"""
+Współdzielona baza reguł - BrewSense
+Umieszczenie niezmiennych tablic skompilowanego modelu w pliku mapowanym
+do pamięci lub w pamięci współdzielonej, tak aby wiele procesów roboczych
+korzystało z jednej kopii (bez importu scikit-fuzzy w procesach roboczych)
+"""
+
+import json
+import mmap
+import struct
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from batch_engine import CompiledRuleBase
+
+
+MAGIC = b'BRWSHRD1'
+LAYOUT_VERSION = 1
+
+# Wyrównanie początku każdej tablicy (linia pamięci podręcznej)
+ALIGNMENT = 64
+
+# Model procesu roboczego (ustawiany przez pool_initializer)
+_worker_model = None
+
+# Podmiana resource_tracker.register przy dołączaniu (Python < 3.13) - jedna naraz
+_attach_lock = threading.Lock()
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def pack(compiled):
+    """
+    Serializacja modelu do jednego bufora: nagłówek JSON + wyrównane tablice
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany model
+
+    Returns:
+        bytes: Zawartość bufora
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in compiled._arrays().items()}
+    header = {
+        'layout': LAYOUT_VERSION,
+        'fingerprint': compiled.fingerprint(),
+        'term_names': list(compiled.term_names),
+        'output_names': list(compiled.output_names),
+        'default_value': compiled.default_value,
+        'error_value': compiled.error_value,
+        'arrays': {},
+    }
+
+    # Offsety zależą od długości nagłówka, a nagłówek od offsetów - rezerwujemy
+    # miejsce na nagłówek z zapasem i liczymy offsety względem jego końca
+    reserve = _align(len(json.dumps(header)) + 96 * len(arrays) + 1024)
+    offset = reserve
+    for name, array in arrays.items():
+        offset = _align(offset)
+        header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+
+    encoded = json.dumps(header).encode('utf-8')
+    prefix = MAGIC + struct.pack('<Q', len(encoded))
+    if len(prefix) + len(encoded) > reserve:
+        raise ValueError("Nagłówek modelu przekracza zarezerwowane miejsce")
+
+    buffer = bytearray(offset)
+    buffer[:len(prefix) + len(encoded)] = prefix + encoded
+    for name, array in arrays.items():
+        start = header['arrays'][name]['offset']
+        buffer[start:start + array.nbytes] = array.tobytes()
+    return bytes(buffer)
+
+
+def unpack(buffer):
+    """
+    Odtworzenie modelu jako widoków tylko do odczytu na buforze (bez kopii)
+
+    Args:
+        buffer: Obiekt bufora (mmap, memoryview pamięci współdzielonej)
+
+    Returns:
+        CompiledRuleBase: Model korzystający bezpośrednio z bufora
+
+    Raises:
+        ValueError: Nieprawidłowy format, nieobsługiwana wersja układu lub
+            skrót niezgodny z zawartością bufora
+    """
+    view = memoryview(buffer)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Nieprawidłowy format współdzielonego modelu")
+    (length,) = struct.unpack('<Q', view[len(MAGIC):len(MAGIC) + 8])
+    start = len(MAGIC) + 8
+    header = json.loads(bytes(view[start:start + length]).decode('utf-8'))
+    if header['layout'] != LAYOUT_VERSION:
+        raise ValueError(f"Nieobsługiwana wersja układu: {header['layout']}")
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape']))
+        array = np.frombuffer(view, dtype=dtype, count=count, offset=spec['offset'])
+        array = array.reshape(spec['shape'])
+        array.setflags(write=False)
+        arrays[name] = array
+
+    model = CompiledRuleBase.from_arrays(arrays, header['term_names'], header['output_names'],
+                                         header['default_value'], header['error_value'])
+    if model.fingerprint() != header['fingerprint']:
+        raise ValueError("Skrót współdzielonego modelu nie zgadza się z zawartością bufora")
+    return model
+
+
+def export(compiled, path):
+    """
+    Zapis modelu do pliku przeznaczonego do mapowania w pamięci
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany model
+        path (str): Ścieżka pliku
+    """
+    with open(path, 'wb') as handle:
+        handle.write(pack(compiled))
+
+
+def attach_file(path):
+    """
+    Dołączenie do modelu w pliku - strony pliku są współdzielone przez
+    wszystkie procesy poprzez pamięć podręczną systemu
+
+    Args:
+        path (str): Ścieżka pliku z export()
+
+    Returns:
+        CompiledRuleBase: Model oparty na mapowaniu pliku (tylko odczyt)
+    """
+    with open(path, 'rb') as handle:
+        mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    model = unpack(mapping)
+    # Mapowanie musi żyć tak długo jak model
+    model._shared_buffer = mapping
+    return model
+
+
+def publish(compiled, name=None):
+    """
+    Umieszczenie modelu w bloku pamięci współdzielonej
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany model
+        name (str, optional): Nazwa bloku (domyślnie nadawana przez system)
+
+    Returns:
+        SharedMemory: Blok pamięci - jedyny zarejestrowany w resource_tracker;
+            właściciel zwalnia go przez close_shared()
+    """
+    data = pack(compiled)
+    block = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+    block.buf[:len(data)] = data
+    return block
+
+
+def close_shared(block):
+    """
+    Zwolnienie bloku z publish() przez właściciela - po zakończeniu procesów
+    roboczych (dołączone modele przestają być ważne)
+
+    Args:
+        block (SharedMemory): Blok zwrócony przez publish()
+    """
+    block.close()
+    block.unlink()
+
+
+def _open_untracked(name):
+    """
+    Otwarcie istniejącego bloku bez rejestracji w resource_tracker - blok
+    rejestruje i wyrejestrowuje wyłącznie proces, który go utworzył
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Python < 3.13: SharedMemory rejestruje każdy otwarty blok, a procesy
+    # uruchomione metodą spawn dzielą resource_tracker z rodzicem - rejestracja
+    # (i późniejsze wyrejestrowanie) z procesu dołączającego usunęłaby wpis
+    # właściciela. Rejestrację pomijamy na czas otwarcia bloku.
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def attach_shared(name):
+    """
+    Dołączenie do modelu w bloku pamięci współdzielonej
+
+    Args:
+        name (str): Nazwa bloku z publish()
+
+    Returns:
+        CompiledRuleBase: Model oparty na pamięci współdzielonej (tylko odczyt)
+    """
+    block = _open_untracked(name)
+    model = unpack(block.buf)
+    model._shared_buffer = block
+    return model
+
+
+def attach(source):
+    """
+    Dołączenie do modelu z pliku ('file:<ścieżka>') lub pamięci ('shm:<nazwa>')
+
+    Args:
+        source (str): Opis źródła
+
+    Returns:
+        CompiledRuleBase: Współdzielony model
+    """
+    kind, _, location = source.partition(':')
+    if kind == 'file':
+        return attach_file(location)
+    if kind == 'shm':
+        return attach_shared(location)
+    raise ValueError(f"Nieznane źródło modelu: {source}")
+
+
+def pool_initializer(source):
+    """
+    Inicjalizator procesów multiprocessing.Pool - dołącza współdzielony model
+
+    Przykład:
+        Pool(64, initializer=pool_initializer, initargs=('file:model.bin',))
+
+    Args:
+        source (str): Źródło modelu w formacie attach()
+    """
+    global _worker_model
+    _worker_model = attach(source)
+
+
+def evaluate_in_worker(inputs):
+    """
+    Ocena wsadowa w procesie roboczym modelem z pool_initializer()
+
+    Args:
+        inputs (array-like): Wejścia (N x 4)
+
+    Returns:
+        np.ndarray: Jakość kawy (N,)
+    """
+    if _worker_model is None:
+        raise RuntimeError("Proces roboczy nie został zainicjalizowany przez pool_initializer()")
+    return _worker_model.evaluate(inputs)
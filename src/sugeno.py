@@ -0,0 +1,212 @@
+"""
+Wnioskowanie Sugeno (TSK) - BrewSense
+Model Takagi-Sugeno zerowego rzędu na przesłankach i regułach systemu
+Mamdaniego: każdy term jakości zastąpiony stałą, wynik to średnia stałych
+ważona siłą odpalenia reguł (bez uniwersum wyjściowego i defuzyfikacji)
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from batch_engine import (CHUNK_SIZE, STATUS_ERROR, STATUS_NO_ACTIVATION, input_chunk, input_rows,
+                          residuals, sample_inputs)
+
+
+# Domyślna liczba próbek kalibracji i walidacji
+CALIBRATION_SAMPLES = 20000
+
+
+class SugenoRuleBase:
+    """
+    Model TSK korzystający z tablic CompiledRuleBase (termy wejściowe,
+    przesłanki reguł). Stałe termów wyjściowych są rozkładane na reguły
+    raz, więc ocena porcji to jeden iloczyn macierz-wektor.
+    """
+
+    def __init__(self, compiled, constants=None):
+        """
+        Args:
+            compiled (CompiledRuleBase): Skompilowany system Mamdaniego
+            constants (array-like, optional): Stała dla każdego termu jakości (T,);
+                domyślnie środki plateau termów (b + c) / 2
+        """
+        self.compiled = compiled
+        if constants is None:
+            constants = (compiled.output_params[:, 1] + compiled.output_params[:, 2]) / 2
+        self.constants = np.asarray(constants, dtype=np.float64).copy()
+        if self.constants.shape != (len(compiled.output_names),):
+            raise ValueError(f"Oczekiwano {len(compiled.output_names)} stałych, "
+                             f"otrzymano {self.constants.shape}")
+        self.rule_constants = self.constants[compiled.rule_consequents]
+        self.constants.setflags(write=False)
+        self.rule_constants.setflags(write=False)
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: nazwa termu jakości -> stała
+        """
+        return dict(zip(self.compiled.output_names, self.constants.tolist()))
+
+    def firing(self, inputs):
+        """
+        Siły odpalenia reguł dla porcji wejść
+
+        Args:
+            inputs (np.ndarray): Wejścia (N x 4)
+
+        Returns:
+            np.ndarray: Siły odpalenia (N x R)
+        """
+        compiled = self.compiled
+        return compiled.fire(compiled.fuzzify(compiled.clamp(inputs)))
+
+    def evaluate(self, inputs, chunk_size=CHUNK_SIZE, metrics=None):
+        """
+        Ocena wsadowa: suma(w_r * c_r) / suma(w_r)
+
+        Args:
+            inputs (array-like): Wejścia (N x 4) w kolejności INPUT_NAMES
+                lub tablica strukturalna z polami INPUT_NAMES
+            chunk_size (int): Liczba próbek przetwarzanych naraz
+            metrics (Metrics, optional): Liczniki wywołań, próbek, przycięć i wartości zastępczych
+
+        Returns:
+            np.ndarray: Jakość kawy (N,); default_value gdy żadna reguła nie
+                zadziałała, error_value dla wierszy z NaN
+        """
+        return self.evaluate_with_status(inputs, chunk_size, metrics)[0]
+
+    def evaluate_with_status(self, inputs, chunk_size=CHUNK_SIZE, metrics=None):
+        """
+        Ocena wsadowa ze statusem każdego wiersza - te same kody STATUS_*
+        i wartości zastępcze co CompiledRuleBase.evaluate_with_status()
+
+        Args:
+            inputs (array-like): Wejścia (N x 4) w kolejności INPUT_NAMES
+                lub tablica strukturalna z polami INPUT_NAMES
+            chunk_size (int): Liczba próbek przetwarzanych naraz
+            metrics (Metrics, optional): Liczniki wywołań, próbek, przycięć i wartości zastępczych
+
+        Returns:
+            tuple: (jakość (N,), status (N,) uint8 - kody STATUS_*)
+        """
+        inputs = input_rows(inputs)
+        compiled = self.compiled
+
+        quality = np.empty(len(inputs))
+        status = np.empty(len(inputs), dtype=np.uint8)
+        clamped_count = 0
+        for start in range(0, len(inputs), chunk_size):
+            invalid, valid = compiled._valid_inputs(input_chunk(inputs[start:start + chunk_size]))
+            clamped = compiled.clamp(valid)
+            firing = compiled.fire(compiled.fuzzify(clamped))
+            total = firing.sum(axis=1)
+            fired = total > 0
+            rows = np.where(fired, firing @ self.rule_constants / np.where(fired, total, 1.0),
+                            compiled.default_value)
+            clamped_rows = (clamped != valid).any(axis=1)
+            clamped_count += int(np.count_nonzero(clamped_rows))
+            status[start:start + chunk_size] = compiled._row_status(clamped_rows, firing, rows, invalid)
+            quality[start:start + chunk_size] = rows
+
+        if metrics is not None:
+            metrics.count('calls')
+            metrics.count('samples', len(inputs))
+            metrics.count('clamped', clamped_count)
+            metrics.count('fallback_no_activation', int(np.count_nonzero(status == STATUS_NO_ACTIVATION)))
+            metrics.count('fallback_error', int(np.count_nonzero(status == STATUS_ERROR)))
+        return quality, status
+
+
+def calibrate(compiled, samples=CALIBRATION_SAMPLES, seed=0, method='centroid'):
+    """
+    Dopasowanie stałych termów metodą najmniejszych kwadratów tak, aby
+    wynik TSK odwzorowywał wynik Mamdaniego w przestrzeni wejść.
+    Wynik TSK jest liniowy względem stałych: y = (W_r / suma W) @ C[term_r].
+
+    Najmniejsze kwadraty minimalizują błąd wyniku, nie niezgodność kategorii -
+    przy małych próbkach dopasowanie potrafi obniżyć zgodność kategorii.
+    Stałe dopasowane są przyjmowane tylko wtedy, gdy na próbce dopasowania
+    zgodność kategorii nie spada poniżej stałych początkowych; w przeciwnym
+    razie model zachowuje środki plateau termów (report['fitted'] = False).
+
+    Args:
+        compiled (CompiledRuleBase): Skompilowany system Mamdaniego
+        samples (int): Liczba próbek dopasowania (tyle samo do walidacji)
+        seed (int): Ziarno generatora próbek
+        method (str): Metoda defuzyfikacji wzorca Mamdaniego
+
+    Returns:
+        tuple: (SugenoRuleBase, raport z błędami 'initial', 'fit' i 'validation'
+            oraz flagą 'fitted')
+    """
+    fit_inputs = sample_inputs(compiled.input_ranges, samples, seed)
+    test_inputs = sample_inputs(compiled.input_ranges, samples, seed + 1)
+    fit_target = compiled.evaluate(fit_inputs, method=method)
+    test_target = compiled.evaluate(test_inputs, method=method)
+
+    initial = SugenoRuleBase(compiled)
+    firing = initial.firing(fit_inputs)
+    total = firing.sum(axis=1)
+    fired = total > 0
+
+    # Znormalizowany udział każdego termu jakości w wyniku (N x T)
+    terms = np.zeros((compiled.n_rules, len(compiled.output_names)))
+    terms[np.arange(compiled.n_rules), compiled.rule_consequents] = 1.0
+    design = (firing[fired] / total[fired, None]) @ terms
+
+    constants = initial.constants.copy()
+    used = design.any(axis=0)
+    solution, *_ = np.linalg.lstsq(design[:, used], fit_target[fired], rcond=None)
+    constants[used] = solution
+
+    model = SugenoRuleBase(compiled, constants)
+    fit_errors = residuals(model, fit_inputs, fit_target)
+    initial_fit_errors = residuals(initial, fit_inputs, fit_target)
+    fitted = fit_errors['label_agreement'] >= initial_fit_errors['label_agreement']
+    if not fitted:
+        model, fit_errors = initial, initial_fit_errors
+    report = {
+        'samples': samples,
+        'method': method,
+        'fitted': fitted,
+        'initial': residuals(initial, test_inputs, test_target),
+        'fit': fit_errors,
+        'validation': residuals(model, test_inputs, test_target),
+        'constants': model.as_dict(),
+    }
+    return model, report
+
+
+def main():
+    """Narzędzie wiersza poleceń: kalibracja stałych TSK i raport błędu"""
+    parser = argparse.ArgumentParser(description="Kalibracja modelu Sugeno BrewSense")
+    parser.add_argument('--samples', type=int, default=CALIBRATION_SAMPLES, help="Liczba próbek")
+    parser.add_argument('--seed', type=int, default=0, help="Ziarno generatora")
+    parser.add_argument('--output', metavar='JSON', help="Zapis stałych i raportu do pliku")
+    args = parser.parse_args()
+
+    from fuzzy_system import CoffeeQualitySystem
+
+    system = CoffeeQualitySystem(metrics=False)
+    _, report = calibrate(system.compiled, args.samples, args.seed)
+
+    if not report['fitted']:
+        print("Dopasowanie obniżyło zgodność kategorii - zachowano stałe początkowe")
+    for name, value in report['constants'].items():
+        print(f"{name:<12}{value:8.2f}")
+    for stage in ('initial', 'fit', 'validation'):
+        errors = report[stage]
+        print(f"{stage:<12}RMSE {errors['rmse']:6.2f}  MAE {errors['mae']:6.2f}  "
+              f"max {errors['max_error']:6.2f}  zgodność kategorii {errors['label_agreement']:.1%}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+"""
+Strojenie funkcji przynależności - BrewSense
+Dopasowanie punktów charakterystycznych trapezów i trójkątów do ocen
+z degustacji (CSV) ewolucją różnicową; kandydaci populacji oceniani są
+wsadowo na całym zbiorze, równolegle w puli procesów
+"""
+
+import argparse
+import csv
+import copy
+import hashlib
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+from batch_engine import INPUT_NAMES, CompiledRuleBase, as_trapezoid, residuals
+
+
+# Kolumna z oceną degustacyjną (0-100) w pliku CSV
+SCORE_COLUMN = 'score'
+
+# Domyślne parametry ewolucji różnicowej (DE/current-to-best/1/bin)
+POPULATION = 32
+GENERATIONS = 60
+MUTATION = 0.6
+CROSSOVER = 0.9
+
+# Rozrzut populacji początkowej wokół parametrów wyjściowych (część zakresu)
+INITIAL_SPREAD = 0.1
+
+# Część danych odkładana do walidacji
+VALIDATION_FRACTION = 0.2
+
+# Dane procesu roboczego (ustawiane przez _init_worker)
+_worker_state = None
+
+
+def read_tasting_csv(path):
+    """
+    Wczytanie ocen z degustacji z pliku CSV z kolumnami bitterness,
+    acidity, aroma, temperature i score
+
+    Args:
+        path (str): Ścieżka pliku CSV
+
+    Returns:
+        tuple: (wejścia N x 4 w kolejności INPUT_NAMES, oceny (N,))
+    """
+    with open(path, newline='', encoding='utf-8') as handle:
+        reader = csv.DictReader(handle)
+        missing = set(INPUT_NAMES + (SCORE_COLUMN,)) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"Brak kolumn w pliku {path}: {', '.join(sorted(missing))}")
+        rows = [[float(row[name]) for name in INPUT_NAMES + (SCORE_COLUMN,)] for row in reader]
+    if not rows:
+        raise ValueError(f"Plik {path} nie zawiera ocen")
+    data = np.array(rows)
+    return data[:, :len(INPUT_NAMES)], data[:, len(INPUT_NAMES)]
+
+
+class ParameterSpace:
+    """
+    Wektor strojonych punktów funkcji przynależności. Punkty leżące na
+    krawędzi zakresu (ramiona trapezów) pozostają stałe; naprawa kandydata
+    przycina punkty do zakresu i porządkuje je w obrębie każdej funkcji.
+    """
+
+    def __init__(self, membership_functions, ranges, variables=INPUT_NAMES):
+        """
+        Args:
+            membership_functions (dict): Parametry w formacie MEMBERSHIP_FUNCTIONS
+            ranges (dict): zmienna -> (min, max)
+            variables (sequence): Strojone zmienne
+        """
+        self.base = copy.deepcopy(membership_functions)
+        self.positions = []
+        for var_name in variables:
+            low, high = ranges[var_name]
+            for term_name, (kind, points) in self.base[var_name].items():
+                for index, point in enumerate(points):
+                    if low < point < high:
+                        self.positions.append((var_name, term_name, index))
+        self.bounds = np.array([ranges[var_name] for var_name, _, _ in self.positions], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def layout(self):
+        """Opis wektora (zmienna, term, indeks punktu) jako JSON - zapisywany w checkpoincie"""
+        return json.dumps([list(position) for position in self.positions])
+
+    def initial(self):
+        """Wektor parametrów wyjściowych"""
+        return np.array([self.base[var][term][1][index] for var, term, index in self.positions],
+                        dtype=np.float64)
+
+    def repair(self, vectors):
+        """
+        Przycięcie do zakresów i uporządkowanie punktów każdej funkcji
+
+        Args:
+            vectors (np.ndarray): Kandydaci (P x D)
+
+        Returns:
+            np.ndarray: Kandydaci spełniający ograniczenia (P x D)
+        """
+        vectors = np.clip(vectors, self.bounds[:, 0], self.bounds[:, 1])
+        start = 0
+        while start < len(self.positions):
+            var, term, _ = self.positions[start]
+            stop = start
+            while stop < len(self.positions) and self.positions[stop][:2] == (var, term):
+                stop += 1
+            vectors[:, start:stop] = np.sort(vectors[:, start:stop], axis=1)
+            start = stop
+        return vectors
+
+    def decode(self, vector):
+        """
+        Parametry funkcji przynależności dla wektora
+
+        Args:
+            vector (np.ndarray): Wektor (D,)
+
+        Returns:
+            dict: Parametry w formacie MEMBERSHIP_FUNCTIONS
+        """
+        functions = copy.deepcopy(self.base)
+        for (var, term, index), value in zip(self.positions, vector.tolist()):
+            kind, points = functions[var][term]
+            points = list(points)
+            points[index] = round(value, 4)
+            functions[var][term] = (kind, points)
+        return functions
+
+
+def build_model(compiled, membership_functions):
+    """
+    Model o strukturze reguł `compiled` i nowych funkcjach przynależności
+
+    Args:
+        compiled (CompiledRuleBase): Model bazowy (kolejność termów jak w
+            membership_functions)
+        membership_functions (dict): Parametry w formacie MEMBERSHIP_FUNCTIONS
+
+    Returns:
+        CompiledRuleBase: Nowy model
+    """
+    term_params = [as_trapezoid(kind, points)
+                   for var_name in INPUT_NAMES
+                   for kind, points in membership_functions[var_name].values()]
+    return CompiledRuleBase(
+        input_ranges=compiled.input_ranges,
+        term_params=term_params,
+        term_var=compiled.term_var,
+        term_names=compiled.term_names,
+        rule_antecedents=compiled.rule_antecedents,
+        rule_consequents=compiled.rule_consequents,
+        output_universe=compiled.output_universe,
+        output_params=[as_trapezoid(kind, points)
+                       for kind, points in membership_functions['quality'].values()],
+        output_names=compiled.output_names,
+        default_value=compiled.default_value,
+        error_value=compiled.error_value,
+    )
+
+
+def _init_worker(compiled, space, inputs, target):
+    """Inicjalizator puli - model bazowy i zbiór uczący przekazywane raz na proces"""
+    global _worker_state
+    _worker_state = (compiled, space, inputs, target)
+
+
+def _candidate_error(vector):
+    """RMSE kandydata - jedna ocena wsadowa na całym zbiorze uczącym"""
+    compiled, space, inputs, target = _worker_state
+    predicted = build_model(compiled, space.decode(vector)).evaluate(inputs)
+    return float(np.sqrt(np.mean((predicted - target) ** 2)))
+
+
+def _data_hash(inputs, target):
+    """Skrót danych uczących - checkpoint wolno wznowić tylko na tych samych danych"""
+    digest = hashlib.sha256(np.ascontiguousarray(inputs).tobytes())
+    digest.update(np.ascontiguousarray(target).tobytes())
+    return digest.hexdigest()
+
+
+def save_checkpoint(path, state):
+    """
+    Atomowy zapis stanu strojenia (populacja, błędy, generacja, stan generatora)
+
+    Args:
+        path (str): Plik .npz
+        state (dict): Stan z tune()
+    """
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as handle:
+        np.savez(handle,
+                 population=state['population'],
+                 errors=state['errors'],
+                 generation=np.array(state['generation']),
+                 rng_state=np.array(json.dumps(state['rng'].bit_generator.state)),
+                 data_hash=np.array(state['data_hash']),
+                 layout=np.array(state['layout']))
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path, data_hash, layout, population):
+    """
+    Wczytanie stanu strojenia
+
+    Args:
+        path (str): Plik z save_checkpoint()
+        data_hash (str): Skrót bieżących danych uczących
+        layout (str): Układ wektora parametrów (ParameterSpace.layout())
+        population (int): Liczba kandydatów w populacji
+
+    Returns:
+        dict: population, errors, generation, rng
+
+    Raises:
+        ValueError: Checkpoint zapisany dla innych danych, innego układu
+            parametrów (np. innego zbioru strojonych zmiennych) lub innej
+            liczebności populacji
+    """
+    with np.load(path, allow_pickle=False) as data:
+        if str(data['data_hash']) != data_hash:
+            raise ValueError(f"Checkpoint {path} dotyczy innych danych uczących")
+        if 'layout' not in data or str(data['layout']) != layout:
+            raise ValueError(f"Checkpoint {path} dotyczy innego układu strojonych parametrów "
+                             "(zmienne lub funkcje przynależności)")
+        if len(data['population']) != population:
+            raise ValueError(f"Checkpoint {path} ma populację {len(data['population'])}, "
+                             f"oczekiwano {population}")
+        rng = np.random.default_rng()
+        rng.bit_generator.state = json.loads(str(data['rng_state']))
+        return {
+            'population': data['population'],
+            'errors': data['errors'],
+            'generation': int(data['generation']),
+            'rng': rng,
+        }
+
+
+def tune(compiled, membership_functions, ranges, inputs, target, variables=INPUT_NAMES,
+         population=POPULATION, generations=GENERATIONS, workers=None, seed=0,
+         checkpoint=None, progress=None):
+    """
+    Ewolucja różnicowa punktów funkcji przynależności minimalizująca RMSE
+    względem ocen degustacyjnych. Populacja startuje wokół parametrów
+    wyjściowych (sam wektor wyjściowy jest jej członkiem), więc wynik nigdy
+    nie jest gorszy od punktu startowego na zbiorze uczącym.
+
+    Args:
+        compiled (CompiledRuleBase): Model bazowy
+        membership_functions (dict): Parametry wyjściowe (MEMBERSHIP_FUNCTIONS)
+        ranges (dict): zmienna -> (min, max)
+        inputs (np.ndarray): Wejścia uczące (N x 4)
+        target (np.ndarray): Oceny degustacyjne (N,)
+        variables (sequence): Strojone zmienne
+        population (int): Liczba kandydatów w populacji
+        generations (int): Liczba generacji
+        workers (int, optional): Liczba procesów puli (1 - bez puli; domyślnie
+            liczba rdzeni)
+        seed (int): Ziarno generatora
+        checkpoint (str, optional): Plik .npz stanu - zapisywany po każdej
+            generacji i wznawiany, jeśli istnieje
+        progress (callable, optional): Wywoływana z (generacja, najlepszy błąd)
+
+    Returns:
+        tuple: (parametry MEMBERSHIP_FUNCTIONS najlepszego kandydata, jego RMSE)
+    """
+    space = ParameterSpace(membership_functions, ranges, variables)
+    data_hash = _data_hash(inputs, target)
+    initargs = (compiled, space, inputs, target)
+
+    if workers == 1:
+        _init_worker(*initargs)
+        pool, evaluate = None, lambda vectors: [_candidate_error(vector) for vector in vectors]
+    else:
+        # spawn, nie fork: proces, który uruchomił jądro Numba (wątki TBB),
+        # po forku zawiesza się przy zakończeniu
+        pool = multiprocessing.get_context('spawn').Pool(workers, initializer=_init_worker,
+                                                         initargs=initargs)
+        evaluate = lambda vectors: pool.map(_candidate_error, list(vectors))
+
+    try:
+        if checkpoint and os.path.exists(checkpoint):
+            state = load_checkpoint(checkpoint, data_hash, space.layout(), population)
+        else:
+            rng = np.random.default_rng(seed)
+            spread = INITIAL_SPREAD * (space.bounds[:, 1] - space.bounds[:, 0])
+            vectors = space.initial() + rng.standard_normal((population, len(space))) * spread
+            vectors[0] = space.initial()
+            vectors = space.repair(vectors)
+            state = {'population': vectors, 'errors': np.array(evaluate(vectors)),
+                     'generation': 0, 'rng': rng}
+        state['data_hash'] = data_hash
+        state['layout'] = space.layout()
+
+        rng, size = state['rng'], len(state['population'])
+        while state['generation'] < generations:
+            vectors, errors = state['population'], state['errors']
+
+            # DE/current-to-best/1/bin: krok w stronę najlepszego osobnika
+            # i różnica dwóch losowych, następnie krzyżowanie dwumianowe
+            best = vectors[np.argmin(errors)]
+            others = np.array([rng.choice(np.delete(np.arange(size), i), 2, replace=False)
+                               for i in range(size)])
+            mutant = vectors + MUTATION * (best - vectors) \
+                + MUTATION * (vectors[others[:, 0]] - vectors[others[:, 1]])
+            cross = rng.random(vectors.shape) < CROSSOVER
+            cross[np.arange(size), rng.integers(0, len(space), size)] = True
+            trial = space.repair(np.where(cross, mutant, vectors))
+
+            trial_errors = np.array(evaluate(trial))
+            better = trial_errors <= errors
+            state['population'] = np.where(better[:, None], trial, vectors)
+            state['errors'] = np.where(better, trial_errors, errors)
+            state['generation'] += 1
+
+            if checkpoint:
+                save_checkpoint(checkpoint, state)
+            if progress is not None:
+                progress(state['generation'], float(state['errors'].min()))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    best = int(np.argmin(state['errors']))
+    return space.decode(state['population'][best]), float(state['errors'][best])
+
+
+def split(inputs, target, fraction=VALIDATION_FRACTION, seed=0):
+    """
+    Losowy podział na zbiór uczący i walidacyjny
+
+    Returns:
+        tuple: (wejścia uczące, oceny uczące, wejścia walidacyjne, oceny walidacyjne)
+    """
+    order = np.random.default_rng(seed).permutation(len(inputs))
+    held_out = int(round(len(inputs) * fraction))
+    fit, test = order[held_out:], order[:held_out]
+    return inputs[fit], target[fit], inputs[test], target[test]
+
+
+def save_rule_base(path, membership_functions, accuracy):
+    """
+    Zapis pliku bazy reguł: funkcje przynależności i raport dokładności
+
+    Args:
+        path (str): Plik JSON
+        membership_functions (dict): Parametry MEMBERSHIP_FUNCTIONS
+        accuracy (dict): Raport z main()
+    """
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump({'membership_functions': membership_functions, 'accuracy': accuracy}, handle, indent=2)
+
+
+def load_rule_base(path):
+    """
+    Funkcje przynależności z pliku save_rule_base() - gotowe dla
+    CoffeeQualitySystem(membership_functions=...)
+
+    Args:
+        path (str): Plik JSON
+
+    Returns:
+        dict: Parametry w formacie MEMBERSHIP_FUNCTIONS
+    """
+    with open(path, encoding='utf-8') as handle:
+        functions = json.load(handle)['membership_functions']
+    return {var: {term: (kind, points) for term, (kind, points) in terms.items()}
+            for var, terms in functions.items()}
+
+
+def main():
+    """Narzędzie wiersza poleceń: strojenie funkcji przynależności z pliku CSV"""
+    parser = argparse.ArgumentParser(description="Strojenie funkcji przynależności BrewSense")
+    parser.add_argument('csv', help="Oceny degustacyjne: bitterness, acidity, aroma, temperature, score")
+    parser.add_argument('output', help="Plik wynikowej bazy reguł (JSON)")
+    parser.add_argument('--generations', type=int, default=GENERATIONS, help="Liczba generacji")
+    parser.add_argument('--population', type=int, default=POPULATION, help="Rozmiar populacji")
+    parser.add_argument('--workers', type=int, help="Liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument('--checkpoint', metavar='NPZ', help="Plik stanu - wznawiany, jeśli istnieje")
+    parser.add_argument('--tune-quality', action='store_true', help="Strojenie także termów jakości")
+    parser.add_argument('--seed', type=int, default=0, help="Ziarno generatora")
+    args = parser.parse_args()
+
+    from fuzzy_system import INPUT_RANGES, CoffeeQualitySystem
+
+    system = CoffeeQualitySystem(metrics=False)
+    ranges = dict(INPUT_RANGES, quality=tuple(system.quality.universe[[0, -1]]))
+    variables = INPUT_NAMES + (('quality',) if args.tune_quality else ())
+
+    inputs, target = read_tasting_csv(args.csv)
+    fit_inputs, fit_target, test_inputs, test_target = split(inputs, target, seed=args.seed)
+    print(f"Ocen: {len(inputs)} (uczące {len(fit_inputs)}, walidacyjne {len(test_inputs)})")
+
+    functions, _ = tune(system.compiled, system.membership_functions, ranges, fit_inputs, fit_target,
+                        variables, args.population, args.generations, args.workers, args.seed,
+                        args.checkpoint,
+                        progress=lambda generation, error: print(f"  generacja {generation:4d}  RMSE {error:6.2f}"))
+
+    tuned = build_model(system.compiled, functions)
+    accuracy = {}
+    for stage, model in (('before', system.compiled), ('after', tuned)):
+        accuracy[stage] = {'fit': residuals(model, fit_inputs, fit_target)}
+        if len(test_inputs):
+            accuracy[stage]['validation'] = residuals(model, test_inputs, test_target)
+    save_rule_base(args.output, functions, accuracy)
+
+    for stage, reports in accuracy.items():
+        for subset, errors in reports.items():
+            print(f"{stage:<8}{subset:<12}RMSE {errors['rmse']:6.2f}  MAE {errors['mae']:6.2f}  "
+                  f"zgodność kategorii {errors['label_agreement']:.1%}")
+    print(f"Zapisano {args.output}")
+
+
+if __name__ == "__main__":
+    main()
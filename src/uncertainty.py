@@ -0,0 +1,108 @@
+"""
+Niepewność pomiarów - BrewSense
+Propagacja szumu czujników metodą Monte Carlo: wszystkie próbki
+losowane naraz i oceniane jednym wywołaniem wsadowym
+"""
+
+import numpy as np
+
+from batch_engine import INPUT_NAMES, QUALITY_LABELS, input_matrix, label_index
+
+
+# Domyślna liczba próbek Monte Carlo na filiżankę
+N_SAMPLES = 10000
+
+# Raportowane kwantyle rozkładu jakości
+QUANTILES = (0.05, 0.5, 0.95)
+
+
+def draw_samples(means, stds, n_samples=N_SAMPLES, seed=0):
+    """
+    Próbki wejść z rozkładu normalnego wokół odczytów czujników
+
+    Args:
+        means (array-like): Odczyty (C x 4) w kolejności INPUT_NAMES lub tablica
+            strukturalna z polami INPUT_NAMES
+        stds (array-like): Odchylenia standardowe szumu (C x 4 lub 4,);
+            0 oznacza wartość dokładną
+        n_samples (int): Liczba próbek na filiżankę
+        seed (int): Ziarno generatora - te same dane dają te same wyniki
+
+    Returns:
+        np.ndarray: Próbki (C * n_samples x 4), kolejno dla każdej filiżanki
+    """
+    means = input_matrix(means)
+    stds = np.broadcast_to(np.asarray(stds, dtype=np.float64), means.shape)
+    if np.any(stds < 0):
+        raise ValueError("Odchylenie standardowe nie może być ujemne")
+
+    noise = np.random.default_rng(seed).standard_normal((len(means), n_samples, len(INPUT_NAMES)))
+    return (means[:, None, :] + noise * stds[:, None, :]).reshape(-1, len(INPUT_NAMES))
+
+
+def summarize(quality):
+    """
+    Statystyki rozkładu jakości dla każdej filiżanki
+
+    Args:
+        quality (np.ndarray): Wyniki próbek (C x n_samples)
+
+    Returns:
+        dict: mean, std (C,), quantiles (C x len(QUANTILES)) oraz
+            label_probabilities (C x len(QUALITY_LABELS))
+    """
+    cups, n_samples = quality.shape
+    labels = label_index(quality) + np.arange(cups)[:, None] * len(QUALITY_LABELS)
+    counts = np.bincount(labels.ravel(), minlength=cups * len(QUALITY_LABELS))
+    return {
+        'mean': quality.mean(axis=1),
+        'std': quality.std(axis=1),
+        'quantiles': np.quantile(quality, QUANTILES, axis=1).T,
+        'label_probabilities': counts.reshape(cups, len(QUALITY_LABELS)) / n_samples,
+    }
+
+
+def evaluate_distributions(evaluate, means, stds, n_samples=N_SAMPLES, seed=0):
+    """
+    Rozkład jakości wielu filiżanek - jedno wywołanie wsadowe dla wszystkich próbek
+
+    Args:
+        evaluate (callable): Funkcja wsadowa (M x 4) -> (M,)
+        means (array-like): Odczyty (C x 4)
+        stds (array-like): Odchylenia standardowe szumu (C x 4 lub 4,)
+        n_samples (int): Liczba próbek na filiżankę
+        seed (int): Ziarno generatora
+
+    Returns:
+        dict: Statystyki summarize() oraz quality - wyniki próbek (C x n_samples)
+    """
+    samples = draw_samples(means, stds, n_samples, seed)
+    quality = np.asarray(evaluate(samples)).reshape(-1, n_samples)
+    result = summarize(quality)
+    result['quality'] = quality
+    return result
+
+
+def evaluate_distribution(evaluate, mean, std, n_samples=N_SAMPLES, seed=0):
+    """
+    Rozkład jakości jednej filiżanki
+
+    Args:
+        evaluate (callable): Funkcja wsadowa (M x 4) -> (M,)
+        mean (array-like): Odczyty (4,)
+        std (array-like): Odchylenia standardowe szumu (4,)
+        n_samples (int): Liczba próbek
+        seed (int): Ziarno generatora
+
+    Returns:
+        dict: mean, std, quantiles (słownik kwantyl -> wartość),
+            label_probabilities (etykieta -> prawdopodobieństwo) i quality (n_samples,)
+    """
+    result = evaluate_distributions(evaluate, [mean], std, n_samples, seed)
+    return {
+        'mean': float(result['mean'][0]),
+        'std': float(result['std'][0]),
+        'quantiles': dict(zip(QUANTILES, result['quantiles'][0].tolist())),
+        'label_probabilities': dict(zip(QUALITY_LABELS, result['label_probabilities'][0].tolist())),
+        'quality': result['quality'][0],
+    }
@@ -0,0 +1,8 @@
+"""
+Wspólna konfiguracja testów - moduły BrewSense leżą płasko w src/
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
@@ -0,0 +1,69 @@
+"""
+Testy przenośnego artefaktu modelu - zapis, odczyt w osobnym procesie bez
+scikit-fuzzy i zgodność wyników z modelem oryginalnym
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import artifact
+from batch_engine import DEFUZZ_METHODS, sample_inputs
+from fuzzy_system import CoffeeQualitySystem
+
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Wczytanie artefaktu przy zablokowanym imporcie scikit-fuzzy i networkx
+LOADER = """
+import sys
+sys.modules['skfuzzy'] = None
+sys.modules['networkx'] = None
+import numpy as np
+import artifact
+model = artifact.load(sys.argv[1])
+inputs = np.load(sys.argv[2])
+np.savez(sys.argv[3], **{method: model.evaluate(inputs, method) for method in sys.argv[4:]})
+"""
+
+EDGE_ROWS = [
+    [5.0, np.nan, 5.0, 80.0],     # NaN
+    [-3.0, 5.0, 12.0, 80.0],      # przycięcie gorzkości i aromatu
+    [5.0, 5.0, 5.0, 100.0],       # przycięcie temperatury
+    [0.0, 0.0, 7.0, 77.5],        # brak aktywacji reguł
+]
+
+
+@pytest.fixture(scope='module')
+def compiled():
+    return CoffeeQualitySystem(metrics=False).compiled
+
+
+def test_round_trip_without_skfuzzy(compiled, tmp_path):
+    inputs = np.vstack([sample_inputs(compiled.input_ranges, 2000, seed=5), EDGE_ROWS])
+    model_path, inputs_path, output_path = (str(tmp_path / name) for name in
+                                            ('model.npz', 'inputs.npy', 'output.npz'))
+    artifact.save(compiled, model_path)
+    np.save(inputs_path, inputs)
+
+    subprocess.run([sys.executable, '-c', LOADER, model_path, inputs_path, output_path, *DEFUZZ_METHODS],
+                   cwd=SRC_DIR, check=True)
+
+    with np.load(output_path) as loaded:
+        for method in DEFUZZ_METHODS:
+            np.testing.assert_array_equal(loaded[method], compiled.evaluate(inputs, method=method),
+                                          err_msg=method)
+
+
+def test_load_rejects_tampered_file(compiled, tmp_path):
+    path = str(tmp_path / 'model.npz')
+    artifact.save(compiled, path)
+    with np.load(path) as data:
+        arrays = dict(data)
+    arrays['term_params'] = arrays['term_params'] + 1.0
+    np.savez(path, **arrays)
+    with pytest.raises(ValueError):
+        artifact.load(path)
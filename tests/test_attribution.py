@@ -0,0 +1,27 @@
+"""
+Testy atrybucji reguł - wkłady termów i status wierszy
+"""
+
+import numpy as np
+
+from batch_engine import (DEFAULT_QUALITY, ERROR_QUALITY, STATUS_CLAMPED, STATUS_ERROR,
+                          STATUS_NO_ACTIVATION, STATUS_OK, sample_inputs)
+from fuzzy_system import CoffeeQualitySystem
+
+
+def test_contributions_and_status():
+    system = CoffeeQualitySystem(metrics=False)
+    rows = np.vstack([sample_inputs(system.compiled.input_ranges, 500, seed=2),
+                      [[5.0, np.nan, 5.0, 80.0], [0.0, 0.0, 7.0, 77.5], [-3.0, 5.0, 12.0, 80.0]]])
+    records = system.attribute_batch(rows)
+    quality, status = system.evaluate_batch_with_status(rows)
+
+    np.testing.assert_array_equal(records['status'], status)
+    np.testing.assert_allclose(records['quality'], quality, atol=1e-9)
+    scored = np.isin(records['status'], (STATUS_OK, STATUS_CLAMPED))
+    np.testing.assert_allclose(records['contribution'][scored].sum(axis=1), records['quality'][scored],
+                               atol=1e-3)
+    assert records['status'][-3:].tolist() == [STATUS_ERROR, STATUS_NO_ACTIVATION, STATUS_CLAMPED]
+    assert records['quality'][-3:-1].tolist() == [ERROR_QUALITY, DEFAULT_QUALITY]
+    assert not records['contribution'][~scored].any()
+    assert not records['firing'][~scored].any()
@@ -0,0 +1,141 @@
+"""
+Testy dokładności ścieżek wsadowych - NumPy (CompiledRuleBase) i jądro JIT
+sprawdzane tymi samymi przypadkami, z wnioskowaniem scikit-fuzzy jako wzorcem
+"""
+
+from functools import lru_cache
+
+import warnings
+
+import numpy as np
+import pytest
+
+import jit_kernel
+from batch_engine import (CLASSIFY_MARGIN, DEFAULT_QUALITY, DEFUZZ_METHODS, ERROR_QUALITY,
+                          QUALITY_THRESHOLDS, STATUS_CLAMPED, STATUS_ERROR, STATUS_NO_ACTIVATION,
+                          label_index, sample_inputs)
+from fuzzy_system import CoffeeQualitySystem
+from metrics import Metrics
+
+
+# Metody dostępne także w scikit-fuzzy (weighted_average - tylko ścieżka wsadowa)
+SKFUZZY_METHODS = DEFUZZ_METHODS[:5]
+
+NAN_ROW = [5.0, np.nan, 5.0, 80.0]
+NO_ACTIVATION_ROW = [0.0, 0.0, 7.0, 77.5]
+CLAMPED_ROW = [-3.0, 5.0, 12.0, 80.0]
+# Temperatura >= 95 przycinana do 95 - porównywana z wierszem na granicy zakresu
+# (scikit-fuzzy ma na końcu uniwersum np.arange artefakt 95.0000000000005)
+HOT_ROW, EDGE_ROW = [5.0, 5.0, 5.0, 100.0], [5.0, 5.0, 5.0, 95.0]
+
+TOLERANCE = 1e-9
+# som/lom/mom liczone analitycznie z końców plateau, scikit-fuzzy - na siatce
+# uniwersum; różnica nie przekracza kroku siatki
+GRID_TOLERANCE = 0.1
+
+# Jądro JIT liczy tylko centroid - pozostałe metody sprawdzane na ścieżce NumPy
+PATHS = [(method, False) for method in DEFUZZ_METHODS] + [(method, True) for method in jit_kernel.KERNEL_METHODS]
+
+
+@pytest.fixture(scope='module')
+def system():
+    return CoffeeQualitySystem(metrics=False)
+
+
+def _rows():
+    inputs = sample_inputs(CoffeeQualitySystem(metrics=False).compiled.input_ranges, 30, seed=7)
+    return np.vstack([inputs, [NAN_ROW, NO_ACTIVATION_ROW, CLAMPED_ROW]])
+
+
+@lru_cache(maxsize=None)
+def _skfuzzy_reference(method):
+    """Wyniki evaluate() scikit-fuzzy - osobny system na metodę (pamięć podręczna symulatora)"""
+    reference = CoffeeQualitySystem(metrics=False)
+    reference.quality.defuzzify_method = method
+    return np.array([reference.evaluate(*row) for row in _rows()])
+
+
+def _weighted_average_reference(compiled, rows):
+    """Średnia ważona środków termów liczona wprost z aktywacji"""
+    rows = np.asarray(rows, dtype=np.float64)
+    invalid = np.isnan(rows).any(axis=1)
+    activation = compiled.activate(compiled.fire(compiled.fuzzify(compiled.clamp(np.nan_to_num(rows)))))
+    centers = compiled.output_params[:, 1:3].mean(axis=1)
+    total = activation.sum(axis=1)
+    expected = np.full(len(rows), DEFAULT_QUALITY)
+    fired = total > 0
+    expected[fired] = activation[fired] @ centers / total[fired]
+    expected[invalid] = ERROR_QUALITY
+    return expected
+
+
+@pytest.mark.parametrize('method, jit', PATHS)
+def test_matches_reference(system, method, jit):
+    rows = _rows()
+    if method in SKFUZZY_METHODS:
+        expected = _skfuzzy_reference(method)
+    else:
+        expected = _weighted_average_reference(system.compiled, rows)
+    quality = system.evaluate_batch(rows, method=method, jit=jit)
+    tolerance = GRID_TOLERANCE if method in ('mom', 'som', 'lom') else TOLERANCE
+    np.testing.assert_allclose(quality, expected, rtol=0, atol=tolerance)
+
+
+@pytest.mark.parametrize('method, jit', PATHS)
+def test_edge_rows(system, method, jit):
+    quality = system.evaluate_batch([NAN_ROW, NO_ACTIVATION_ROW, HOT_ROW, EDGE_ROW], method=method, jit=jit)
+    assert quality[0] == ERROR_QUALITY
+    assert quality[1] == DEFAULT_QUALITY
+    assert quality[2] == pytest.approx(quality[3], abs=TOLERANCE)
+
+    _, status = system.evaluate_batch_with_status([NAN_ROW, NO_ACTIVATION_ROW, HOT_ROW], method=method)
+    assert status.tolist() == [STATUS_ERROR, STATUS_NO_ACTIVATION, STATUS_CLAMPED]
+
+
+@pytest.mark.skipif(not jit_kernel.AVAILABLE, reason="Numba niedostępna")
+@pytest.mark.parametrize('method', jit_kernel.KERNEL_METHODS)
+def test_jit_matches_numpy(system, method):
+    inputs = sample_inputs(system.compiled.input_ranges, 20000, seed=3) * 1.1
+    inputs[::97, 2] = np.nan
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        quality = jit_kernel.evaluate(system.compiled, inputs, method=method)
+    np.testing.assert_allclose(quality, system.compiled.evaluate(inputs, method=method), rtol=0, atol=TOLERANCE)
+
+
+@pytest.mark.parametrize('method, float32', [('mom', False), ('centroid', True)])
+def test_jit_fallback_warns(system, method, float32):
+    rows = _rows()
+    with pytest.warns(RuntimeWarning):
+        quality = system.evaluate_batch(rows, method=method, jit=True, float32=float32)
+    np.testing.assert_array_equal(quality, system.evaluate_batch(rows, method=method, float32=float32))
+
+
+@pytest.mark.parametrize('float32', [False, True])
+def test_classify_matches_evaluate(system, float32):
+    compiled = system.compiled.astype(np.float32) if float32 else system.compiled
+    rows = np.vstack([sample_inputs(compiled.input_ranges, 2000, seed=11) * 1.1,
+                      [NAN_ROW, NO_ACTIVATION_ROW, CLAMPED_ROW, HOT_ROW]])
+    quality = compiled.evaluate(rows)
+    # Wynik dokładnie na progu kategorii (np. 85.0) rozstrzyga zaokrąglenie
+    on_threshold = np.isclose(quality[:, None], QUALITY_THRESHOLDS, rtol=0, atol=1e-3).any(axis=1)
+    labels = compiled.classify(rows)
+    np.testing.assert_array_equal(labels[~on_threshold], label_index(quality)[~on_threshold])
+    assert labels[-4] == label_index(ERROR_QUALITY)
+    assert labels[-3] == label_index(DEFAULT_QUALITY)
+    assert system.classify_batch([NAN_ROW]) == [system.get_quality_label(ERROR_QUALITY)]
+
+
+def test_classify_early_exit_counts_valid_rows_only(system):
+    compiled = system.compiled
+    valid = sample_inputs(compiled.input_ranges, 3000, seed=13)
+    rows = np.vstack([valid, np.tile(NAN_ROW, (500, 1))])
+    metrics = Metrics()
+    compiled.classify(rows, metrics=metrics)
+
+    low, high = compiled.centroid_bounds(compiled.activate(compiled.fire(compiled.fuzzify(valid))))
+    inside = label_index(low - CLASSIFY_MARGIN) == label_index(high + CLASSIFY_MARGIN)
+    stats = metrics.stats()
+    assert stats['counters']['classify_samples'] == len(rows)
+    assert stats['counters']['classify_early_exit'] == int(np.count_nonzero(inside))
+    assert stats['classify_early_exit_ratio'] == pytest.approx(np.count_nonzero(inside) / len(rows))
@@ -0,0 +1,96 @@
+"""
+Testy krzywych stygnięcia - zgodność z pełną oceną wsadową, chwile
+przekroczenia progów kategorii i wiersze z NaN
+"""
+
+import numpy as np
+import pytest
+
+import cooling
+from batch_engine import (DEFUZZ_METHODS, ERROR_QUALITY, QUALITY_THRESHOLDS, STATUS_ERROR, STATUS_OK,
+                          label_index)
+from fuzzy_system import CoffeeQualitySystem
+
+
+TOLERANCE = 1e-9
+
+CUPS = [[5.0, 5.0, 5.0], [2.0, 7.0, 8.0], [8.0, 3.0, 4.0]]
+TEMPERATURES = np.linspace(95.0, 40.0, 56)
+
+
+@pytest.fixture(scope='module')
+def compiled():
+    return CoffeeQualitySystem(metrics=False).compiled
+
+
+def _full_rows(cup, temperatures):
+    return np.column_stack([np.tile(cup, (len(temperatures), 1)), temperatures])
+
+
+@pytest.mark.parametrize('method', DEFUZZ_METHODS)
+def test_session_matches_evaluate(compiled, method):
+    session = cooling.CoolingSession(compiled, CUPS, method)
+    for index, cup in enumerate(CUPS):
+        expected = compiled.evaluate(_full_rows(cup, TEMPERATURES), method=method)
+        np.testing.assert_allclose(session.score(TEMPERATURES, cups=index), expected, rtol=0, atol=TOLERANCE)
+
+    # Strumień: wszystkie filiżanki w każdym pomiarze
+    for step, temperature in enumerate(TEMPERATURES):
+        result = session.update(np.full(len(CUPS), temperature), step)
+        expected = compiled.evaluate(np.column_stack([CUPS, np.full(len(CUPS), temperature)]), method=method)
+        np.testing.assert_allclose(result['quality'], expected, rtol=0, atol=TOLERANCE)
+
+
+def test_cup_index_must_match_temperatures(compiled):
+    session = cooling.CoolingSession(compiled, CUPS)
+    with pytest.raises(ValueError):
+        session.score(TEMPERATURES)
+    with pytest.raises(ValueError):
+        session.score(TEMPERATURES, cups=[0, 1])
+    pairs = session.score([90.0, 60.0, 70.0, 80.0], cups=[2, 0, 0, 1])
+    expected = compiled.evaluate([CUPS[2] + [90.0], CUPS[0] + [60.0], CUPS[0] + [70.0], CUPS[1] + [80.0]])
+    np.testing.assert_allclose(pairs, expected, rtol=0, atol=TOLERANCE)
+
+
+def test_threshold_crossing_times(compiled):
+    times = np.arange(len(TEMPERATURES)) * 30.0
+    curve = cooling.score_cooling_curve(compiled, *CUPS[0], TEMPERATURES, times)
+    labels = label_index(curve['quality'])
+    np.testing.assert_array_equal(curve['labels'], labels)
+
+    # Oczekiwane przekroczenia: interpolacja liniowa na odcinkach zmiany kategorii
+    quality = curve['quality']
+    expected = []
+    for segment in np.flatnonzero(np.diff(labels)):
+        q0, q1 = quality[segment], quality[segment + 1]
+        for threshold in QUALITY_THRESHOLDS:
+            if (q0 >= threshold) != (q1 >= threshold):
+                expected.append((threshold, times[segment] + (threshold - q0) / (q1 - q0) * 30.0,
+                                 'up' if q1 > q0 else 'down'))
+    assert 0 < len(expected) == int(np.abs(np.diff(labels)).sum())
+    found = sorted((crossing['threshold'], crossing['time'], crossing['direction'])
+                   for crossing in curve['crossings'])
+    expected.sort()
+    assert [(threshold, direction) for threshold, _, direction in found] == \
+        [(threshold, direction) for threshold, _, direction in expected]
+    np.testing.assert_allclose([time for _, time, _ in found], [time for _, time, _ in expected])
+
+
+def test_nan_rows(compiled):
+    temperatures = TEMPERATURES.copy()
+    temperatures[[3, 10]] = np.nan
+    curve = cooling.score_cooling_curve(compiled, *CUPS[0], temperatures)
+    assert curve['quality'][3] == curve['quality'][10] == ERROR_QUALITY
+    assert (curve['status'][[3, 10]] == STATUS_ERROR).all()
+    assert all(not 2 <= crossing['time'] <= 4 and not 9 <= crossing['time'] <= 11
+               for crossing in curve['crossings'])
+
+    session = cooling.CoolingSession(compiled, CUPS[:2] + [[5.0, np.nan, 5.0]])
+    first = session.update([80.0, np.nan, 80.0], 0.0)
+    assert first['status'].tolist() == [STATUS_OK, STATUS_ERROR, STATUS_ERROR]
+    assert first['quality'][1] == first['quality'][2] == ERROR_QUALITY
+    # Filiżanka wraca do poprawnego pomiaru - wynik liczony na nowo
+    second = session.update([80.0, 80.0, 80.0], 1.0)
+    assert second['quality'][1] == pytest.approx(compiled.evaluate([CUPS[1] + [80.0]])[0], abs=TOLERANCE)
+    assert second['status'][2] == STATUS_ERROR
+    assert all(crossing['cup'] == 0 for crossing in second['crossings'])
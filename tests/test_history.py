@@ -0,0 +1,139 @@
+"""
+Testy rejestru ocen - zapis przez granice porcji, ponowne otwarcie
+z manifestu, zapytania zakresowe pomijające porcje, statystyki i zapis
+z wielu wątków
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+import history
+from batch_engine import INPUT_NAMES, QUALITY_LABELS, label_index
+
+
+CHUNK_ROWS = 100
+FLUSH_ROWS = 30
+
+
+def _rows(count, seed=0):
+    """Wejścia rosnące w czasie (temperatura rośnie z indeksem) i losowa jakość"""
+    rng = np.random.default_rng(seed)
+    inputs = np.column_stack([rng.uniform(0, 10, (count, 3)), np.linspace(60, 95, count)])
+    return inputs, rng.uniform(0, 100, count), np.arange(count, dtype=np.float64)
+
+
+def _fill(path, inputs, quality, timestamps, version='v1'):
+    log = history.EvaluationHistory(str(path), chunk_rows=CHUNK_ROWS, flush_rows=FLUSH_ROWS)
+    # Nierówne partie - zapisy przechodzą przez granice porcji w środku partii
+    for start, stop in ((0, 7), (7, 64), (64, 65), (65, 190), (190, len(quality))):
+        log.record(inputs[start:stop], quality[start:stop], version, timestamps[start:stop])
+    return log
+
+
+@pytest.fixture
+def filled(tmp_path):
+    inputs, quality, timestamps = _rows(250)
+    return _fill(tmp_path, inputs, quality, timestamps), inputs, quality, timestamps
+
+
+def test_flush_across_chunk_boundary(filled):
+    log, inputs, quality, timestamps = filled
+    log.flush()
+    assert [chunk['rows'] for chunk in log.manifest['chunks']] == [100, 100, 50]
+    data = log.query()
+    np.testing.assert_array_equal(data['timestamp'], timestamps)
+    np.testing.assert_array_equal(data['quality'], quality.astype(np.float32))
+    for column, name in enumerate(INPUT_NAMES):
+        np.testing.assert_array_equal(data[name], inputs[:, column].astype(np.float32))
+    np.testing.assert_array_equal(data['label'], label_index(quality.astype(np.float32)))
+
+
+def test_reopen_from_manifest(filled, tmp_path):
+    log, inputs, quality, timestamps = filled
+    log.flush()
+    reopened = history.EvaluationHistory(str(tmp_path), chunk_rows=7, flush_rows=FLUSH_ROWS)
+    assert reopened.manifest['chunk_rows'] == CHUNK_ROWS
+    assert len(reopened) == 250
+
+    # Dopisanie do niepełnej porcji i nowej wersji
+    more_inputs, more_quality, _ = _rows(80, seed=1)
+    with reopened:
+        reopened.record(more_inputs, more_quality, 'v2', 1000.0)
+    assert [chunk['rows'] for chunk in reopened.manifest['chunks']] == [100, 100, 100, 30]
+    assert reopened.manifest['versions'] == ['v1', 'v2']
+    assert len(reopened.query(version='v2')['quality']) == 80
+    np.testing.assert_array_equal(reopened.query(version='v1')['timestamp'], timestamps)
+
+
+def test_range_queries_skip_chunks(filled, monkeypatch):
+    log, inputs, quality, timestamps = filled
+    loaded = []
+    read = log._chunk_column
+    monkeypatch.setattr(log, '_chunk_column', lambda index, name, rows: loaded.append(index) or
+                        read(index, name, rows))
+
+    # Temperatura rośnie z indeksem - zakres obejmuje tylko drugą porcję
+    temperature = inputs[:, 3].astype(np.float32)
+    low, high = temperature[120], temperature[160]
+    data = log.query(ranges={'temperature': (low, high)}, columns=['temperature', 'quality'])
+    assert set(loaded) == {1}
+    expected = (temperature >= low) & (temperature < high)
+    np.testing.assert_array_equal(data['quality'], quality.astype(np.float32)[expected])
+
+    # Kilka warunków naraz, w tym otwarte końce i kategorie
+    loaded.clear()
+    aroma = inputs[:, 2].astype(np.float32)
+    q = quality.astype(np.float32)
+    data = log.query(ranges={'aroma': (5.0, None), 'temperature': (None, temperature[90])},
+                     labels=QUALITY_LABELS[-3:])
+    assert set(loaded) == {0}
+    expected = (aroma >= 5.0) & (temperature < temperature[90]) & (label_index(q) >= len(QUALITY_LABELS) - 3)
+    np.testing.assert_array_equal(data['quality'], q[expected])
+
+    with pytest.raises(ValueError):
+        log.query(ranges={'version': (0, 1)})
+    with pytest.raises(ValueError):
+        log.query(labels=['nie ma takiej'])
+
+
+def test_stats_and_timeline_match_numpy(filled):
+    log, inputs, quality, timestamps = filled
+    q = quality.astype(np.float32).astype(np.float64)
+    selected = (timestamps >= 20) & (timestamps < 230) & (q >= 30)
+
+    stats = log.stats(start=20, end=230, quality=(30, None))
+    assert stats['count'] == int(selected.sum())
+    assert stats['mean'] == pytest.approx(q[selected].mean())
+    assert stats['std'] == pytest.approx(q[selected].std())
+    assert (stats['min'], stats['max']) == (q[selected].min(), q[selected].max())
+    counts = np.bincount(label_index(q[selected]), minlength=len(QUALITY_LABELS))
+    assert stats['labels'] == dict(zip(QUALITY_LABELS, counts.tolist()))
+
+    timeline = log.timeline(40.0, ranges={'quality': (None, 70)})
+    kept = q < 70
+    buckets = np.floor(timestamps[kept] / 40.0)
+    keys = np.unique(buckets)
+    np.testing.assert_array_equal(timeline['bucket'], keys * 40.0)
+    np.testing.assert_array_equal(timeline['count'], [np.sum(buckets == key) for key in keys])
+    np.testing.assert_allclose(timeline['mean'], [q[kept][buckets == key].mean() for key in keys])
+
+
+def test_concurrent_record(tmp_path):
+    log = history.EvaluationHistory(str(tmp_path), chunk_rows=CHUNK_ROWS, flush_rows=FLUSH_ROWS)
+    inputs, quality, _ = _rows(40)
+
+    def writer(version):
+        for _ in range(50):
+            log.record(inputs[:7], quality[:7], version)
+
+    threads = [threading.Thread(target=writer, args=(f'v{index}',)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    log.flush()
+    assert len(log) == 4 * 50 * 7
+    assert sum(chunk['rows'] for chunk in log.manifest['chunks']) == 4 * 50 * 7
+    assert all(len(log.query(version=f'v{index}')['quality']) == 50 * 7 for index in range(4))
@@ -0,0 +1,117 @@
+"""
+Testy generatora obciążenia - mieszanina rozkładów wokół presetów,
+liczenie statusów wierszy punktu wejścia 'library', percentyle raportu
+i próbkowanie zasobów procesów potomnych
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+import loadgen
+from batch_engine import INPUT_NAMES
+from fuzzy_system import INPUT_RANGES
+from presets import COFFEE_PROFILES
+
+
+RANGES = np.array([INPUT_RANGES[name] for name in INPUT_NAMES], dtype=np.float64)
+OK_ROW = [5.0, 5.0, 5.0, 80.0]
+NO_ACTIVATION_ROW = [0.0, 0.0, 7.0, 77.5]
+NAN_ROW = [5.0, np.nan, 5.0, 80.0]
+
+
+def _outside(inputs):
+    return (inputs < RANGES[:, 0]) | (inputs > RANGES[:, 1])
+
+
+def test_mixture_is_seeded_and_stays_near_presets():
+    inputs = loadgen.generate_inputs(5000, RANGES, outlier_fraction=0.0, seed=1)
+    np.testing.assert_array_equal(inputs, loadgen.generate_inputs(5000, RANGES, 0.0, seed=1))
+    assert inputs.shape == (5000, len(INPUT_NAMES))
+    assert not _outside(inputs).any()
+
+    centers = np.array([[preset['params'][name] for name in INPUT_NAMES]
+                        for preset in COFFEE_PROFILES.values() if preset['params']])
+    spread = np.array([loadgen.PRESET_SPREAD[name] for name in INPUT_NAMES])
+    distance = np.abs(inputs[:, None, :] - centers[None, :, :]) / spread
+    nearest = distance.max(axis=2).argmin(axis=1)
+    assert distance.max(axis=2).min(axis=1).max() < 6
+    # Równe wagi składowych mieszaniny
+    counts = np.bincount(nearest, minlength=len(centers))
+    assert counts.min() > 0.5 * len(inputs) / len(centers)
+
+
+def test_outliers_leave_one_variable_out_of_range():
+    inputs = loadgen.generate_inputs(20000, RANGES, outlier_fraction=0.1, seed=2)
+    outside = _outside(inputs)
+    assert outside.sum(axis=1).max() == 1
+    assert outside.any(axis=1).mean() == pytest.approx(0.1, abs=0.01)
+    width = RANGES[:, 1] - RANGES[:, 0]
+    excess = np.maximum(RANGES[:, 0] - inputs, inputs - RANGES[:, 1]).max(axis=0)
+    assert np.all(excess <= loadgen.OUTLIER_MARGIN * width)
+
+
+@pytest.mark.parametrize('batch_size, concurrency', [(1, 1), (3, 2)])
+def test_library_target_counts_statuses(batch_size, concurrency):
+    inputs = np.array([OK_ROW] * 5 + [NO_ACTIVATION_ROW] * 3 + [NAN_ROW] * 2)
+    result = loadgen.run_load(loadgen.make_target('library'), inputs, batch_size, concurrency)
+    assert result['rows'] == len(inputs)
+    assert result['errors'] == 0
+    assert result['fallbacks'] == {'no_activation': 3, 'error': 2, 'unknown': 0}
+    assert result['requests'] == len(result['latency']) == -(-len(inputs) // batch_size)
+
+
+def test_targets_without_status_and_failures():
+    inputs = np.array([OK_ROW] * 6)
+    result = loadgen.run_load(lambda batch: (np.zeros(len(batch)), None), inputs, 2)
+    assert result['fallbacks'] == {'no_activation': 0, 'error': 0, 'unknown': 6}
+
+    def failing(batch):
+        raise RuntimeError("serwer niedostępny")
+
+    result = loadgen.run_load(failing, inputs, 2, concurrency=2)
+    assert result['errors'] == 3
+    assert result['rows'] == 0
+    assert len(result['latency']) == 0
+
+
+def test_summary_percentiles():
+    result = {'latency': np.arange(1, 101) / 1000.0, 'requests': 100, 'rows': 400, 'errors': 0,
+              'fallbacks': {'no_activation': 0, 'error': 0, 'unknown': 0}, 'elapsed': 2.0}
+    report = loadgen.summarize(result)
+    assert report['latency_ms'] == pytest.approx({'p50': 50.5, 'p95': 95.05, 'p99': 99.01})
+    assert report['latency_max_ms'] == pytest.approx(100.0)
+    assert report['throughput'] == {'requests_per_s': 50.0, 'rows_per_s': 200.0}
+
+    empty = loadgen.summarize(dict(result, latency=np.array([]), errors=100))
+    assert empty['completed'] == 0
+    assert empty['latency_ms'] == {'p50': None, 'p95': None, 'p99': None}
+    assert empty['latency_max_ms'] is None
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/stat'), reason="wymaga /proc (Linux)")
+def test_sampler_includes_child_processes():
+    sampler = loadgen.ResourceSampler()
+    cpu, rss = sampler._read()
+
+    # Żyjący potomek - jego RSS wchodzi do próbki
+    child = subprocess.Popen([sys.executable, '-c',
+                              "import sys, time; data = bytearray(200 * 2**20); "
+                              "print(flush=True); time.sleep(30)"], stdout=subprocess.PIPE)
+    try:
+        child.stdout.readline()
+        assert child.pid in sampler._tree()
+        assert sampler._read()[1] - rss > 150 * 2**20
+    finally:
+        child.kill()
+        child.wait()
+
+    # Zakończony potomek (jak polecenie cmd:) - jego czas CPU jest doliczany
+    started = time.process_time()
+    subprocess.run([sys.executable, '-c', "sum(range(20_000_000))"], check=True)
+    assert time.process_time() - started < 0.1
+    assert sampler._read()[0] - cpu > 0.2
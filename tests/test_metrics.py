@@ -0,0 +1,88 @@
+"""
+Testy metryk - liczniki i etapy po ocenie wsadowej z wierszami poprawnymi,
+przyciętymi, bez aktywacji i z NaN, odczytane z eksportu Prometheus
+"""
+
+import re
+
+import numpy as np
+import pytest
+
+import jit_kernel
+from batch_engine import STATUS_OK, sample_inputs
+from fuzzy_system import CoffeeQualitySystem
+from metrics import STAGES
+
+
+NAN_ROW = [5.0, np.nan, 5.0, 80.0]
+NO_ACTIVATION_ROW = [0.0, 0.0, 7.0, 77.5]
+CLAMPED_ROW = [-3.0, 5.0, 12.0, 80.0]
+# Przycięty i bez aktywacji - liczony w obu licznikach, jak na ścieżce NumPy
+CLAMPED_NO_ACTIVATION_ROW = [-1.0, 0.0, 7.0, 77.5]
+
+
+def _scrape(text):
+    """Próbki tekstu Prometheus: nazwa{etykiety} -> wartość"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def _mixed_batch():
+    compiled = CoffeeQualitySystem(metrics=False).compiled
+    inputs = sample_inputs(compiled.input_ranges, 500, seed=21)
+    # Tylko wiersze losowe ze statusem OK - oczekiwane liczniki wynikają z wierszy brzegowych
+    inputs = inputs[compiled.evaluate_with_status(inputs)[1] == STATUS_OK]
+    edge = [NAN_ROW] * 3 + [NO_ACTIVATION_ROW] * 2 + [CLAMPED_ROW] * 4 + [CLAMPED_NO_ACTIVATION_ROW]
+    return np.vstack([inputs, edge]), len(inputs)
+
+
+@pytest.mark.parametrize('jit', [False, True])
+def test_prometheus_counters_after_mixed_batch(jit):
+    if jit and not jit_kernel.AVAILABLE:
+        pytest.skip("Numba niedostępna")
+    system = CoffeeQualitySystem()
+    rows, _ = _mixed_batch()
+    system.evaluate_batch(rows, jit=jit)
+
+    samples = _scrape(system.prometheus_metrics())
+    assert samples['brewsense_calls_total'] == 1
+    assert samples['brewsense_samples_total'] == len(rows)
+    assert samples['brewsense_clamped_total'] == 5
+    assert samples['brewsense_fallback_no_activation_total'] == 3
+    assert samples['brewsense_fallback_error_total'] == 3
+
+    timed = {re.search(r'stage="(\w+)"', name).group(1): value for name, value in samples.items()
+             if name.startswith('brewsense_stage_samples_total')}
+    assert set(timed) == set(STAGES)
+    if jit:
+        assert timed['jit_kernel'] == len(rows)
+        assert all(value == 0 for stage, value in timed.items() if stage != 'jit_kernel')
+    else:
+        for stage in ('clamp', 'fuzzify', 'fire', 'activate', 'aggregate', 'defuzzify'):
+            assert timed[stage] == len(rows)
+        assert timed['jit_kernel'] == timed['skfuzzy_evaluate'] == 0
+    assert samples['brewsense_stage_seconds_count{stage="skfuzzy_evaluate"}'] == 0
+
+
+def test_jit_status_matches_numpy():
+    if not jit_kernel.AVAILABLE:
+        pytest.skip("Numba niedostępna")
+    compiled = CoffeeQualitySystem(metrics=False).compiled
+    rows, _ = _mixed_batch()
+    rows = np.vstack([rows, sample_inputs(compiled.input_ranges, 5000, seed=2) * 1.2])
+    quality, status = jit_kernel.evaluate_with_status(compiled, rows)
+    expected_quality, expected_status = compiled.evaluate_with_status(rows)
+    np.testing.assert_array_equal(status, expected_status)
+    np.testing.assert_allclose(quality, expected_quality, rtol=0, atol=1e-9)
+
+
+def test_skfuzzy_evaluate_stage():
+    system = CoffeeQualitySystem()
+    system.evaluate(5.0, 5.0, 5.0, 80.0)
+    stats = system.stats()
+    assert stats['stages']['skfuzzy_evaluate']['count'] == 1
+    assert stats['counters']['calls'] == 1
@@ -0,0 +1,75 @@
+"""
+Testy optymalizacji odwrotnej - ograniczenia wartością stałą, wynik
+przeszukiwania wzorcowego nie gorszy od siatki i zbiór Pareto bez
+punktów zdominowanych
+"""
+
+import numpy as np
+import pytest
+
+import optimizer
+from batch_engine import INPUT_NAMES
+from fuzzy_system import CoffeeQualitySystem
+
+
+CONSTRAINTS = {'temperature': 70, 'aroma': (None, 6)}
+OBJECTIVES = {'quality': 'max', 'temperature': 'min'}
+
+
+@pytest.fixture(scope='module')
+def compiled():
+    return CoffeeQualitySystem(metrics=False).compiled
+
+
+def _dominated(values, others):
+    """Maska punktów `values` zdominowanych przez któryś z `others` (cele maksymalizowane)"""
+    at_least = np.all(others[None, :, :] >= values[:, None, :], axis=2)
+    better = np.any(others[None, :, :] > values[:, None, :], axis=2)
+    return np.any(at_least & better, axis=1)
+
+
+def test_fixed_constraint_is_respected(compiled):
+    result = optimizer.optimize(compiled, CONSTRAINTS)
+    assert result['temperature'] == 70
+    assert result['aroma'] <= 6
+    point = [[result[name] for name in INPUT_NAMES]]
+    assert result['quality'] == pytest.approx(compiled.evaluate(point)[0])
+
+
+@pytest.mark.parametrize('constraints', [None, CONSTRAINTS])
+def test_refined_optimum_not_worse_than_grid(compiled, constraints):
+    bounds = optimizer.resolve_bounds(compiled.input_ranges, constraints)
+    grid_best = compiled.evaluate(optimizer.grid(bounds, 11)).max()
+    assert optimizer.optimize(compiled, constraints, grid_points=11)['quality'] >= grid_best
+
+
+def test_conflicting_constraints(compiled):
+    with pytest.raises(ValueError, match='Sprzeczne'):
+        optimizer.optimize(compiled, {'temperature': (90, 80)})
+    with pytest.raises(ValueError, match='Nieznana zmienna'):
+        optimizer.optimize(compiled, {'sweetness': 5})
+
+
+def test_pareto_front_has_no_dominated_points(compiled):
+    result = optimizer.optimize(compiled, {'aroma': 7}, grid_points=6, objectives=OBJECTIVES)
+    pareto = result['pareto']
+    values = np.column_stack([pareto[:, -1], -pareto[:, INPUT_NAMES.index('temperature')]])
+    assert len(pareto) > 1
+    assert not _dominated(values, values).any()
+
+    # Żaden punkt siatki nie dominuje zbioru Pareto
+    bounds = optimizer.resolve_bounds(compiled.input_ranges, {'aroma': 7})
+    candidates = optimizer.grid(bounds, 6)
+    grid_values = np.column_stack([compiled.evaluate(candidates),
+                                   -candidates[:, INPUT_NAMES.index('temperature')]])
+    assert not _dominated(values, grid_values).any()
+
+
+def test_pareto_front_skips_duplicates():
+    values = np.array([[1.0, 1.0], [2.0, 0.0], [1.0, 1.0], [0.5, 0.5], [0.0, 2.0]])
+    assert sorted(optimizer.pareto_front(values).tolist()) in ([0, 1, 4], [1, 2, 4])
+
+
+def test_invalid_objective(compiled):
+    with pytest.raises(ValueError, match='Nieprawidłowy cel'):
+        optimizer.optimize(compiled, objectives={'quality': 'best'})
@@ -0,0 +1,100 @@
+"""
+Testy biblioteki profili - import presetów bez nadpisywania profili
+użytkownika, unieważnianie ocen po zmianie parametrów, usuwanie ocen
+innych baz reguł i przedziały zakresów w top()
+"""
+
+import numpy as np
+import pytest
+
+from fuzzy_system import CoffeeQualitySystem
+from presets import COFFEE_PROFILES, MANUAL_PROFILE
+from profile_store import ProfileStore
+
+
+USER_AMERICANO = {'bitterness': 1.0, 'acidity': 2.0, 'aroma': 3.0, 'temperature': 61.0}
+
+
+@pytest.fixture(scope='module')
+def system():
+    return CoffeeQualitySystem(metrics=False)
+
+
+@pytest.fixture
+def store():
+    store = ProfileStore()
+    yield store
+    store.close()
+
+
+def _add_temperatures(store, temperatures):
+    for temperature in temperatures:
+        store.add_profile(f"t{temperature}", {'bitterness': 5, 'acidity': 5, 'aroma': 5,
+                                              'temperature': temperature})
+
+
+def test_import_presets_keeps_user_profiles(store):
+    store.add_profile('Americano', USER_AMERICANO, 'mój')
+    store.import_presets(COFFEE_PROFILES)
+    store.import_presets(COFFEE_PROFILES)
+
+    americano = store.get('Americano')
+    assert americano['description'] == 'mój'
+    assert {key: americano[key] for key in USER_AMERICANO} == USER_AMERICANO
+    assert store.get(MANUAL_PROFILE) is None
+    assert store.count() == sum(1 for preset in COFFEE_PROFILES.values() if preset['params'])
+
+
+def test_parameter_update_drops_scores(store, system):
+    store.import_presets(COFFEE_PROFILES)
+    assert store.score_all(system) == store.count()
+    rule_base = system.rule_base_hash()
+    params = COFFEE_PROFILES['Cappuccino']['params']
+    expected = system.evaluate_batch([[params[key] for key in USER_AMERICANO]])[0]
+    assert store.stored_score('Cappuccino', rule_base) == pytest.approx(expected)
+
+    store.add_profile('Americano', USER_AMERICANO)
+    assert store.stored_score('Americano', rule_base) is None
+    assert store.stored_score('Cappuccino', rule_base) is not None
+    ids, params = store.unscored(rule_base)
+    assert len(ids) == 1
+    np.testing.assert_array_equal(params[0], list(USER_AMERICANO.values()))
+    assert store.score_all(system) == 1
+
+
+def test_score_all_prunes_other_rule_bases(store, system):
+    store.import_presets(COFFEE_PROFILES)
+    ids, _ = store.unscored('old')
+    store.store_scores('old', ids, np.full(len(ids), 10.0))
+
+    assert store.score_all(system, prune=False) == len(ids)
+    assert store.stored_score('Americano', 'old') == 10.0
+    assert store.score_all(system) == 0
+    assert store.stored_score('Americano', 'old') is None
+    assert store.stored_score('Americano', system.rule_base_hash()) is not None
+
+
+def test_top_range_excludes_upper_bound(store, system):
+    _add_temperatures(store, (65, 70, 75, 80))
+
+    def names(**ranges):
+        return sorted(profile['name'] for profile in store.top(system, 10, **ranges))
+
+    assert names(temperature=(70, 75)) == ['t70']
+    assert names(temperature=(None, 75)) == ['t65', 't70']
+    assert names(temperature=(75, None)) == ['t75', 't80']
+    assert names() == ['t65', 't70', 't75', 't80']
+
+
+def test_top_orders_by_quality_and_limits(store, system):
+    _add_temperatures(store, (65, 70, 75, 80, 85, 90))
+    profiles = store.top(system, 3)
+    assert len(profiles) == 3
+    quality = [profile['quality'] for profile in profiles]
+    assert quality == sorted(quality, reverse=True)
+    assert quality[0] == pytest.approx(max(system.evaluate_batch(store.parameters()[1])))
+
+
+def test_top_rejects_unknown_parameter(store, system):
+    with pytest.raises(ValueError, match='Nieznany parametr'):
+        store.top(system, 5, strength=(1, 2))
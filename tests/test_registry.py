@@ -0,0 +1,92 @@
+"""
+Testy rejestru modeli - internowanie identycznych tablic, zwalnianie
+po usunięciu modelu i ocena wsadu z wierszami różnych modeli
+"""
+
+import numpy as np
+import pytest
+
+import tuning
+from batch_engine import sample_inputs
+from fuzzy_system import CoffeeQualitySystem
+from registry import ModelRegistry
+
+
+@pytest.fixture(scope='module')
+def system():
+    return CoffeeQualitySystem(metrics=False)
+
+
+@pytest.fixture(scope='module')
+def models(system):
+    """Model bazowy i model z przesuniętym termem aromatu (inne term_params)"""
+    functions = {var: dict(terms) for var, terms in system.membership_functions.items()}
+    kind, points = functions['aroma']['moderate']
+    functions['aroma']['moderate'] = (kind, [point - 1.0 for point in points])
+    return system.compiled, tuning.build_model(system.compiled, functions)
+
+
+def test_identical_rule_bases_share_arrays(models):
+    base, _ = models
+    registry = ModelRegistry()
+    first = registry.register('espresso', base)
+    second = registry.register('americano', base)
+
+    for name, array in first._arrays().items():
+        assert second._arrays()[name] is array
+        assert not array.flags.writeable
+    usage = registry.memory()
+    assert usage['shared_bytes'] * 2 == usage['unshared_bytes']
+    assert usage['per_model'] == {'espresso': 0, 'americano': 0}
+
+
+def test_models_share_all_but_changed_arrays(models):
+    base, tuned = models
+    registry = ModelRegistry()
+    first = registry.register('espresso', base)
+    second = registry.register('cold_brew', tuned)
+
+    differing = {name for name, array in first._arrays().items()
+                 if second._arrays()[name] is not array}
+    assert differing == {'term_params'}
+    assert registry.memory()['per_model']['cold_brew'] == tuned.term_params.nbytes
+
+
+def test_remove_releases_unused_arrays(models):
+    base, tuned = models
+    registry = ModelRegistry()
+    registry.register('espresso', base)
+    registry.register('cold_brew', tuned)
+    registry.remove('cold_brew')
+    assert 'cold_brew' not in registry
+    assert registry.memory()['shared_bytes'] == sum(array.nbytes for array in base._arrays().values())
+    registry.remove('espresso')
+    assert registry.memory()['shared_bytes'] == 0
+    with pytest.raises(KeyError, match='Nieznany model'):
+        registry.get('espresso')
+
+
+@pytest.mark.parametrize('method', ['centroid', 'mom'])
+def test_evaluate_mixed_matches_per_model(models, method):
+    registry = ModelRegistry()
+    for model_id, compiled in zip(('espresso', 'cold_brew'), models):
+        registry.register(model_id, compiled)
+    inputs = sample_inputs(models[0].input_ranges, 500, seed=5)
+    model_ids = np.random.default_rng(5).choice(['espresso', 'cold_brew'], len(inputs))
+
+    expected = np.where(model_ids == 'espresso',
+                        registry.evaluate('espresso', inputs, method),
+                        registry.evaluate('cold_brew', inputs, method))
+    # Suma wektorowa zależy od składu porcji - różnice rzędu 1e-13
+    np.testing.assert_allclose(registry.evaluate_mixed(model_ids, inputs, method), expected,
+                               rtol=1e-12, atol=1e-12)
+    # Modele rzeczywiście różnią się na tym wsadzie
+    assert not np.array_equal(registry.evaluate('espresso', inputs, method),
+                              registry.evaluate('cold_brew', inputs, method))
+
+
+def test_evaluate_mixed_rejects_length_mismatch(models):
+    registry = ModelRegistry()
+    registry.register('espresso', models[0])
+    with pytest.raises(ValueError, match='Liczba identyfikatorów'):
+        registry.evaluate_mixed(['espresso'] * 3, np.zeros((4, 4)))
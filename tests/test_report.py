@@ -0,0 +1,27 @@
+"""
+Testy raportów graficznych - nazwy plików budowane z nazw rekordów
+"""
+
+import os
+
+import numpy as np
+
+from fuzzy_system import CoffeeQualitySystem
+from report import file_stems, render_reports
+
+
+def test_file_stems_are_safe_and_unique():
+    stems = file_stems(['shot', 'shot', '../etc/passwd', 'a/..', '..', '', 'ziarno łagodne', 'shot_000001'])
+    assert stems == ['shot', 'shot_000001', 'passwd', 'shot_000003', 'shot_000004', 'shot_000005',
+                     'ziarno_łagodne', 'shot_000001_000007']
+
+
+def test_reports_stay_in_output_dir(tmp_path):
+    compiled = CoffeeQualitySystem(metrics=False).compiled
+    output_dir = str(tmp_path / 'reports')
+    names = ['shot', 'shot', '../outside', '..']
+    paths = render_reports(compiled, names, np.full((len(names), 4), [5.0, 5.0, 5.0, 80.0]),
+                           output_dir, fmt='svg', workers=1)
+    assert len(set(paths)) == len(names)
+    assert sorted(os.listdir(output_dir)) == sorted(os.path.basename(path) for path in paths)
+    assert not os.path.exists(str(tmp_path / 'outside.svg'))
@@ -0,0 +1,75 @@
+"""
+Testy współdzielonego modelu - dołączanie z procesów roboczych (spawn),
+zwalnianie bloku przez właściciela i weryfikacja skrótu bufora
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import shared_model
+from batch_engine import sample_inputs
+from fuzzy_system import CoffeeQualitySystem
+
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Osobny proces - ostrzeżenia resource_tracker pojawiają się na stderr przy
+# jego zamknięciu, czyli po zakończeniu procesu publikującego
+SPAWN_POOL = """
+import multiprocessing
+import numpy as np
+import shared_model
+from batch_engine import sample_inputs
+from fuzzy_system import CoffeeQualitySystem
+
+if __name__ == '__main__':
+    compiled = CoffeeQualitySystem(metrics=False).compiled
+    block = shared_model.publish(compiled)
+    inputs = sample_inputs(compiled.input_ranges, 400, seed=1)
+    with multiprocessing.get_context('spawn').Pool(2, initializer=shared_model.pool_initializer,
+                                                   initargs=('shm:' + block.name,)) as pool:
+        quality = np.concatenate(pool.map(shared_model.evaluate_in_worker, np.array_split(inputs, 4)))
+    assert np.array_equal(quality, compiled.evaluate(inputs))
+    shared_model.close_shared(block)
+    try:
+        shared_model.attach_shared(block.name)
+    except FileNotFoundError:
+        print('released')
+"""
+
+
+@pytest.fixture(scope='module')
+def compiled():
+    return CoffeeQualitySystem(metrics=False).compiled
+
+
+def test_spawn_workers_leave_tracker_to_owner(tmp_path):
+    script = tmp_path / 'spawn_pool.py'
+    script.write_text(SPAWN_POOL, encoding='utf-8')
+    result = subprocess.run([sys.executable, str(script)], cwd=SRC_DIR, capture_output=True, text=True,
+                            env={**os.environ, 'PYTHONPATH': SRC_DIR}, timeout=300)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'released'
+    assert 'Traceback' not in result.stderr
+    assert 'leaked' not in result.stderr
+
+
+def test_attach_file_matches_compiled(compiled, tmp_path):
+    path = str(tmp_path / 'model.bin')
+    shared_model.export(compiled, path)
+    model = shared_model.attach(f'file:{path}')
+    inputs = sample_inputs(compiled.input_ranges, 500, seed=2)
+    np.testing.assert_array_equal(model.evaluate(inputs), compiled.evaluate(inputs))
+    assert model.fingerprint() == compiled.fingerprint()
+
+
+def test_unpack_rejects_tampered_buffer(compiled):
+    buffer = bytearray(shared_model.pack(compiled))
+    start = bytes(buffer).index(np.ascontiguousarray(compiled.term_params).tobytes())
+    buffer[start:start + 8] = np.float64(-1.0).tobytes()
+    with pytest.raises(ValueError):
+        shared_model.unpack(buffer)
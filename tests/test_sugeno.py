@@ -0,0 +1,71 @@
+"""
+Testy modelu Sugeno (TSK) - błąd kalibracji względem Mamdaniego, wiersze
+z NaN i bez aktywacji reguł oraz wejście w postaci tablicy strukturalnej
+"""
+
+import numpy as np
+import pytest
+
+import sugeno
+from batch_engine import (DEFAULT_QUALITY, ERROR_QUALITY, INPUT_NAMES, STATUS_CLAMPED, STATUS_ERROR,
+                          STATUS_NO_ACTIVATION, STATUS_OK, sample_inputs)
+from fuzzy_system import CoffeeQualitySystem
+from metrics import Metrics
+
+
+OK_ROW = [5.0, 5.0, 5.0, 80.0]
+NAN_ROW = [5.0, np.nan, 5.0, 80.0]
+NO_ACTIVATION_ROW = [0.0, 0.0, 7.0, 77.5]
+CLAMPED_ROW = [-3.0, 5.0, 12.0, 80.0]
+
+
+@pytest.fixture(scope='module')
+def compiled():
+    return CoffeeQualitySystem(metrics=False).compiled
+
+
+@pytest.fixture(scope='module')
+def calibration(compiled):
+    return sugeno.calibrate(compiled)
+
+
+def test_calibration_error_bounds(calibration):
+    model, report = calibration
+    assert report['fitted']
+    validation, initial = report['validation'], report['initial']
+    assert validation['rmse'] < 2.0
+    assert validation['rmse'] < initial['rmse']
+    assert validation['mae'] < initial['mae']
+    assert validation['label_agreement'] >= initial['label_agreement']
+    assert validation['label_agreement'] > 0.93
+
+
+def test_calibration_keeps_initial_constants_when_labels_get_worse(compiled):
+    # Mała próbka, dla której najmniejsze kwadraty obniżają zgodność kategorii
+    model, report = sugeno.calibrate(compiled, samples=2000, seed=0)
+    assert not report['fitted']
+    np.testing.assert_array_equal(model.constants, sugeno.SugenoRuleBase(compiled).constants)
+    assert report['fit']['label_agreement'] >= report['initial']['label_agreement'] - 0.01
+
+
+def test_nan_and_no_activation_rows(calibration):
+    model, _ = calibration
+    rows = [OK_ROW, NAN_ROW, NO_ACTIVATION_ROW, CLAMPED_ROW]
+    metrics = Metrics()
+    quality, status = model.evaluate_with_status(rows, metrics=metrics)
+
+    assert status.tolist() == [STATUS_OK, STATUS_ERROR, STATUS_NO_ACTIVATION, STATUS_CLAMPED]
+    assert quality[1] == ERROR_QUALITY
+    assert quality[2] == DEFAULT_QUALITY
+    np.testing.assert_array_equal(model.evaluate(rows), quality)
+    counters = metrics.stats()['counters']
+    assert (counters['fallback_error'], counters['fallback_no_activation'], counters['clamped']) == (1, 1, 1)
+
+
+def test_structured_input(calibration):
+    model, _ = calibration
+    inputs = sample_inputs(model.compiled.input_ranges, 3000, seed=5)
+    records = np.zeros(len(inputs), dtype=[('shot', 'i4')] + [(name, 'f8') for name in reversed(INPUT_NAMES)])
+    for column, name in enumerate(INPUT_NAMES):
+        records[name] = inputs[:, column]
+    np.testing.assert_array_equal(model.evaluate(records), model.evaluate(inputs))
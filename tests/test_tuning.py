@@ -0,0 +1,112 @@
+"""
+Testy strojenia funkcji przynależności - wczytywanie CSV, powtarzalny
+przebieg ewolucji różnicowej (w procesie i w puli), wznawianie
+z checkpointu i odrzucanie niezgodnych checkpointów
+"""
+
+import numpy as np
+import pytest
+
+import tuning
+from batch_engine import INPUT_NAMES, sample_inputs
+from fuzzy_system import INPUT_RANGES, CoffeeQualitySystem
+
+
+POPULATION = 6
+GENERATIONS = 4
+VARIABLES = ('acidity',)
+
+
+@pytest.fixture(scope='module')
+def system():
+    return CoffeeQualitySystem(metrics=False)
+
+
+@pytest.fixture(scope='module')
+def data(system):
+    """Oceny modelu z przesuniętym termem kwasowości - strojenie ma co poprawiać"""
+    functions = {var: dict(terms) for var, terms in system.membership_functions.items()}
+    kind, points = functions['acidity']['medium']
+    functions['acidity']['medium'] = (kind, [point + 1.0 for point in points])
+    inputs = sample_inputs(system.compiled.input_ranges, 60, seed=3)
+    return inputs, tuning.build_model(system.compiled, functions).evaluate(inputs)
+
+
+def _tune(system, data, **kwargs):
+    inputs, target = data
+    options = dict(variables=VARIABLES, population=POPULATION, generations=GENERATIONS,
+                   workers=1, seed=7)
+    options.update(kwargs)
+    return tuning.tune(system.compiled, system.membership_functions, INPUT_RANGES,
+                       inputs, target, **options)
+
+
+def _initial_rmse(system, data):
+    inputs, target = data
+    return tuning.residuals(system.compiled, inputs, target)['rmse']
+
+
+def test_read_tasting_csv(tmp_path):
+    path = tmp_path / 'tasting.csv'
+    path.write_text("score,temperature,aroma,acidity,bitterness\n"
+                    "70,90,8,3,6\n"
+                    "40.5,65,2,7,1\n", encoding='utf-8')
+    inputs, target = tuning.read_tasting_csv(str(path))
+    assert inputs.tolist() == [[6, 3, 8, 90], [1, 7, 2, 65]]
+    assert target.tolist() == [70, 40.5]
+
+
+@pytest.mark.parametrize('content, message', [
+    ("bitterness,acidity,aroma,score\n5,5,5,50\n", 'temperature'),
+    (",".join(INPUT_NAMES + ('score',)) + "\n", 'nie zawiera ocen'),
+])
+def test_read_tasting_csv_rejects_bad_files(tmp_path, content, message):
+    path = tmp_path / 'tasting.csv'
+    path.write_text(content, encoding='utf-8')
+    with pytest.raises(ValueError, match=message):
+        tuning.read_tasting_csv(str(path))
+
+
+def test_tune_is_deterministic_and_not_worse(system, data):
+    functions, error = _tune(system, data)
+    repeated, repeated_error = _tune(system, data)
+    assert functions == repeated
+    assert error == repeated_error
+    assert error < _initial_rmse(system, data)
+    # Strojona jest tylko kwasowość
+    for var in ('bitterness', 'aroma', 'temperature', 'quality'):
+        assert functions[var] == system.membership_functions[var]
+
+
+def test_pool_matches_in_process(system, data):
+    assert _tune(system, data, workers=2) == _tune(system, data)
+
+
+def test_resume_from_checkpoint(system, data, tmp_path):
+    checkpoint = str(tmp_path / 'state.npz')
+    seen = []
+    _tune(system, data, generations=2, checkpoint=checkpoint)
+    resumed = _tune(system, data, checkpoint=checkpoint,
+                    progress=lambda generation, error: seen.append(generation))
+    assert seen == [3, 4]
+    assert resumed == _tune(system, data)
+
+
+@pytest.mark.parametrize('change, message', [
+    ('data', 'innych danych'),
+    ('variables', 'innego układu'),
+    ('population', 'populację'),
+])
+def test_resume_rejects_mismatched_checkpoint(system, data, tmp_path, change, message):
+    checkpoint = str(tmp_path / 'state.npz')
+    _tune(system, data, generations=1, checkpoint=checkpoint)
+    inputs, target = data
+    kwargs = {'checkpoint': checkpoint}
+    if change == 'data':
+        data = (inputs, target + 1.0)
+    elif change == 'variables':
+        kwargs['variables'] = ('aroma',)
+    else:
+        kwargs['population'] = POPULATION + 2
+    with pytest.raises(ValueError, match=message):
+        _tune(system, data, **kwargs)
@@ -0,0 +1,60 @@
+"""
+Testy propagacji niepewności - powtarzalność przy stałym ziarnie,
+zerowy szum odtwarzający ocenę punktową i rozkład kategorii jakości
+"""
+
+import numpy as np
+import pytest
+
+import uncertainty
+from batch_engine import QUALITY_LABELS
+from fuzzy_system import CoffeeQualitySystem
+
+
+READING = [6.0, 4.0, 7.5, 82.0]
+NOISE = [0.5, 0.5, 0.5, 2.0]
+CUPS = [[6.0, 4.0, 7.5, 82.0], [2.0, 1.5, 5.0, 62.0], [8.0, 3.0, 9.0, 90.0]]
+
+
+@pytest.fixture(scope='module')
+def system():
+    return CoffeeQualitySystem(metrics=False)
+
+
+def test_seeded_runs_are_reproducible(system):
+    first = system.evaluate_distribution(READING, NOISE, n_samples=2000, seed=3)
+    second = system.evaluate_distribution(READING, NOISE, n_samples=2000, seed=3)
+    other = system.evaluate_distribution(READING, NOISE, n_samples=2000, seed=4)
+    np.testing.assert_array_equal(first['quality'], second['quality'])
+    assert first['quantiles'] == second['quantiles']
+    assert not np.array_equal(first['quality'], other['quality'])
+
+
+def test_zero_noise_reproduces_point_score(system):
+    point = system.evaluate_batch([READING])[0]
+    result = system.evaluate_distribution(READING, 0.0, n_samples=100)
+    np.testing.assert_allclose(result['quality'], point, rtol=1e-12)
+    assert result['mean'] == pytest.approx(point)
+    assert result['std'] == 0.0
+    assert result['label_probabilities'][system.get_quality_label(point)] == 1.0
+
+
+def test_label_probabilities_sum_to_one(system):
+    result = system.evaluate_distribution(READING, NOISE, n_samples=3000)
+    assert list(result['label_probabilities']) == list(QUALITY_LABELS)
+    assert sum(result['label_probabilities'].values()) == pytest.approx(1.0)
+    low, median, high = (result['quantiles'][q] for q in uncertainty.QUANTILES)
+    assert low <= median <= high
+
+    batch = system.evaluate_distributions(CUPS, NOISE, n_samples=3000)
+    assert batch['quality'].shape == (len(CUPS), 3000)
+    np.testing.assert_allclose(batch['label_probabilities'].sum(axis=1), 1.0)
+
+
+def test_default_sample_count(system):
+    assert len(system.evaluate_distribution(READING, NOISE)['quality']) == uncertainty.N_SAMPLES
+
+
+def test_negative_std_is_rejected(system):
+    with pytest.raises(ValueError, match='ujemne'):
+        system.evaluate_distribution(READING, [0.5, -0.1, 0.5, 1.0])